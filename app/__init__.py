@@ -3,6 +3,9 @@ from flask import Flask
 from dotenv import load_dotenv
 from flask_swagger_ui import get_swaggerui_blueprint
 from app.extensions import db, ma, limiter, cache
+from app.utils.cache_backends import cache_stats
+from app.utils.compression import init_compression
+from app.utils.fast_json import install_json_provider
 from config import TestingConfig, DevelopmentConfig
 
 load_dotenv()
@@ -38,6 +41,8 @@ def create_app(config_name="DevelopmentConfig") -> Flask:
     ma.init_app(app)
     limiter.init_app(app)
     cache.init_app(app)
+    install_json_provider(app)
+    init_compression(app)
 
     import app.models as models
 
@@ -52,6 +57,10 @@ def create_app(config_name="DevelopmentConfig") -> Flask:
     app.register_blueprint(inventory_bp, url_prefix="/inventory")
 
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
+
+    from app.upgrades import schema_cli
+
+    app.cli.add_command(schema_cli)
     
     with app.app_context():
         db.create_all()
@@ -62,6 +71,7 @@ def create_app(config_name="DevelopmentConfig") -> Flask:
             "status": "Mechanic Shop API running",
             "swagger_ui": "http://127.0.0.1:5000/api/docs",
             "swagger_yaml": "http://127.0.0.1:5000/static/swagger.yaml",
+            "cache": cache_stats(),
         }
 
 
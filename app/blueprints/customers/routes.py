@@ -1,11 +1,19 @@
 from ast import stmt
-from flask import request
+from flask import make_response, request
+import jose
 from app.extensions import db, limiter, cache
 from app.models import Customer, ServiceTicket
 from app.blueprints.customers import customers_bp
-from app.blueprints.customers.schemas import customer_schema, login_schema, customers_schema
-from app.utils.auth import encode_token, token_required
+from app.blueprints.customers.schemas import customer_schema, login_schema
+from app.utils.auth import decode_token, encode_refresh_token, encode_token, token_required
 from app.blueprints.service_tickets.schemas import service_tickets_schema
+from app.utils.counts import count_rows, offset_page, wants_total
+from app.utils.etag import conditional_get, versioned_cache_key
+from app.utils import ticket_cache
+from app.utils.fieldsets import Fieldset, FieldsetError
+from app.utils.pagination import PaginationError, keyset_page, parse_limit
+from app.utils.passwords import HashingBusy
+from app.utils.serializers import fast_dump
 
 @customers_bp.post("/login")
 def login_customer():
@@ -20,18 +28,81 @@ def login_customer():
     password = data.get("password")
 
     customer = Customer.query.filter_by(email=email).first()
-    if not customer or not customer.check_password(password):
-        return {"message": "Invalid credentials"}, 401
-
+    try:
+        if not customer or not customer.check_password(password):
+            return {"message": "Invalid credentials"}, 401
+        if customer.password_needs_rehash():
+            # stored with older hash parameters; upgrade while we have the plaintext
+            customer.set_password(password)
+            db.session.commit()
+    except HashingBusy:
+        return {"error": "Too many logins in progress, try again shortly"}, 503, {"Retry-After": "1"}
 
     token = encode_token(customer.id)
-    return {"token": token}, 200
+    return {"token": token, "refresh_token": encode_refresh_token(customer.id)}, 200
+
+@customers_bp.post("/refresh")
+def refresh_token():
+    # trade a refresh token for a new access token, without another password check
+    data = request.get_json() or {}
+    token = data.get("refresh_token")
+    if not isinstance(token, str) or not token:
+        return {"error": "refresh_token is required"}, 400
+    try:
+        customer_id, _ = decode_token(token, "refresh")
+    except jose.exceptions.ExpiredSignatureError:
+        return {"message": "Refresh token has expired"}, 401
+    except (jose.exceptions.JWTError, KeyError, ValueError):
+        return {"message": "Invalid refresh token"}, 401
+
+    if db.session.get(Customer, customer_id) is None:
+        return {"message": "Invalid refresh token"}, 401
+    return {"token": encode_token(customer_id), "refresh_token": encode_refresh_token(customer_id)}, 200
 
 @customers_bp.get("/my-tickets")
 @token_required
 def get_my_tickets(customer_id):
-    tickets = ServiceTicket.query.filter_by(customer_id=customer_id).all()
-    return service_tickets_schema.dump(tickets), 200
+    """
+    Newest first, keyset-paginated by (service_date, id).
+    Query params: limit (default 50, max 500), after, fields, expand, total=1
+    Pages are cached per customer until one of their tickets changes
+    (app.utils.ticket_cache); the cache key doubles as the ETag.
+    """
+    key = ticket_cache.page_key(customer_id, request.full_path)
+    if request.if_none_match.contains_weak(key):
+        response = make_response("", 304)
+        response.set_etag(key)
+        return response
+
+    body = cache.get(key)
+    if body is None:
+        try:
+            fieldset = Fieldset(service_tickets_schema, request.args)
+            limit = parse_limit(request.args.get("limit"))
+            base = ServiceTicket.query.filter_by(customer_id=customer_id)
+            query = base.options(*fieldset.query_options(extra_columns=("service_date",)))
+            tickets, next_cursor = keyset_page(
+                query,
+                [ServiceTicket.service_date, ServiceTicket.id],
+                after=request.args.get("after"),
+                limit=limit,
+                descending=True,
+            )
+        except (PaginationError, FieldsetError) as e:
+            return {"error": str(e)}, 400
+        body = {
+            "items": fast_dump(fieldset.schema(many=True), tickets),
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+        }
+        if wants_total(request.args):
+            body["total"] = count_rows(base, ("service_tickets",))
+        cache.set(key, body, timeout=ticket_cache.CACHE_TIMEOUT)
+
+    response = make_response(body, 200)
+    response.set_etag(key)
+    return response
 
 @customers_bp.post("/")
 @limiter.limit("5 per minute") # Limit to 5 customer creations per minute, considering multple users servicing multiple customers at one time
@@ -48,7 +119,10 @@ def create_customer():
         phone_number=data["phone_number"],
         password="temp"  # will be overwritten by set_password
     )
-    customer.set_password(data["password"])
+    try:
+        customer.set_password(data["password"])
+    except HashingBusy:
+        return {"error": "Too many sign-ups in progress, try again shortly"}, 503, {"Retry-After": "1"}
 
 
     db.session.add(customer)
@@ -57,31 +131,37 @@ def create_customer():
 
 @customers_bp.get("/")
 @limiter.limit("10 per minute")
-@cache.cached(timeout=120, query_string=True)  # IMPORTANT: cache must vary by page/per_page
+@conditional_get("customers")
+@cache.cached(timeout=120, make_cache_key=versioned_cache_key("customers"))  # key varies by page/per_page; any customers write invalidates it
 def get_customers():
     page = request.args.get("page", default=1, type=int)
-    per_page = request.args.get("per_page", default=10, type=int)
-    
-    pagination = Customer.query.paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False
+    try:
+        per_page = parse_limit(request.args.get("per_page"), default=10)
+        fieldset = Fieldset(customer_schema, request.args)
+    except (PaginationError, FieldsetError) as e:
+        return {"error": str(e)}, 400
+
+    # total comes from the count cache (app.utils.counts), not a COUNT(*) per page
+    result = offset_page(
+        Customer.query.options(*fieldset.query_options()).order_by(Customer.id),
+        page,
+        per_page,
+        tables=("customers",),
+        count_query=Customer.query,
     )
-
-    return {
-        "items": customers_schema.dump(pagination.items),
-        "page": pagination.page,
-        "per_page": pagination.per_page,
-        "pages": pagination.pages,
-        "total": pagination.total,
-        "has_next": pagination.has_next,
-        "has_prev": pagination.has_prev,
-    }, 200
+    result["items"] = fast_dump(fieldset.schema(many=True), result["items"])
+    return result, 200
 
 @customers_bp.get("/<int:id>")
+@conditional_get("customers")
 def get_customer(id):
-    customer = Customer.query.get_or_404(id)
-    return customer_schema.dump(customer), 200
+    try:
+        fieldset = Fieldset(customer_schema, request.args)
+    except FieldsetError as e:
+        return {"error": str(e)}, 400
+
+    customer = Customer.query.options(*fieldset.query_options()).get_or_404(id)
+    return fieldset.schema().dump(customer), 200
 
 @customers_bp.put("/<int:id>")
 @token_required
@@ -106,5 +186,6 @@ def delete_customer(customer_id, id):
         return {"message": "Forbidden"}, 403
     customer = Customer.query.get_or_404(id)
     db.session.delete(customer)
+    ticket_cache.note_customers(id)
     db.session.commit()
     return {"message": f"Customer {id} deleted"}, 200
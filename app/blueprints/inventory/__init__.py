@@ -2,4 +2,4 @@ from flask import Blueprint
 
 inventory_bp = Blueprint("inventory", __name__)
 
-from app.blueprints.inventory import routes
+from app.blueprints.inventory import routes, commands
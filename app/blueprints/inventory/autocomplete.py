@@ -0,0 +1,246 @@
+"""
+In-process part-name autocomplete.
+
+PartNameIndex keeps two sorted arrays: the normalised full names, and the
+suffix starting at every later word ("front brake pad" -> "brake pad",
+"pad"), so a prefix lookup is one bisect plus k steps. An optional trigram
+index over the distinct words in part names ranks fuzzy matches for typos.
+
+The index for an app lives in app.extensions and follows the inventory
+catalog version (app.blueprints.inventory.catalog): at most every
+AUTOCOMPLETE_RECHECK_SECONDS a lookup reads the catalog counter and, if it
+moved, applies only the parts changed or deleted since, so writes made by
+other processes show up within that interval and this process's own writes
+immediately. Lookups never wait on the database or on each other: a delta
+is applied to a copy of the index under a lock, then swapped in.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.blueprints.inventory import catalog
+from app.extensions import db
+from app.models import Inventory, InventoryTombstone
+
+_NON_WORD = re.compile(r"[\W_]+")
+FUZZY_MIN_SIMILARITY = 0.3
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PartNameIndex:
+    def __init__(self):
+        self.names = {}  # id -> display name
+        self._keys = {}  # id -> normalised name
+        self._full = []  # sorted (normalised name, id)
+        self._words = []  # sorted (suffix from a later word, id)
+        self._word_ids = defaultdict(set)  # word -> ids of parts using it
+        self._grams = defaultdict(set)  # trigram -> words
+
+    def __len__(self):
+        return len(self.names)
+
+    def copy(self):
+        clone = PartNameIndex()
+        clone.names = dict(self.names)
+        clone._keys = dict(self._keys)
+        clone._full = list(self._full)
+        clone._words = list(self._words)
+        clone._word_ids = defaultdict(set, {word: set(ids) for word, ids in self._word_ids.items()})
+        clone._grams = defaultdict(set, {gram: set(words) for gram, words in self._grams.items()})
+        return clone
+
+    @staticmethod
+    def _suffixes(key):
+        # normalised names are single-space separated
+        return [key[m.end():] for m in re.finditer(" ", key)]
+
+    def load(self, rows):
+        """Replace the contents with (id, name) rows; sorts once instead of inserting one by one."""
+        self.__init__()
+        for part_id, name in rows:
+            key = normalize(name)
+            self.names[part_id] = name
+            self._keys[part_id] = key
+            self._full.append((key, part_id))
+            self._words.extend((suffix, part_id) for suffix in self._suffixes(key))
+            self._index_grams(part_id, key)
+        self._full.sort()
+        self._words.sort()
+
+    def add(self, part_id, name):
+        if part_id in self.names:
+            self.remove(part_id)
+        key = normalize(name)
+        self.names[part_id] = name
+        self._keys[part_id] = key
+        insort(self._full, (key, part_id))
+        for suffix in self._suffixes(key):
+            insort(self._words, (suffix, part_id))
+        self._index_grams(part_id, key)
+
+    def _index_grams(self, part_id, key):
+        for word in set(key.split()):
+            if not self._word_ids[word]:
+                for gram in trigrams(word):
+                    self._grams[gram].add(word)
+            self._word_ids[word].add(part_id)
+
+    def remove(self, part_id):
+        key = self._keys.pop(part_id, None)
+        if key is None:
+            return
+        del self.names[part_id]
+        self._delete(self._full, (key, part_id))
+        for suffix in self._suffixes(key):
+            self._delete(self._words, (suffix, part_id))
+        for word in set(key.split()):
+            ids = self._word_ids[word]
+            ids.discard(part_id)
+            if ids:
+                continue
+            del self._word_ids[word]
+            for gram in trigrams(word):
+                self._grams[gram].discard(word)
+                if not self._grams[gram]:
+                    del self._grams[gram]
+
+    @staticmethod
+    def _delete(array, item):
+        i = bisect_left(array, item)
+        if i < len(array) and array[i] == item:
+            del array[i]
+
+    @staticmethod
+    def _scan(array, prefix, limit, seen):
+        out = []
+        i = bisect_left(array, (prefix,))
+        while i < len(array) and len(out) < limit and array[i][0].startswith(prefix):
+            part_id = array[i][1]
+            if part_id not in seen:
+                seen.add(part_id)
+                out.append(part_id)
+            i += 1
+        return out
+
+    def prefix(self, query, limit=10):
+        """Ids whose name starts with `query`, then ids with a later word starting with it."""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        seen = set()
+        ids = self._scan(self._full, prefix, limit, seen)
+        if len(ids) < limit:
+            ids += self._scan(self._words, prefix, limit - len(ids), seen)
+        return ids
+
+    def _similar_words(self, token):
+        """{word: Jaccard similarity of trigram sets} for indexed words close to `token`."""
+        grams = trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        similar = {}
+        for word, common in shared.items():
+            similarity = common / (len(grams) + len(trigrams(word)) - common)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                similar[word] = similarity
+        return similar
+
+    def fuzzy(self, query, limit=10, exclude=()):
+        """
+        Ids ranked by how closely their words match the query words, best first.
+        Each query word scores its most similar word in the name; scores are averaged.
+        Parts matching every query word are ranked on their own when there are enough.
+        """
+        tokens = normalize(query).split()
+        if not tokens:
+            return []
+        similar = [self._similar_words(token) for token in tokens]
+        matched = [set().union(*(self._word_ids[word] for word in words)) for words in similar]
+        candidates = set.intersection(*matched)
+        if len(candidates) - len(exclude) < limit:
+            candidates = set().union(*matched)
+        candidates.difference_update(exclude)
+
+        def score(part_id):
+            words = self._keys[part_id].split()
+            return sum(max(sims.get(word, 0) for word in words) for sims in similar), -part_id
+
+        return heapq.nlargest(limit, candidates, key=score)
+
+    def suggest(self, query, limit=10, fuzzy=False):
+        ids = self.prefix(query, limit)
+        if fuzzy and len(ids) < limit:
+            ids += self.fuzzy(query, limit - len(ids), exclude=set(ids))
+        return [{"id": part_id, "name": self.names[part_id]} for part_id in ids]
+
+
+class CatalogIndex:
+    """PartNameIndex kept in step with the inventory catalog version."""
+
+    def __init__(self):
+        self.index = PartNameIndex()
+        self.version = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()  # held only while a delta is applied
+
+    def _due(self) -> bool:
+        if self.version is None:
+            return True
+        if current_app.extensions.get(catalog.WRITTEN, 0) > self.version:
+            return True
+        return time.monotonic() >= self._next_check
+
+    def refresh(self):
+        if not self._due():
+            return
+        self._next_check = time.monotonic() + current_app.config.get("AUTOCOMPLETE_RECHECK_SECONDS", 1.0)
+        version = catalog.current_version()
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return  # another thread applied it meanwhile
+            if self.version is None or version < self.version:
+                # first use, or the counter went backwards (database recreated)
+                index = PartNameIndex()
+                index.load(db.session.execute(select(Inventory.id, Inventory.name)).all())
+            else:
+                changed = db.session.execute(
+                    select(Inventory.id, Inventory.name).where(Inventory.version > self.version)
+                ).all()
+                deleted = db.session.scalars(
+                    select(InventoryTombstone.inventory_id).where(InventoryTombstone.version > self.version)
+                ).all()
+                # lookups keep reading the current index while the copy is updated
+                index = self.index.copy()
+                for part_id in deleted:
+                    index.remove(part_id)
+                for part_id, name in changed:
+                    index.add(part_id, name)
+            self.index, self.version = index, version
+
+    def suggest(self, query, limit=10, fuzzy=False):
+        self.refresh()
+        return self.index.suggest(query, limit, fuzzy)
+
+
+def get_index() -> CatalogIndex:
+    index = current_app.extensions.get("inventory_autocomplete")
+    if index is None:
+        index = current_app.extensions["inventory_autocomplete"] = CatalogIndex()
+    return index
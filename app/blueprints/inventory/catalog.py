@@ -0,0 +1,98 @@
+"""
+Versioned inventory catalog.
+
+Every part write takes the next value of the "inventory_catalog" counter and
+stamps it on the part (or on a tombstone when the part is deleted). Clients
+sync with GET /inventory/?since=<version> and receive only the parts and
+deletions newer than that. The full catalog dump is cached under its
+version, so it is rebuilt only after a write.
+"""
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from app.extensions import cache, db
+from app.models import Inventory, InventoryTombstone, TableVersion
+from app.utils import ticket_cache
+from app.utils.serializers import fast_dump
+from app.utils.sql import insert_ignore
+
+CATALOG_COUNTER = "inventory_catalog"
+CACHE_TIMEOUT = 24 * 60 * 60
+WRITTEN = "inventory_catalog_written"  # app.extensions: last version this process committed
+
+
+def current_version() -> int:
+    version = db.session.scalar(select(TableVersion.version).where(TableVersion.name == CATALOG_COUNTER))
+    return version or 0
+
+
+def next_version() -> int:
+    """Increment the catalog counter in the current transaction and return the new value."""
+    # tickets show part names and prices
+    ticket_cache.note_all()
+    db.session.execute(insert_ignore(TableVersion.__table__).values(name=CATALOG_COUNTER, version=0))
+    db.session.execute(
+        update(TableVersion)
+        .where(TableVersion.name == CATALOG_COUNTER)
+        .values(version=TableVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return current_version()
+
+
+def stamp(part) -> int:
+    """Mark a created or updated part as changed in a new catalog version."""
+    part.version = next_version()
+    if part.id is not None:
+        db.session.execute(delete(InventoryTombstone).where(InventoryTombstone.inventory_id == part.id))
+    return part.version
+
+
+def tombstone(part_id: int) -> int:
+    version = next_version()
+    db.session.execute(insert_ignore(InventoryTombstone.__table__).values(inventory_id=part_id, version=version))
+    db.session.execute(
+        update(InventoryTombstone)
+        .where(InventoryTombstone.inventory_id == part_id)
+        .values(version=version)
+        .execution_options(synchronize_session=False)
+    )
+    return version
+
+
+def _cache_key(version):
+    return f"inventory:catalog:{version}"
+
+
+def full_catalog(schema):
+    """(version, dumped parts) for the whole catalog, served from cache when unchanged."""
+    version = current_version()
+    payload = cache.get(_cache_key(version))
+    if payload is None:
+        payload = fast_dump(schema, Inventory.query.order_by(Inventory.id).all(), many=True)
+        cache.set(_cache_key(version), payload, timeout=CACHE_TIMEOUT)
+    return version, payload
+
+
+def invalidate(version):
+    """Drop the cached dump that `version` superseded (called after commit)."""
+    cache.delete(_cache_key(version - 1))
+    # lets the autocomplete index pick up this process's own writes at once
+    current_app.extensions[WRITTEN] = max(version, current_app.extensions.get(WRITTEN, 0))
+
+
+def catalog_delta(schema, since: int):
+    """Parts changed and ids deleted after catalog version `since`."""
+    version = current_version()
+    changed = Inventory.query.filter(Inventory.version > since).order_by(Inventory.id).all()
+    deleted = db.session.scalars(
+        select(InventoryTombstone.inventory_id)
+        .where(InventoryTombstone.version > since)
+        .order_by(InventoryTombstone.inventory_id)
+    ).all()
+    return {
+        "version": version,
+        "since": since,
+        "changed": fast_dump(schema, changed, many=True),
+        "deleted": deleted,
+    }
@@ -0,0 +1,37 @@
+"""
+CLI for the inventory blueprint:
+
+    flask inventory import supplier.csv [--format ndjson] [--batch-size 2000]
+"""
+import sys
+
+import click
+from flask import current_app
+
+from app.blueprints.inventory import inventory_bp, importer
+
+
+@inventory_bp.cli.command("import")
+@click.argument("file", type=click.File("rb"))
+@click.option("--format", "fmt", type=click.Choice(importer.FORMATS), help="Defaults to the file extension.")
+@click.option("--batch-size", type=click.IntRange(1, 10000), default=None, help="Rows per transaction.")
+def import_command(file, fmt, batch_size):
+    """Upsert parts from a CSV or NDJSON price file ("-" reads stdin)."""
+    try:
+        fmt = importer.detect_format(fmt, filename=file.name)
+    except importer.ImportFormatError as e:
+        raise click.UsageError(str(e))
+    batch_size = batch_size or current_app.config.get("IMPORT_BATCH_SIZE", 1000)
+
+    created = updated = errors = 0
+    for number, result in enumerate(importer.import_parts(importer.iter_rows(file, fmt), batch_size), start=1):
+        created += result.created
+        updated += result.updated
+        errors += len(result.errors)
+        for error in result.errors:
+            click.echo(f"row {error['row']}: {error['error']}", err=True)
+        click.echo(f"batch {number}: {created} created, {updated} updated, {errors} errors", err=True)
+
+    click.echo(f"done: {created} created, {updated} updated, {errors} errors")
+    if errors:
+        sys.exit(1)
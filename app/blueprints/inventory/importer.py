@@ -0,0 +1,291 @@
+"""
+Streaming bulk import of supplier price files.
+
+Rows are read lazily from a CSV or NDJSON stream and upserted in batches:
+a row with a `sku` matches the part with that SKU, otherwise it matches on
+`name` (the oldest part when several share a name). Each batch is one
+transaction and one catalog version, so only a batch worth of rows is ever
+held in memory and a bad row never rolls back the rows around it.
+
+    name,sku,price,quantity_on_hand
+    Oil Filter,OF-100,9.99,40
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.blueprints.inventory import catalog, stock
+from app.extensions import db
+from app.models import Inventory, InventoryTombstone, service_inventory
+from app.utils.rollups import apply_price_change
+
+FORMATS = ("csv", "ndjson")
+MIMETYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+class ImportFormatError(ValueError):
+    """Raised when the upload format cannot be determined or read."""
+
+
+@dataclass
+class BatchResult:
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)  # [{"row": n, "error": "..."}]
+
+
+def detect_format(fmt=None, mimetype=None, filename=None):
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in FORMATS:
+            raise ImportFormatError("format must be 'csv' or 'ndjson'")
+        return fmt
+    if mimetype in MIMETYPES:
+        return MIMETYPES[mimetype]
+    if filename:
+        ext = filename.rsplit(".", 1)[-1].lower()
+        if ext in ("ndjson", "jsonl"):
+            return "ndjson"
+        if ext == "csv":
+            return "csv"
+    raise ImportFormatError("Could not detect the file format; pass ?format=csv or ?format=ndjson")
+
+
+class _Lines:
+    """
+    Decodes a binary stream one line at a time. A line that is not valid
+    UTF-8 is recorded in `errors` and read as blank, so the rows after it
+    still import.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.number = 0
+        self.errors = []  # [(line_number, message)]
+
+    def __iter__(self):
+        for raw in self.stream:
+            self.number += 1
+            try:
+                line = raw.decode("utf-8-sig" if self.number == 1 else "utf-8")
+            except UnicodeDecodeError as e:
+                self.errors.append((self.number, f"not valid UTF-8 (byte {e.start + 1})"))
+                line = "\n"
+            yield line
+
+    def pop_errors(self):
+        errors, self.errors = self.errors, []
+        return errors
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield (row_number, dict | error message) from a binary stream, one line
+    at a time. Lines that cannot be decoded or parsed come back as errors
+    rather than ending the import.
+    """
+    lines = _Lines(stream)
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                yield from lines.pop_errors()
+                yield lines.number, f"invalid CSV: {e}"
+                continue
+            yield from lines.pop_errors()
+            yield reader.line_num, row
+        yield from lines.pop_errors()
+        return
+
+    for line in lines:
+        yield from lines.pop_errors()
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield lines.number, "invalid JSON"
+            continue
+        yield lines.number, row if isinstance(row, dict) else "each line must be a JSON object"
+
+
+def _text(value):
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _clean(row):
+    """Validated {"name", "sku", "price", "quantity_on_hand"} or an error message."""
+    if not isinstance(row, dict):
+        return row
+
+    name = _text(row.get("name"))
+    sku = _text(row.get("sku"))
+    if name is None and sku is None:
+        return "name or sku is required"
+
+    price = row.get("price")
+    if price in (None, ""):
+        return "price is required"
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return "price must be a number"
+    if price < 0:
+        return "price must not be negative"
+
+    quantity = row.get("quantity_on_hand")
+    if quantity in (None, ""):
+        quantity = None
+    else:
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            return "quantity_on_hand must be a non-negative integer"
+        if not 0 <= quantity <= stock.MAX_QUANTITY:
+            return f"quantity_on_hand must be between 0 and {stock.MAX_QUANTITY}"
+
+    return {"name": name, "sku": sku, "price": price, "quantity_on_hand": quantity}
+
+
+def _key(row):
+    return ("sku", row["sku"]) if row["sku"] else ("name", row["name"])
+
+
+def _existing(rows):
+    """
+    Map row keys to the matching part's current columns. A SKU that is not
+    in the catalog yet falls back to a part of the same name without a SKU,
+    so the first price file adopts parts created through the API.
+    """
+    columns = (Inventory.id, Inventory.name, Inventory.sku, Inventory.price, Inventory.quantity_on_hand)
+    found = {}
+    skus = [r["sku"] for r in rows if r["sku"]]
+    if skus:
+        for part in db.session.execute(select(*columns).where(Inventory.sku.in_(skus))):
+            found[("sku", part.sku)] = part
+
+    by_name = {}
+    names = [r["name"] for r in rows if r["name"] and _key(r) not in found]
+    if names:
+        query = select(*columns).where(Inventory.name.in_(names)).order_by(Inventory.id.desc())
+        for part in db.session.execute(query):
+            # descending ids, so the oldest part of a name is kept
+            by_name[part.name] = part
+            if part.sku is None:
+                by_name[("unassigned", part.name)] = part
+    for row in rows:
+        key = _key(row)
+        if key in found or row["name"] is None:
+            continue
+        part = by_name.get(row["name"]) if key[0] == "name" else by_name.get(("unassigned", row["name"]))
+        if part is not None:
+            found[key] = part
+    return found
+
+
+def _apply_batch(rows):
+    """
+    Upsert one batch of cleaned rows in the current transaction.
+    Returns (created, updated, version, rejected) where rejected lists (row, error).
+    """
+    # later rows for the same part win, as if the file were applied top to bottom
+    by_key = {_key(row): row for row in rows}
+    found = _existing(list(by_key.values()))
+    version = catalog.next_version()
+
+    inserts, changes, rejected = [], {}, []
+    for key, row in by_key.items():
+        part = found.get(key)
+        if part is None:
+            if row["name"] is None:
+                rejected.append((row, "name is required for a new part"))
+                continue
+            inserts.append({**row, "version": version})
+        else:
+            changes[part.id] = (part, row)
+
+    updates, price_deltas = [], {}
+    for part_id, (part, row) in changes.items():
+        if row["price"] != part.price:
+            price_deltas[part_id] = row["price"] - part.price
+        updates.append({
+            "id": part_id,
+            "name": row["name"] or part.name,
+            "sku": row["sku"] or part.sku,
+            "price": row["price"],
+            "quantity_on_hand": part.quantity_on_hand if row["quantity_on_hand"] is None else row["quantity_on_hand"],
+            "version": version,
+        })
+
+    if price_deltas:
+        # revenue rollups only need touching for parts that are on tickets
+        used = db.session.scalars(
+            select(service_inventory.c.inventory_id.distinct()).where(
+                service_inventory.c.inventory_id.in_(list(price_deltas))
+            )
+        ).all()
+        for part_id in used:
+            apply_price_change(part_id, price_deltas[part_id])
+    if updates:
+        db.session.execute(update(Inventory), updates)
+    if inserts:
+        db.session.execute(insert(Inventory), inserts)
+        # ids can be reused after a delete; a new part must not also read as deleted
+        db.session.execute(
+            delete(InventoryTombstone).where(
+                InventoryTombstone.inventory_id.in_(select(Inventory.id).where(Inventory.version == version))
+            )
+        )
+    return len(inserts), len(updates), version, rejected
+
+
+def import_parts(rows, batch_size=1000):
+    """
+    Upsert (row_number, row) pairs from iter_rows. Yields a BatchResult per
+    committed batch; per-row errors are reported in the batch they occur in.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            return
+
+        result = BatchResult()
+        valid, numbers = [], {}
+        for number, raw in chunk:
+            row = _clean(raw)
+            if isinstance(row, str):
+                result.errors.append({"row": number, "error": row})
+                continue
+            valid.append(row)
+            numbers[id(row)] = number
+
+        if valid:
+            try:
+                result.created, result.updated, version, rejected = _apply_batch(valid)
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                result.errors.extend(
+                    {"row": numbers[id(r)], "error": f"rejected by the database: {e.orig}"} for r in valid
+                )
+            else:
+                catalog.invalidate(version)
+                result.errors.extend({"row": numbers[id(r)], "error": error} for r, error in rejected)
+
+        result.errors.sort(key=lambda err: err["row"])
+        yield result
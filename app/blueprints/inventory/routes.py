@@ -1,8 +1,35 @@
-from flask import request
+import json
+import tempfile
+
+from flask import Response, current_app, request, stream_with_context
+from sqlalchemy import select
 from app.extensions import db
 from app.models import Inventory
-from app.blueprints.inventory import inventory_bp
-from app.blueprints.inventory.schemas import inventory_schema, inventories_schema
+from app.blueprints.inventory import inventory_bp, autocomplete, catalog, importer, stock
+from app.blueprints.inventory.schemas import inventory_schema
+from app.utils.etag import conditional_get
+from app.utils.fieldsets import Fieldset, FieldsetError
+from app.utils.pagination import PaginationError, parse_limit
+from app.utils.rollups import apply_price_change
+
+
+def _parse_quantity_on_hand(data):
+    """Returns (value, None) or (None, error). Missing/null means stock is not tracked."""
+    value = data.get("quantity_on_hand")
+    if value is None:
+        return None, None
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= stock.MAX_QUANTITY:
+        return None, f"quantity_on_hand must be an integer between 0 and {stock.MAX_QUANTITY}"
+    return value, None
+
+
+def _sku_taken(sku, exclude_id=None):
+    if not sku:
+        return False
+    query = select(Inventory.id).where(Inventory.sku == sku)
+    if exclude_id is not None:
+        query = query.where(Inventory.id != exclude_id)
+    return db.session.scalar(query) is not None
 
 
 @inventory_bp.post("/")
@@ -18,22 +45,146 @@ def create_part():
     except ValueError:
         return {"error": "price must be a number"}, 400
 
-    part = Inventory(name=data["name"], price=price)
+    quantity_on_hand, error = _parse_quantity_on_hand(data)
+    if error:
+        return {"error": error}, 400
+
+    if _sku_taken(data.get("sku")):
+        return {"error": f"sku {data['sku']} already exists"}, 409
+
+    part = Inventory(
+        name=data["name"], sku=data.get("sku") or None, price=price, quantity_on_hand=quantity_on_hand
+    )
     db.session.add(part)
+    db.session.flush()
+    version = catalog.stamp(part)
     db.session.commit()
+    catalog.invalidate(version)
     return inventory_schema.dump(part), 201
 
 
+@inventory_bp.post("/import")
+def import_parts():
+    """
+    Bulk upsert from a CSV or NDJSON upload, either as the raw request body
+    (Content-Type text/csv or application/x-ndjson) or a multipart "file".
+    Query params: format=csv|ndjson (overrides detection), batch_size
+
+    Streams NDJSON progress, one line per committed batch plus a summary:
+        {"batch": 1, "processed": 1000, "created": 990, "updated": 5, "errors": [{"row": 7, "error": "..."}]}
+        {"done": true, "processed": ..., "created": ..., "updated": ..., "error_count": ...}
+    Undecodable or unparsable lines are reported as row errors. If the import
+    stops early, the last line is {"done": false, "error": ..., <totals so far>}.
+    """
+    upload = request.files.get("file")
+    try:
+        fmt = importer.detect_format(
+            request.args.get("format"),
+            None if upload else request.mimetype,
+            upload.filename if upload else None,
+        )
+        batch_size = int(request.args.get("batch_size", current_app.config.get("IMPORT_BATCH_SIZE", 1000)))
+    except importer.ImportFormatError as e:
+        return {"error": str(e)}, 400
+    except ValueError:
+        return {"error": "batch_size must be an integer"}, 400
+    if not 1 <= batch_size <= 10000:
+        return {"error": "batch_size must be between 1 and 10000"}, 400
+
+    if upload:
+        # request.files are closed with the request, before the response streams
+        stream = tempfile.TemporaryFile()
+        upload.save(stream)
+        stream.seek(0)
+    else:
+        stream = request.stream
+
+    def progress():
+        totals = {"processed": 0, "created": 0, "updated": 0, "error_count": 0}
+        try:
+            rows = importer.iter_rows(stream, fmt)
+            for number, result in enumerate(importer.import_parts(_counted(rows, totals), batch_size), start=1):
+                totals["created"] += result.created
+                totals["updated"] += result.updated
+                totals["error_count"] += len(result.errors)
+                line = {"batch": number, **totals, "errors": result.errors}
+                line.pop("error_count")
+                yield json.dumps(line) + "\n"
+            yield json.dumps({"done": True, **totals}) + "\n"
+        except Exception:
+            # earlier batches are committed; tell the client how far the import got
+            current_app.logger.exception("Inventory import aborted")
+            db.session.rollback()
+            yield json.dumps({"done": False, "error": "import aborted", **totals}) + "\n"
+        finally:
+            if upload:
+                stream.close()
+
+    return Response(stream_with_context(progress()), mimetype="application/x-ndjson")
+
+
+def _counted(rows, totals):
+    for row in rows:
+        totals["processed"] += 1
+        yield row
+
+
 @inventory_bp.get("/")
+@conditional_get("inventory")
 def get_parts():
-    parts = Inventory.query.all()
-    return inventories_schema.dump(parts), 200
+    """
+    Full catalog (cached per catalog version), or with ?since=<version> only the
+    parts changed and ids deleted after that version.
+    """
+    since = request.args.get("since")
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return {"error": "since must be an integer catalog version"}, 400
+        return catalog.catalog_delta(inventory_schema, since), 200
+
+    if "fields" not in request.args and "expand" not in request.args:
+        version, payload = catalog.full_catalog(inventory_schema)
+        return payload, 200, {"X-Catalog-Version": str(version)}
+
+    try:
+        fieldset = Fieldset(inventory_schema, request.args)
+    except FieldsetError as e:
+        return {"error": str(e)}, 400
+
+    parts = Inventory.query.options(*fieldset.query_options()).all()
+    return fieldset.schema(many=True).dump(parts), 200
+
+
+@inventory_bp.get("/autocomplete")
+def autocomplete_parts():
+    """
+    Part-name suggestions for the counter.
+    Query params: q (required), limit (default 10, max 50), fuzzy=1 to fill up with close matches
+    """
+    q = request.args.get("q", "").strip()
+    if not q:
+        return {"error": "Query parameter q is required"}, 400
+    try:
+        limit = parse_limit(request.args.get("limit"), default=10, maximum=50)
+    except PaginationError as e:
+        return {"error": str(e)}, 400
+    fuzzy = request.args.get("fuzzy", "").lower() in ("1", "true", "yes")
+
+    return autocomplete.get_index().suggest(q, limit, fuzzy), 200
 
 
 @inventory_bp.get("/<int:id>")
+@conditional_get("inventory")
 def get_part(id):
-    part = Inventory.query.get_or_404(id)
-    return inventory_schema.dump(part), 200
+    try:
+        fieldset = Fieldset(inventory_schema, request.args)
+    except FieldsetError as e:
+        return {"error": str(e)}, 400
+
+    part = Inventory.query.options(*fieldset.query_options()).get_or_404(id)
+    return fieldset.schema().dump(part), 200
 
 
 @inventory_bp.put("/<int:id>")
@@ -43,19 +194,61 @@ def update_part(id):
 
     if "name" in data:
         part.name = data["name"]
+    if "sku" in data:
+        if _sku_taken(data["sku"], exclude_id=part.id):
+            return {"error": f"sku {data['sku']} already exists"}, 409
+        part.sku = data["sku"] or None
     if "price" in data:
         try:
-            part.price = float(data["price"])
+            new_price = float(data["price"])
         except ValueError:
             return {"error": "price must be a number"}, 400
+        apply_price_change(part.id, new_price - part.price)
+        part.price = new_price
+    if "quantity_on_hand" in data:
+        # absolute stock count (e.g. after a physical count); use /restock for deliveries
+        quantity_on_hand, error = _parse_quantity_on_hand(data)
+        if error:
+            return {"error": error}, 400
+        part.quantity_on_hand = quantity_on_hand
 
+    version = catalog.stamp(part)
     db.session.commit()
+    catalog.invalidate(version)
     return inventory_schema.dump(part), 200
 
 
+@inventory_bp.get("/<int:id>/stock")
+def get_part_stock(id):
+    quantity_on_hand = db.session.scalar(select(Inventory.quantity_on_hand).where(Inventory.id == id))
+    if quantity_on_hand is None and not db.session.get(Inventory, id):
+        return {"error": f"Inventory part {id} not found"}, 404
+    return {"id": id, "quantity_on_hand": quantity_on_hand}, 200
+
+
+@inventory_bp.post("/<int:id>/restock")
+def restock_part(id):
+    """Body JSON: {"quantity": 10}. Atomic increment, safe alongside reservations."""
+    data = request.get_json() or {}
+    quantity = data.get("quantity")
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or not 1 <= quantity <= stock.MAX_QUANTITY:
+        return {"error": f"quantity must be an integer between 1 and {stock.MAX_QUANTITY}"}, 400
+
+    if not stock.restock(id, quantity):
+        if not db.session.get(Inventory, id):
+            return {"error": f"Inventory part {id} not found"}, 404
+        return {"error": f"Stock on hand cannot exceed {stock.MAX_QUANTITY}"}, 400
+    db.session.commit()
+    return get_part_stock(id)
+
+
 @inventory_bp.delete("/<int:id>")
 def delete_part(id):
     part = Inventory.query.get_or_404(id)
+    # tickets lose this part's price along with the service_inventory rows
+    apply_price_change(part.id, -part.price)
     db.session.delete(part)
+    version = catalog.tombstone(id)
     db.session.commit()
+    catalog.invalidate(version)
     return {"message": f"Inventory part {id} deleted"}, 200
@@ -5,6 +5,9 @@ class InventorySchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Inventory
         load_instance = True
+        # stock moves on every reservation; served by GET /inventory/<id>/stock
+        # so it doesn't churn the catalog cache
+        exclude = ("quantity_on_hand",)
 
 inventory_schema = InventorySchema()
 inventories_schema = InventorySchema(many=True)
@@ -0,0 +1,44 @@
+"""
+Contention-safe stock levels.
+
+Reservations are a single conditional UPDATE, so the database row lock is
+the only synchronisation: concurrent reservations serialise on the part row
+and the `quantity_on_hand >= n` guard makes overselling impossible. Parts
+with quantity_on_hand NULL are not stock-tracked and always succeed.
+"""
+from sqlalchemy import or_, update
+
+from app.extensions import db
+from app.models import Inventory
+
+# largest stock level and per-request quantity; well inside a 32-bit INTEGER column
+MAX_QUANTITY = 1_000_000
+
+
+def reserve(part_id: int, quantity: int) -> bool:
+    """Take `quantity` units off the shelf. False if there is not enough stock."""
+    result = db.session.execute(
+        update(Inventory)
+        .where(
+            Inventory.id == part_id,
+            or_(Inventory.quantity_on_hand.is_(None), Inventory.quantity_on_hand >= quantity),
+        )
+        .values(quantity_on_hand=Inventory.quantity_on_hand - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def restock(part_id: int, quantity: int) -> bool:
+    """
+    Add `quantity` units (starts tracking a previously untracked part).
+    False if the part is missing or would hold more than MAX_QUANTITY.
+    """
+    on_hand = db.func.coalesce(Inventory.quantity_on_hand, 0)
+    result = db.session.execute(
+        update(Inventory)
+        .where(Inventory.id == part_id, on_hand + quantity <= MAX_QUANTITY)
+        .values(quantity_on_hand=on_hand + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 mechanics_bp = Blueprint("mechanics", __name__)
 
-from app.blueprints.mechanics import routes
+from app.blueprints.mechanics import routes, commands
@@ -0,0 +1,18 @@
+"""
+CLI for the mechanics blueprint:
+
+    flask mechanics rebuild-rollups
+"""
+import click
+
+from app.blueprints.mechanics import mechanics_bp
+from app.extensions import db
+from app.utils.rollups import rebuild_mechanic_rollups
+
+
+@mechanics_bp.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Rebuild the leaderboard counters and daily rollups from service_mechanics (after upgrading or a manual fix)."""
+    rebuild_mechanic_rollups()
+    db.session.commit()
+    click.echo("mechanic rollups rebuilt")
@@ -1,9 +1,23 @@
+from datetime import date, timedelta
 from flask import request
-from sqlalchemy import func
-from app.extensions import db
-from app.models import Mechanic, service_mechanics
+from sqlalchemy import func, select
+from app.extensions import db, cache
+from app.models import Mechanic, MechanicDaily, MechanicTicketCount
 from app.blueprints.mechanics import mechanics_bp
-from app.blueprints.mechanics.schemas import mechanic_schema, mechanics_schema
+from app.blueprints.mechanics.schemas import mechanic_schema
+from app.utils.counts import count_rows, wants_total
+from app.utils.etag import conditional_get, versioned_cache_key
+from app.utils import ticket_cache
+from app.utils.fieldsets import Fieldset, FieldsetError
+from app.utils.pagination import PaginationError, keyset_page, parse_limit
+from app.utils.rollups import add_mechanic_rollups, delete_mechanic_rollups
+from app.utils.serializers import compile_dumper, fast_dump
+from app.utils.sql import starts_with
+
+LEADERBOARD_TABLES = ("mechanics", "mechanic_ticket_counts")
+WINDOWED_LEADERBOARD_TABLES = ("mechanics", "mechanic_daily")
+LEADERBOARD_METRICS = ("tickets", "parts_total")
+MAX_WINDOW_DAYS = 366
 
 # CREATE mechanic
 @mechanics_bp.post("/")
@@ -19,25 +33,92 @@ def create_mechanic():
     )
 
     db.session.add(mechanic)
+    db.session.flush()
+    add_mechanic_rollups(mechanic.id)
     db.session.commit()
 
     return mechanic_schema.dump(mechanic), 201
 
 
 # READ all mechanics
-@mechanics_bp.get("/")
-def get_mechanics():
+MECHANIC_SORTS = {
+    "id": [Mechanic.id],
+    "name": [Mechanic.name, Mechanic.id],
+    "email": [Mechanic.email],
+    "salary": [Mechanic.salary, Mechanic.id],
+}
+
+
+def _mechanic_filters(args):
+    """Returns (list of WHERE clauses, None) or (None, error message) from query params."""
+    clauses = []
+    for name in ("name", "email"):
+        if args.get(name):
+            clauses.append(starts_with(getattr(Mechanic, name), args[name]))
+
+    for name, op in (("salary_min", "__ge__"), ("salary_max", "__le__")):
+        if args.get(name) not in (None, ""):
+            try:
+                clauses.append(getattr(Mechanic.salary, op)(float(args[name])))
+            except ValueError:
+                return None, f"{name} must be a number"
 
-    mechanics = Mechanic.query.all()
+    return clauses, None
 
-    return mechanics_schema.dump(mechanics), 200
+
+@mechanics_bp.get("/")
+@conditional_get("mechanics")
+def get_mechanics():
+    """
+    Keyset pagination. Query params: limit (default 50, max 500), after (cursor),
+    sort=id|name|email|salary (prefix "-" for descending), total=1 to include the match count
+    Filters: name, email (prefixes), salary_min, salary_max
+    Shape: fields (see app.utils.fieldsets)
+    """
+    clauses, error = _mechanic_filters(request.args)
+    if error:
+        return {"error": error}, 400
+
+    sort = request.args.get("sort", "id")
+    descending = sort.startswith("-")
+    columns = MECHANIC_SORTS.get(sort.lstrip("-"))
+    if columns is None:
+        return {"error": f"sort must be one of: {', '.join(MECHANIC_SORTS)} (prefix - for descending)"}, 400
+
+    try:
+        fieldset = Fieldset(mechanic_schema, request.args)
+        limit = parse_limit(request.args.get("limit"))
+        query = Mechanic.query.filter(*clauses).options(
+            *fieldset.query_options(extra_columns=[c.key for c in columns])
+        )
+        mechanics, next_cursor = keyset_page(
+            query, columns, after=request.args.get("after"), limit=limit, descending=descending
+        )
+    except (PaginationError, FieldsetError) as e:
+        return {"error": str(e)}, 400
+
+    body = {
+        "items": fast_dump(fieldset.schema(many=True), mechanics),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_next": next_cursor is not None,
+    }
+    if wants_total(request.args):
+        body["total"] = count_rows(Mechanic.query.filter(*clauses), ("mechanics",))
+    return body, 200
 
 #GET mechanic by ID
 @mechanics_bp.get("/<int:id>")
+@conditional_get("mechanics")
 def get_mechanic(id):
-    mechanic = Mechanic.query.get_or_404(id)
+    try:
+        fieldset = Fieldset(mechanic_schema, request.args)
+    except FieldsetError as e:
+        return {"error": str(e)}, 400
 
-    return mechanic_schema.dump(mechanic), 200
+    mechanic = Mechanic.query.options(*fieldset.query_options()).get_or_404(id)
+
+    return fieldset.schema().dump(mechanic), 200
 
 
 # UPDATE mechanic
@@ -52,6 +133,8 @@ def update_mechanic(id):
     mechanic.email = data.get("email", mechanic.email)
     mechanic.phone_number = data.get("phone_number", mechanic.phone_number)
     mechanic.salary = data.get("salary", mechanic.salary)
+    # tickets show their mechanics' details
+    ticket_cache.note_all()
 
     db.session.commit()
 
@@ -64,28 +147,108 @@ def delete_mechanic(id):
 
     mechanic = Mechanic.query.get_or_404(id)
 
+    # the rollup rows reference mechanics.id, so they go first
+    delete_mechanic_rollups(id)
     db.session.delete(mechanic)
     db.session.commit()
 
     return {"message": f"Mechanic {id} deleted"}, 200
 
 @mechanics_bp.get("/leaderboard/most-tickets")
+@conditional_get(*LEADERBOARD_TABLES)
+@cache.cached(timeout=300, make_cache_key=versioned_cache_key(*LEADERBOARD_TABLES))
 def mechanics_most_tickets():
-    rows = (
-        db.session.query(
-            Mechanic,
-            func.count(service_mechanics.c.service_ticket_id).label("ticket_count")
-        )
-        .outerjoin(service_mechanics, Mechanic.id == service_mechanics.c.mechanic_id)
-        .group_by(Mechanic.id)
-        .order_by(func.count(service_mechanics.c.service_ticket_id).desc(), Mechanic.id.asc())
-        .all()
-    )
-
+    """
+    Mechanics ranked by assigned tickets, from the counters kept by
+    app.utils.rollups. Query params: limit (max 500; all mechanics when omitted)
+    """
+    try:
+        limit = parse_limit(request.args.get("limit"), default=None)
+    except PaginationError as e:
+        return {"error": str(e)}, 400
+
+    rows = db.session.execute(
+        select(Mechanic, MechanicTicketCount.ticket_count)
+        .join(MechanicTicketCount, MechanicTicketCount.mechanic_id == Mechanic.id)
+        .order_by(MechanicTicketCount.ticket_count.desc(), MechanicTicketCount.mechanic_id.asc())
+        .limit(limit)
+    ).all()
+
+    dump = compile_dumper(mechanic_schema)
     result = []
     for mech, ticket_count in rows:
-        data = mechanic_schema.dump(mech)
-        data["ticket_count"] = int(ticket_count)
+        data = dump(mech)
+        data["ticket_count"] = ticket_count
         result.append(data)
 
     return result, 200
+
+
+def _leaderboard_window(args):
+    """(date_from, date_to) from ?days=N (ending today) or ?date_from=&date_to=."""
+    if "date_from" in args or "date_to" in args:
+        try:
+            date_to = date.fromisoformat(args["date_to"]) if args.get("date_to") else date.today()
+            date_from = date.fromisoformat(args["date_from"]) if args.get("date_from") else date_to
+        except ValueError:
+            raise PaginationError("date_from and date_to must be YYYY-MM-DD")
+    else:
+        try:
+            days = int(args.get("days", 30))
+        except ValueError:
+            raise PaginationError("days must be an integer")
+        date_to = date.today()
+        date_from = date_to - timedelta(days=days - 1)
+    if date_from > date_to or (date_to - date_from).days >= MAX_WINDOW_DAYS:
+        raise PaginationError(f"the window must cover 1 to {MAX_WINDOW_DAYS} days")
+    return date_from, date_to
+
+
+@mechanics_bp.get("/leaderboard")
+@conditional_get(*WINDOWED_LEADERBOARD_TABLES, vary=lambda: date.today())
+@cache.cached(
+    timeout=300, make_cache_key=versioned_cache_key(*WINDOWED_LEADERBOARD_TABLES, vary=lambda: date.today())
+)
+def mechanics_leaderboard():
+    """
+    Top mechanics over a window of ticket service dates, summed from the
+    (mechanic, day) rollups. A ticket counts for every mechanic assigned to it.
+    Query params: days (default 30) or date_from/date_to, metric=tickets|parts_total, limit
+    """
+    metric = request.args.get("metric", "tickets")
+    if metric not in LEADERBOARD_METRICS:
+        return {"error": f"metric must be one of: {', '.join(LEADERBOARD_METRICS)}"}, 400
+    try:
+        date_from, date_to = _leaderboard_window(request.args)
+        limit = parse_limit(request.args.get("limit"), default=10)
+    except PaginationError as e:
+        return {"error": str(e)}, 400
+
+    tickets = func.sum(MechanicDaily.tickets).label("tickets")
+    parts_total = func.sum(MechanicDaily.parts_total).label("parts_total")
+    ranked = db.session.execute(
+        select(MechanicDaily.mechanic_id, tickets, parts_total)
+        .where(MechanicDaily.day.between(date_from, date_to))
+        .group_by(MechanicDaily.mechanic_id)
+        .having(tickets > 0)
+        .order_by((tickets if metric == "tickets" else parts_total).desc(), MechanicDaily.mechanic_id)
+        .limit(limit)
+    ).all()
+    mechanics = {
+        m.id: m for m in Mechanic.query.filter(Mechanic.id.in_([row.mechanic_id for row in ranked]))
+    }
+
+    dump = compile_dumper(mechanic_schema)
+    results = []
+    for row in ranked:
+        data = dump(mechanics[row.mechanic_id])
+        data["tickets"] = int(row.tickets)
+        data["parts_total"] = round(float(row.parts_total), 2)
+        results.append(data)
+
+    return {
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "metric": metric,
+        "results": results,
+    }, 200
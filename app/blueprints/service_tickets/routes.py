@@ -1,61 +1,201 @@
-from flask import request
+import csv
+import io
+import json
+from flask import Response, current_app, request, stream_with_context
 from datetime import datetime
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import selectinload
 from app.extensions import db
-from app.models import ServiceTicket, Mechanic, Customer, service_mechanics
+from app.models import ServiceTicket, Mechanic, Customer, service_mechanics, service_inventory
+from app.models import CustomerRevenue, DailyRevenue
 from app.blueprints.service_tickets import service_tickets_bp
 from app.models import Inventory
+from app.blueprints.inventory import stock
+from app.blueprints.service_tickets.search import search_terms, search_ticket_ids
+from app.utils.counts import count_rows, wants_total
+from app.utils.etag import conditional_get
+from app.utils.fieldsets import Fieldset, FieldsetError
+from app.utils.serializers import fast_dump
+from app.utils.pagination import PaginationError, keyset_page, parse_limit
+from app.utils import ticket_cache, workload
+from app.utils.rollups import apply_assignments, apply_part_added, apply_ticket_closed
+from app.utils.sql import delete_returning, insert_ignore, insert_ignore_returning
 from app.blueprints.service_tickets.schemas import (
     service_ticket_schema,
     service_tickets_schema,
     pickup_date_schema,
-    edit_mechanics_schema
+    edit_mechanics_schema,
+    assign_mechanics_schema,
+    reserve_part_schema,
+    SERVICE_TICKET_TABLES,
 )
 
 
-@service_tickets_bp.post("/")
-def create_service_ticket():
-    data = request.get_json() or {}
+TICKET_REQUIRED_FIELDS = ["vin", "service_date", "description", "customer_id"]
+BULK_MAX_TICKETS = 1000
+
+
+def _parse_ticket_payload(data):
+    """Returns (column values, None) or (None, error message) for one ticket body."""
+    if not isinstance(data, dict):
+        return None, "Ticket must be a JSON object"
 
     # Basic required-field validation
-    required = ["vin", "service_date", "description", "customer_id"]
-    missing = [field for field in required if field not in data or data[field] in (None, "")]
+    missing = [field for field in TICKET_REQUIRED_FIELDS if field not in data or data[field] in (None, "")]
     if missing:
-        return {"error": f"Missing required field(s): {', '.join(missing)}"}, 400
+        return None, f"Missing required field(s): {', '.join(missing)}"
 
     # Parse date safely
     try:
         service_date = datetime.strptime(data["service_date"], "%Y-%m-%d").date()
-    except ValueError:
-        return {"error": "service_date must be in YYYY-MM-DD format"}, 400
+    except (TypeError, ValueError):
+        return None, "service_date must be in YYYY-MM-DD format"
+
+    try:
+        customer_id = int(data["customer_id"])
+    except (TypeError, ValueError):
+        return None, "customer_id must be an integer"
+
+    return {
+        "vin": data["vin"],
+        "service_date": service_date,
+        "description": data["description"],
+        "customer_id": customer_id,
+        "pickup_date": None,
+    }, None
+
+
+@service_tickets_bp.post("/")
+def create_service_ticket():
+    data = request.get_json() or {}
+
+    values, error = _parse_ticket_payload(data)
+    if error:
+        return {"error": error}, 400
 
     # FK check: customer must exist (prevents MySQL IntegrityError 500)
-    customer = Customer.query.get(data["customer_id"])
+    customer = db.session.get(Customer, values["customer_id"])
     if not customer:
         return {"error": f"Customer {data['customer_id']} not found"}, 404
 
-    ticket = ServiceTicket(
-        vin=data["vin"],
-        service_date=service_date,
-        description=data["description"],
-        customer_id=data["customer_id"],
-        pickup_date=None
-    )
+    ticket = ServiceTicket(**values)
 
     db.session.add(ticket)
+    ticket_cache.note_customers(ticket.customer_id)
+    if data.get("auto_assign"):
+        db.session.flush()
+        if _auto_assign(ticket.id) is None:
+            db.session.rollback()
+            return {"error": "No mechanics available to assign"}, 409
     db.session.commit()
 
     return service_ticket_schema.dump(ticket), 201
 
 
+@service_tickets_bp.post("/bulk")
+def create_service_tickets_bulk():
+    """
+    Body JSON: [ {ticket}, {ticket}, ... ]
+    All-or-nothing: any invalid item rejects the batch with per-item errors.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, list) or not data:
+        return {"error": "Body must be a non-empty JSON array of tickets"}, 400
+    if len(data) > BULK_MAX_TICKETS:
+        return {"error": f"At most {BULK_MAX_TICKETS} tickets per request"}, 400
+
+    rows = []
+    errors = []
+    for index, item in enumerate(data):
+        values, error = _parse_ticket_payload(item)
+        if error:
+            errors.append({"index": index, "error": error})
+        else:
+            rows.append((index, values))
+
+    # FK check for the whole batch in one IN query
+    customer_ids = {values["customer_id"] for _, values in rows}
+    found = set()
+    if customer_ids:
+        found = set(db.session.scalars(select(Customer.id).where(Customer.id.in_(customer_ids))))
+    for index, values in rows:
+        if values["customer_id"] not in found:
+            errors.append({"index": index, "error": f"Customer {values['customer_id']} not found"})
+
+    if errors:
+        errors.sort(key=lambda e: e["index"])
+        return {"created": 0, "errors": errors}, 400
+
+    # executemany in a single transaction
+    db.session.execute(insert(ServiceTicket), [values for _, values in rows])
+    ticket_cache.note_customers(*customer_ids)
+    db.session.commit()
+
+    return {"created": len(rows), "errors": []}, 201
+
+
+# Every service_mechanics write goes through these two helpers so the
+# mechanic counters in app.utils.rollups move with it.
+
+def _assign_mechanics(ticket_ids, mechanic_ids) -> int:
+    """
+    Link every ticket to every mechanic in one INSERT; existing links are
+    skipped. Rollups move only for the links this call actually inserted.
+    """
+    rows = [{"service_ticket_id": tid, "mechanic_id": mid} for mid in mechanic_ids for tid in ticket_ids]
+    links = insert_ignore_returning(
+        service_mechanics, rows, service_mechanics.c.mechanic_id, service_mechanics.c.service_ticket_id
+    )
+    apply_assignments(links)
+    return len(links)
+
+
+def _unassign_mechanics(ticket_id, mechanic_ids) -> int:
+    if not mechanic_ids:
+        return 0
+    removed = delete_returning(
+        service_mechanics,
+        service_mechanics.c.mechanic_id,
+        service_mechanics.c.service_ticket_id == ticket_id,
+        service_mechanics.c.mechanic_id.in_(mechanic_ids),
+    )
+    apply_assignments([(mid, ticket_id) for mid in removed], sign=-1)
+    return len(removed)
+
+
+def _auto_assign(ticket_id):
+    """Assign the mechanic with the fewest open tickets. Returns the mechanic id, or None if there are none."""
+    picked = workload.least_loaded()
+    if picked is None:
+        return None
+    mechanic_id, _ = picked
+    _assign_mechanics([ticket_id], [mechanic_id])
+    return mechanic_id
+
+
+@service_tickets_bp.post("/<int:ticket_id>/auto-assign")
+def auto_assign_mechanic(ticket_id):
+    """Assign the least-loaded mechanic (fewest tickets with no pickup_date) to the ticket."""
+    ticket = ServiceTicket.query.get_or_404(ticket_id)
+    if ticket.pickup_date is not None:
+        return {"error": f"Service ticket {ticket_id} is already picked up"}, 409
+
+    mechanic_id = _auto_assign(ticket_id)
+    if mechanic_id is None:
+        return {"error": "No mechanics available to assign"}, 409
+    db.session.commit()
+
+    return {"mechanic_id": mechanic_id, "ticket": service_ticket_schema.dump(ticket)}, 200
+
+
 @service_tickets_bp.put("/<int:ticket_id>/assign-mechanic/<int:mechanic_id>")
 def assign_mechanic(ticket_id, mechanic_id):
     ticket = ServiceTicket.query.get_or_404(ticket_id)
-    mechanic = Mechanic.query.get_or_404(mechanic_id)
+    Mechanic.query.get_or_404(mechanic_id)
 
-    # Prevent duplicates
-    if mechanic not in ticket.mechanics:
-        ticket.mechanics.append(mechanic)
-        db.session.commit()
+    # Duplicate links are ignored by the insert itself
+    _assign_mechanics([ticket_id], [mechanic_id])
+    db.session.commit()
 
     return service_ticket_schema.dump(ticket), 200
 
@@ -63,20 +203,272 @@ def assign_mechanic(ticket_id, mechanic_id):
 @service_tickets_bp.put("/<int:ticket_id>/remove-mechanic/<int:mechanic_id>")
 def remove_mechanic(ticket_id, mechanic_id):
     ticket = ServiceTicket.query.get_or_404(ticket_id)
-    mechanic = Mechanic.query.get_or_404(mechanic_id)
+    Mechanic.query.get_or_404(mechanic_id)
 
-    # Only remove if assigned
-    if mechanic in ticket.mechanics:
-        ticket.mechanics.remove(mechanic)
-        db.session.commit()
+    # No-op if not assigned
+    _unassign_mechanics(ticket_id, [mechanic_id])
+    db.session.commit()
 
     return service_ticket_schema.dump(ticket), 200
 
 
+@service_tickets_bp.put("/assign-mechanics")
+def assign_mechanics_bulk():
+    """
+    Body JSON:
+    {
+      "ticket_ids": [1,2,3],
+      "mechanic_ids": [4,5]
+    }
+    Assigns every mechanic to every ticket in a single statement.
+    """
+    data = request.get_json() or {}
+    errors = assign_mechanics_schema.validate(data)
+    if errors:
+        return {"errors": errors}, 400
+
+    ticket_ids = sorted(set(data["ticket_ids"]))
+    mechanic_ids = sorted(set(data["mechanic_ids"]))
+
+    found_tickets = set(db.session.scalars(select(ServiceTicket.id).where(ServiceTicket.id.in_(ticket_ids))))
+    missing = [tid for tid in ticket_ids if tid not in found_tickets]
+    if missing:
+        return {"error": f"Service ticket(s) not found: {missing}"}, 404
+
+    found_mechanics = set(db.session.scalars(select(Mechanic.id).where(Mechanic.id.in_(mechanic_ids))))
+    missing = [mid for mid in mechanic_ids if mid not in found_mechanics]
+    if missing:
+        return {"error": f"Mechanic(s) not found: {missing}"}, 404
+
+    assigned = _assign_mechanics(ticket_ids, mechanic_ids)
+    db.session.commit()
+
+    return {"ticket_ids": ticket_ids, "mechanic_ids": mechanic_ids, "assigned": assigned}, 200
+
+
+def _parse_date_arg(args, name):
+    raw = args.get(name)
+    if raw in (None, ""):
+        return None
+    return datetime.strptime(raw, "%Y-%m-%d").date()
+
+
+def _ticket_filters(args):
+    """Returns (list of WHERE clauses, None) or (None, error message) from query params."""
+    clauses = []
+
+    if args.get("vin"):
+        clauses.append(ServiceTicket.vin == args["vin"])
+
+    if args.get("customer_id"):
+        try:
+            clauses.append(ServiceTicket.customer_id == int(args["customer_id"]))
+        except ValueError:
+            return None, "customer_id must be an integer"
+
+    try:
+        date_from = _parse_date_arg(args, "service_date_from")
+        date_to = _parse_date_arg(args, "service_date_to")
+    except ValueError:
+        return None, "service_date_from/service_date_to must be in YYYY-MM-DD format"
+    if date_from:
+        clauses.append(ServiceTicket.service_date >= date_from)
+    if date_to:
+        clauses.append(ServiceTicket.service_date <= date_to)
+
+    status = args.get("status")
+    if status == "open":
+        clauses.append(ServiceTicket.pickup_date.is_(None))
+    elif status == "closed":
+        clauses.append(ServiceTicket.pickup_date.isnot(None))
+    elif status not in (None, ""):
+        return None, "status must be 'open' or 'closed'"
+
+    return clauses, None
+
+
 @service_tickets_bp.get("/")
+@conditional_get(*SERVICE_TICKET_TABLES)
 def get_service_tickets():
-    tickets = ServiceTicket.query.all()
-    return service_tickets_schema.dump(tickets), 200
+    """
+    Keyset pagination ordered by (service_date, id).
+    Query params: limit (default 50, max 500), after (cursor from a previous page)
+    Filters: vin, customer_id, service_date_from, service_date_to, status=open|closed
+    Shape: fields, expand (see app.utils.fieldsets); total=1 to include the match count
+    """
+    clauses, error = _ticket_filters(request.args)
+    if error:
+        return {"error": error}, 400
+
+    try:
+        fieldset = Fieldset(service_ticket_schema, request.args)
+        limit = parse_limit(request.args.get("limit"))
+        # expanded relationships load in one extra query each, not one per ticket
+        query = ServiceTicket.query.filter(*clauses).options(
+            *fieldset.query_options(extra_columns=("service_date",))
+        )
+        tickets, next_cursor = keyset_page(
+            query,
+            [ServiceTicket.service_date, ServiceTicket.id],
+            after=request.args.get("after"),
+            limit=limit,
+        )
+    except (PaginationError, FieldsetError) as e:
+        return {"error": str(e)}, 400
+
+    body = {
+        "items": fast_dump(fieldset.schema(many=True), tickets),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_next": next_cursor is not None,
+    }
+    if wants_total(request.args):
+        body["total"] = count_rows(ServiceTicket.query.filter(*clauses), ("service_tickets",))
+    return body, 200
+
+
+@service_tickets_bp.get("/search")
+@conditional_get(*SERVICE_TICKET_TABLES)
+def search_service_tickets():
+    """
+    Full-text search over ticket descriptions, best match first.
+    Query params: q (required), page (default 1), per_page (default 20, max 100)
+    """
+    terms = search_terms(request.args.get("q", ""))
+    if not terms:
+        return {"error": "q is required"}, 400
+
+    page = request.args.get("page", default=1, type=int)
+    try:
+        per_page = parse_limit(request.args.get("per_page"), default=20, maximum=100)
+    except PaginationError as e:
+        return {"error": str(e)}, 400
+    if page < 1:
+        return {"error": "page must be >= 1"}, 400
+
+    hits = search_ticket_ids(terms, limit=per_page + 1, offset=(page - 1) * per_page)
+    has_next = len(hits) > per_page
+    hits = hits[:per_page]
+
+    tickets_by_id = {}
+    if hits:
+        tickets = ServiceTicket.query.filter(ServiceTicket.id.in_([tid for tid, _ in hits])).options(
+            selectinload(ServiceTicket.mechanics),
+            selectinload(ServiceTicket.inventory),
+        )
+        tickets_by_id = {t.id: t for t in tickets}
+
+    items = []
+    for tid, score in hits:
+        if tid in tickets_by_id:
+            data = service_ticket_schema.dump(tickets_by_id[tid])
+            data["score"] = score
+            items.append(data)
+
+    return {
+        "items": items,
+        "page": page,
+        "per_page": per_page,
+        "has_next": has_next,
+        "has_prev": page > 1,
+    }, 200
+
+
+EXPORT_CSV_COLUMNS = [
+    "id", "vin", "service_date", "description", "customer_id", "pickup_date",
+    "mechanic_ids", "inventory_ids",
+]
+
+
+def _iter_ticket_batches(batch_size):
+    """
+    Yield lists of tickets, batch_size rows at a time, one keyset query per batch
+    (WHERE id > last id ORDER BY id LIMIT batch_size). Not every driver has
+    server-side cursors (mysql-connector buffers the whole result), so no
+    cursor is held open across batches.
+    """
+    stmt = (
+        select(ServiceTicket)
+        .options(selectinload(ServiceTicket.mechanics), selectinload(ServiceTicket.inventory))
+        .order_by(ServiceTicket.id)
+        .limit(batch_size)
+    )
+    last_id = None
+    while True:
+        query = stmt if last_id is None else stmt.where(ServiceTicket.id > last_id)
+        batch = db.session.scalars(query).all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+        # drop the batch from the identity map so memory stays flat
+        for ticket in batch:
+            db.session.expunge(ticket)
+        if len(batch) < batch_size:
+            return
+
+
+def _ndjson_rows(batch_size):
+    for batch in _iter_ticket_batches(batch_size):
+        yield "".join(json.dumps(row) + "\n" for row in service_tickets_schema.dump(batch))
+
+
+def _csv_rows(batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    for batch in _iter_ticket_batches(batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for ticket in batch:
+            writer.writerow([
+                ticket.id,
+                ticket.vin,
+                ticket.service_date.isoformat(),
+                ticket.description,
+                ticket.customer_id,
+                ticket.pickup_date.isoformat() if ticket.pickup_date else "",
+                ";".join(str(m.id) for m in ticket.mechanics),
+                ";".join(str(p.id) for p in ticket.inventory),
+            ])
+        yield buffer.getvalue()
+
+
+@service_tickets_bp.get("/export")
+def export_service_tickets():
+    """
+    Stream every ticket as NDJSON (default) or CSV.
+    Query params: format=ndjson|csv
+    """
+    fmt = request.args.get("format", "ndjson").lower()
+    batch_size = current_app.config.get("EXPORT_BATCH_SIZE", 1000)
+
+    if fmt == "ndjson":
+        body, mimetype = _ndjson_rows(batch_size), "application/x-ndjson"
+    elif fmt == "csv":
+        body, mimetype = _csv_rows(batch_size), "text/csv"
+    else:
+        return {"error": "format must be 'ndjson' or 'csv'"}, 400
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=service_tickets.{fmt}"},
+    )
+
+@service_tickets_bp.get("/<int:ticket_id>")
+@conditional_get(*SERVICE_TICKET_TABLES)
+def get_service_ticket(ticket_id):
+    try:
+        fieldset = Fieldset(service_ticket_schema, request.args)
+    except FieldsetError as e:
+        return {"error": str(e)}, 400
+
+    ticket = ServiceTicket.query.options(*fieldset.query_options()).get_or_404(ticket_id)
+    return fieldset.schema().dump(ticket), 200
+
 
 @service_tickets_bp.put("/<int:ticket_id>")
 def edit_service_ticket(ticket_id):
@@ -87,7 +479,11 @@ def edit_service_ticket(ticket_id):
         return {"errors": errors}, 400
 
     ticket = ServiceTicket.query.get_or_404(ticket_id)
+    if ticket.pickup_date is None:
+        # picking up closes the ticket for its mechanics' workloads
+        apply_ticket_closed(ticket_id)
     ticket.pickup_date = data["add_pickup_date"]
+    ticket_cache.note_customers(ticket.customer_id)
 
     db.session.commit()
     return service_ticket_schema.dump(ticket), 200
@@ -118,28 +514,19 @@ def edit_ticket_mechanics(ticket_id: int):
     if conflict:
         return {"error": f"IDs cannot be in both add_ids and remove_ids: {sorted(conflict)}"}, 400
 
-    # Lookup mechanics once
-    all_ids = list(add_set.union(remove_set))
-    mechanics_by_id = {}
+    # Lookup mechanic ids once
+    all_ids = sorted(add_set.union(remove_set))
+    found = set()
     if all_ids:
-        mechanics = Mechanic.query.filter(Mechanic.id.in_(all_ids)).all()
-        mechanics_by_id = {m.id: m for m in mechanics}
+        found = set(db.session.scalars(select(Mechanic.id).where(Mechanic.id.in_(all_ids))))
 
-    missing = [mid for mid in all_ids if mid not in mechanics_by_id]
+    missing = [mid for mid in all_ids if mid not in found]
     if missing:
         return {"error": f"Mechanic(s) not found: {missing}"}, 404
 
-    # Remove first
-    for mid in remove_set:
-        mech = mechanics_by_id[mid]
-        if mech in ticket.mechanics:
-            ticket.mechanics.remove(mech)
-
-    # Add (avoid duplicates)
-    for mid in add_set:
-        mech = mechanics_by_id[mid]
-        if mech not in ticket.mechanics:
-            ticket.mechanics.append(mech)
+    # Remove first, then add (existing links are skipped)
+    _unassign_mechanics(ticket_id, remove_set)
+    _assign_mechanics([ticket_id], add_set)
 
     db.session.commit()
     return service_ticket_schema.dump(ticket), 200
@@ -149,8 +536,98 @@ def add_part_to_ticket(ticket_id, inventory_id):
     ticket = ServiceTicket.query.get_or_404(ticket_id)
     part = Inventory.query.get_or_404(inventory_id)
 
-    if part not in ticket.inventory:
-        ticket.inventory.append(part)
-        db.session.commit()
+    # Idempotent: links one unit the first time, no-op afterwards
+    inserted = db.session.execute(
+        insert_ignore(service_inventory).values(service_ticket_id=ticket_id, inventory_id=inventory_id)
+    ).rowcount
+    if inserted:
+        if not stock.reserve(inventory_id, 1):
+            db.session.rollback()
+            return {"error": f"Insufficient stock for part {inventory_id}"}, 409
+        apply_part_added(ticket.id, ticket.service_date, ticket.customer_id, part.price)
+    db.session.commit()
 
     return service_ticket_schema.dump(ticket), 200
+
+
+@service_tickets_bp.post("/<int:ticket_id>/reserve-part/<int:inventory_id>")
+def reserve_part_for_ticket(ticket_id, inventory_id):
+    """
+    Body JSON: {"quantity": 2}
+    Takes the units off the shelf and adds them to the ticket's quantity used.
+    """
+    data = request.get_json() or {}
+    errors = reserve_part_schema.validate(data)
+    if errors:
+        return {"errors": errors}, 400
+    quantity = data["quantity"]
+
+    ticket = ServiceTicket.query.get_or_404(ticket_id)
+    part = Inventory.query.get_or_404(inventory_id)
+
+    # conditional decrement first: the part row lock serialises concurrent reservations
+    if not stock.reserve(inventory_id, quantity):
+        db.session.rollback()
+        return {"error": f"Insufficient stock for part {inventory_id}"}, 409
+
+    inserted = db.session.execute(
+        insert_ignore(service_inventory).values(
+            service_ticket_id=ticket_id, inventory_id=inventory_id, quantity=quantity
+        )
+    ).rowcount
+    if not inserted:
+        db.session.execute(
+            update(service_inventory)
+            .where(
+                service_inventory.c.service_ticket_id == ticket_id,
+                service_inventory.c.inventory_id == inventory_id,
+            )
+            .values(quantity=service_inventory.c.quantity + quantity)
+        )
+    apply_part_added(ticket.id, ticket.service_date, ticket.customer_id, part.price * quantity)
+    db.session.commit()
+
+    return service_ticket_schema.dump(ticket), 200
+
+
+# --------- Revenue summaries (served from rollups) ---------
+
+@service_tickets_bp.get("/<int:ticket_id>/summary")
+@conditional_get("service_tickets")
+def get_ticket_summary(ticket_id):
+    parts_total = db.session.scalar(select(ServiceTicket.parts_total).where(ServiceTicket.id == ticket_id))
+    if parts_total is None:
+        return {"error": f"Service ticket {ticket_id} not found"}, 404
+    return {"ticket_id": ticket_id, "parts_total": round(parts_total, 2)}, 200
+
+
+@service_tickets_bp.get("/revenue/daily")
+@conditional_get("daily_revenue")
+def get_daily_revenue():
+    """
+    Query params: date_from, date_to (YYYY-MM-DD, both optional)
+    """
+    try:
+        date_from = _parse_date_arg(request.args, "date_from")
+        date_to = _parse_date_arg(request.args, "date_to")
+    except ValueError:
+        return {"error": "date_from/date_to must be in YYYY-MM-DD format"}, 400
+
+    query = DailyRevenue.query
+    if date_from:
+        query = query.filter(DailyRevenue.day >= date_from)
+    if date_to:
+        query = query.filter(DailyRevenue.day <= date_to)
+
+    return [
+        {"day": row.day.isoformat(), "parts_total": round(row.parts_total, 2)}
+        for row in query.order_by(DailyRevenue.day)
+    ], 200
+
+
+@service_tickets_bp.get("/revenue/customers/<int:customer_id>")
+@conditional_get("customers", "customer_revenue")
+def get_customer_revenue(customer_id):
+    Customer.query.get_or_404(customer_id)
+    row = db.session.get(CustomerRevenue, customer_id)
+    return {"customer_id": customer_id, "parts_total": round(row.parts_total, 2) if row else 0.0}, 200
@@ -1,6 +1,7 @@
-from marshmallow import fields
+from marshmallow import fields, validate
 from app.extensions import ma
 from app.models import ServiceTicket, Mechanic, Inventory
+from app.blueprints.inventory.stock import MAX_QUANTITY
 
 
 # --------- Mini Schemas (nested outputs) ---------
@@ -37,16 +38,33 @@ class EditMechanicsSchema(ma.Schema):
     remove_ids = fields.List(fields.Integer(), required=False, load_default=list)
 
 
+# For PUT /service-tickets/assign-mechanics
+class AssignMechanicsSchema(ma.Schema):
+    ticket_ids = fields.List(fields.Integer(), required=True, validate=validate.Length(min=1))
+    mechanic_ids = fields.List(fields.Integer(), required=True, validate=validate.Length(min=1))
+
+
+# For POST /service-tickets/<ticket_id>/reserve-part/<inventory_id>
+class ReservePartSchema(ma.Schema):
+    quantity = fields.Integer(required=True, strict=True, validate=validate.Range(min=1, max=MAX_QUANTITY))
+
+
 # For PUT /service-tickets/<ticket_id>
 # Body: {"add_pickup_date": "YYYY-MM-DD"}
 class PickupDateSchema(ma.Schema):
     add_pickup_date = fields.Date(required=True, allow_none=False)
 
 
+# Tables a dumped ServiceTicketSchema depends on (used for ETags)
+SERVICE_TICKET_TABLES = ("service_tickets", "service_mechanics", "service_inventory", "mechanics", "inventory")
+
+
 # --------- Schema Instances ---------
 
 service_ticket_schema = ServiceTicketSchema()
 service_tickets_schema = ServiceTicketSchema(many=True)
 
 edit_mechanics_schema = EditMechanicsSchema()
+assign_mechanics_schema = AssignMechanicsSchema()
+reserve_part_schema = ReservePartSchema()
 pickup_date_schema = PickupDateSchema()
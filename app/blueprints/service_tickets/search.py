@@ -0,0 +1,53 @@
+import re
+
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import SERVICE_TICKETS_FTS, ServiceTicket
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(q: str) -> list:
+    """Split user input into plain word terms (drops FTS operators and punctuation)."""
+    return _TERM_RE.findall(q or "")
+
+
+def search_ticket_ids(terms, limit: int, offset: int = 0):
+    """
+    Ranked full-text search over ServiceTicket.description.
+    Every term must match. Returns a list of (ticket_id, score), best first.
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        # bm25() is lower-is-better; negate so callers always see higher-is-better
+        match = " ".join(f'"{term}"' for term in terms)
+        rows = db.session.execute(
+            text(
+                f"SELECT rowid, -bm25({SERVICE_TICKETS_FTS}) AS score "
+                f"FROM {SERVICE_TICKETS_FTS} WHERE {SERVICE_TICKETS_FTS} MATCH :match "
+                f"ORDER BY bm25({SERVICE_TICKETS_FTS}), rowid LIMIT :limit OFFSET :offset"
+            ),
+            {"match": match, "limit": limit, "offset": offset},
+        )
+        return [(row[0], float(row[1])) for row in rows]
+
+    if dialect in ("mysql", "mariadb"):
+        match = " ".join(f'+"{term}"' for term in terms)
+        rows = db.session.execute(
+            text(
+                "SELECT id, MATCH(description) AGAINST (:match IN BOOLEAN MODE) AS score "
+                "FROM service_tickets WHERE MATCH(description) AGAINST (:match IN BOOLEAN MODE) "
+                "ORDER BY score DESC, id LIMIT :limit OFFSET :offset"
+            ),
+            {"match": match, "limit": limit, "offset": offset},
+        )
+        return [(row[0], float(row[1])) for row in rows]
+
+    # Unindexed fallback for other backends
+    query = db.session.query(ServiceTicket.id)
+    for term in terms:
+        query = query.filter(ServiceTicket.description.ilike(f"%{term}%"))
+    rows = query.order_by(ServiceTicket.id).limit(limit).offset(offset)
+    return [(row[0], 1.0) for row in rows]
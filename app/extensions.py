@@ -2,7 +2,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from flask_caching import Cache
+from app.utils.coalescing import CoalescingCache
 
 db = SQLAlchemy()
 ma = Marshmallow()
@@ -10,4 +10,5 @@ limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"]
 )
-cache = Cache(config={"CACHE_TYPE": "SimpleCache"})
\ No newline at end of file
+# backend comes from CACHE_TYPE in the app config; cached() coalesces concurrent misses
+cache = CoalescingCache()
\ No newline at end of file
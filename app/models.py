@@ -1,5 +1,6 @@
+from sqlalchemy import DDL, event
 from app.extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.passwords import hash_password, needs_rehash, verify_password
     #----Models----#
 
 service_mechanics = db.Table('service_mechanics',
@@ -11,6 +12,8 @@ service_inventory = db.Table(
     "service_inventory",
     db.Column("service_ticket_id", db.Integer, db.ForeignKey("service_tickets.id"), primary_key=True),
     db.Column("inventory_id", db.Integer, db.ForeignKey("inventory.id"), primary_key=True),
+    db.Column("quantity", db.Integer, nullable=False, default=1, server_default="1"),
+    db.Index("ix_service_inventory_inventory_id", "inventory_id"),
 )
 class Customer(db.Model):
     __tablename__ = 'customers'
@@ -19,18 +22,28 @@ class Customer(db.Model):
     name = db.Column(db.String(50), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     phone_number = db.Column(db.String(20), nullable=False)
-    password = db.Column(db.String(128), nullable=False)
+    password = db.Column(db.String(255), nullable=False)  # scrypt hashes are 162 chars
 
     def set_password(self, raw_password: str):
-        self.password = generate_password_hash(raw_password)
+        self.password = hash_password(raw_password)
 
     def check_password(self, raw_password: str) -> bool:
-        return check_password_hash(self.password, raw_password)
+        return verify_password(self.password, raw_password)
+
+    def password_needs_rehash(self) -> bool:
+        return needs_rehash(self.password)
 
     service_tickets = db.relationship('ServiceTicket', backref='customer', lazy=True)
 
 class ServiceTicket(db.Model):
     __tablename__ = 'service_tickets'
+    __table_args__ = (
+        db.Index('ix_service_tickets_service_date_id', 'service_date', 'id'),
+        db.Index('ix_service_tickets_vin', 'vin'),
+        db.Index('ix_service_tickets_customer_id_service_date', 'customer_id', 'service_date', 'id'),
+        # open tickets are pickup_date IS NULL; keeps the keyset order inside the index
+        db.Index('ix_service_tickets_open', 'pickup_date', 'service_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     vin= db.Column(db.String(17), nullable=False)
@@ -38,12 +51,54 @@ class ServiceTicket(db.Model):
     description = db.Column(db.String(200), nullable=False)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
     pickup_date = db.Column(db.Date, nullable=True)
+    # sum of attached part prices, maintained by app.utils.rollups
+    parts_total = db.Column(db.Float, nullable=False, default=0, server_default="0")
 
     inventory = db.relationship ('Inventory', secondary=service_inventory, backref=db.backref('service_tickets', lazy=True))
     mechanics = db.relationship('Mechanic', secondary=service_mechanics, backref=db.backref('service_tickets', lazy=True))
 
+# ---- Full-text index on ServiceTicket.description ----
+# SQLite: external-content FTS5 table kept in sync by triggers.
+# MySQL: native FULLTEXT index.
+SERVICE_TICKETS_FTS = "service_tickets_fts"
+SERVICE_TICKETS_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SERVICE_TICKETS_FTS} "
+    f"USING fts5(description, content='service_tickets', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS service_tickets_fts_ai AFTER INSERT ON service_tickets BEGIN "
+    f"INSERT INTO {SERVICE_TICKETS_FTS}(rowid, description) VALUES (new.id, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS service_tickets_fts_ad AFTER DELETE ON service_tickets BEGIN "
+    f"INSERT INTO {SERVICE_TICKETS_FTS}({SERVICE_TICKETS_FTS}, rowid, description) "
+    f"VALUES ('delete', old.id, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS service_tickets_fts_au AFTER UPDATE OF description ON service_tickets BEGIN "
+    f"INSERT INTO {SERVICE_TICKETS_FTS}({SERVICE_TICKETS_FTS}, rowid, description) "
+    f"VALUES ('delete', old.id, old.description); "
+    f"INSERT INTO {SERVICE_TICKETS_FTS}(rowid, description) VALUES (new.id, new.description); END",
+)
+SERVICE_TICKETS_FULLTEXT_INDEX = "ix_service_tickets_description_ft"
+
+# existing databases get these from `flask schema upgrade` (app.upgrades)
+for ddl in SERVICE_TICKETS_FTS_DDL:
+    event.listen(ServiceTicket.__table__, "after_create", DDL(ddl).execute_if(dialect="sqlite"))
+
+event.listen(
+    ServiceTicket.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SERVICE_TICKETS_FTS}").execute_if(dialect="sqlite"),
+)
+event.listen(
+    ServiceTicket.__table__,
+    "after_create",
+    DDL(f"ALTER TABLE service_tickets ADD FULLTEXT INDEX {SERVICE_TICKETS_FULLTEXT_INDEX} (description)")
+    .execute_if(dialect=("mysql", "mariadb")),
+)
+
 class Mechanic(db.Model):
     __tablename__ = 'mechanics'
+    __table_args__ = (
+        # keyset sort orders for GET /mechanics/ (email already has its unique index)
+        db.Index('ix_mechanics_name_id', 'name', 'id'),
+        db.Index('ix_mechanics_salary_id', 'salary', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
@@ -55,5 +110,69 @@ class Inventory(db.Model):
     __tablename__ = "inventory"
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    # bulk imports (app.blueprints.inventory.importer) match on sku, else on name
+    name = db.Column(db.String(100), nullable=False, index=True)
+    sku = db.Column(db.String(64), unique=True, nullable=True)
     price = db.Column(db.Float, nullable=False)
+    # NULL = stock not tracked for this part (app.blueprints.inventory.stock)
+    quantity_on_hand = db.Column(db.Integer, nullable=True)
+    # catalog version of the last write to this part (app.blueprints.inventory.catalog)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)
+
+class InventoryTombstone(db.Model):
+    __tablename__ = "inventory_tombstones"
+
+    inventory_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, index=True)
+
+
+# ---- Revenue rollups (maintained by app.utils.rollups) ----
+
+class DailyRevenue(db.Model):
+    __tablename__ = "daily_revenue"
+
+    day = db.Column(db.Date, primary_key=True)
+    parts_total = db.Column(db.Float, nullable=False, default=0, server_default="0")
+
+class CustomerRevenue(db.Model):
+    __tablename__ = "customer_revenue"
+
+    customer_id = db.Column(db.Integer, db.ForeignKey("customers.id"), primary_key=True)
+    parts_total = db.Column(db.Float, nullable=False, default=0, server_default="0")
+
+
+# ---- Mechanic workload counters (maintained by app.utils.rollups) ----
+
+class MechanicTicketCount(db.Model):
+    __tablename__ = "mechanic_ticket_counts"
+    __table_args__ = (
+        # leaderboard order, so the top K is read straight off the index
+        db.Index("ix_mechanic_ticket_counts_rank", db.desc("ticket_count"), "mechanic_id"),
+    )
+
+    mechanic_id = db.Column(db.Integer, db.ForeignKey("mechanics.id"), primary_key=True)
+    ticket_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # assigned tickets with pickup_date IS NULL (app.utils.workload)
+    open_tickets = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+class MechanicDaily(db.Model):
+    """Tickets assigned to a mechanic and their parts revenue, by ticket service_date."""
+    __tablename__ = "mechanic_daily"
+    __table_args__ = (
+        # windowed leaderboards range-scan by day
+        db.Index("ix_mechanic_daily_day", "day", "mechanic_id"),
+    )
+
+    mechanic_id = db.Column(db.Integer, db.ForeignKey("mechanics.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    tickets = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    parts_total = db.Column(db.Float, nullable=False, default=0, server_default="0")
+
+
+# ---- Per-table change counters (maintained by app.utils.etag) ----
+
+class TableVersion(db.Model):
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
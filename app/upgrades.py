@@ -0,0 +1,203 @@
+"""
+Brings an existing database up to date with the models:
+
+    flask --app run schema upgrade
+
+create_app() runs db.create_all(), which creates missing tables but never
+alters existing ones. Each step below checks the live schema and adds what
+an older database lacks (columns, indexes, the ticket search index), then
+backfills the data derived from it. Steps run in order, in one transaction
+where the database allows it, and are safe to run again.
+"""
+import click
+from flask.cli import AppGroup
+from sqlalchemy import inspect, select, text
+from sqlalchemy.schema import CreateColumn
+
+from app.extensions import db
+from app.models import (
+    SERVICE_TICKETS_FTS,
+    SERVICE_TICKETS_FTS_DDL,
+    SERVICE_TICKETS_FULLTEXT_INDEX,
+    Customer,
+    DailyRevenue,
+    Inventory,
+    Mechanic,
+    MechanicTicketCount,
+    ServiceTicket,
+    service_inventory,
+)
+from app.utils.rollups import rebuild_mechanic_rollups, rebuild_revenue_rollups
+
+schema_cli = AppGroup("schema", help="Database schema maintenance.")
+
+_STEPS = []
+
+
+def step(f):
+    _STEPS.append(f)
+    return f
+
+
+class Upgrade:
+    """What a step can see and do; `changes` lists what was done so far."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.dialect = conn.dialect.name
+        self.changes = []
+        # set by schema steps whose new columns need data computed
+        self.rebuild_revenue = False
+        self.rebuild_mechanics = False
+
+    def has_table(self, table) -> bool:
+        return inspect(self.conn).has_table(table)
+
+    def index_names(self, table) -> set:
+        return {index["name"] for index in inspect(self.conn).get_indexes(table)}
+
+    def add_column(self, column) -> bool:
+        """ALTER TABLE ... ADD COLUMN as the model declares it, if missing. True if added."""
+        table = column.table.name
+        if column.name in {c["name"] for c in inspect(self.conn).get_columns(table)}:
+            return False
+        ddl = CreateColumn(column).compile(dialect=self.conn.dialect)
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {ddl}", f"added column {table}.{column.name}")
+        return True
+
+    def widen_column(self, column) -> bool:
+        """Grow a VARCHAR to the model's length. SQLite does not enforce lengths, so it is left alone."""
+        table = column.table.name
+        current = next(c for c in inspect(self.conn).get_columns(table) if c["name"] == column.name)
+        if self.dialect == "sqlite" or (getattr(current["type"], "length", None) or 0) >= column.type.length:
+            return False
+        type_ = column.type.compile(dialect=self.conn.dialect)
+        if self.dialect in ("mysql", "mariadb"):
+            sql = f"ALTER TABLE {table} MODIFY {column.name} {type_}{'' if column.nullable else ' NOT NULL'}"
+        else:
+            sql = f"ALTER TABLE {table} ALTER COLUMN {column.name} TYPE {type_}"
+        self.execute(sql, f"widened {table}.{column.name} to {type_}")
+        return True
+
+    def is_unique(self, table, columns) -> bool:
+        """A unique constraint or unique index covers exactly `columns`."""
+        inspector = inspect(self.conn)
+        return any(c["column_names"] == columns for c in inspector.get_unique_constraints(table)) or any(
+            i["unique"] and i["column_names"] == columns for i in inspector.get_indexes(table)
+        )
+
+    def is_empty(self, model_or_table) -> bool:
+        return self.conn.execute(select(1).select_from(model_or_table).limit(1)).first() is None
+
+    def execute(self, sql, change=None, **params):
+        result = self.conn.execute(text(sql), params)
+        if change:
+            self.changes.append(change)
+        return result
+
+
+# ---- Schema ----
+
+@step
+def ticket_parts_total(upgrade):
+    if upgrade.add_column(ServiceTicket.__table__.c.parts_total):
+        upgrade.rebuild_revenue = True
+
+
+@step
+def inventory_catalog_version(upgrade):
+    # existing parts start at version 0, the same as a catalog nobody has written yet
+    upgrade.add_column(Inventory.__table__.c.version)
+
+
+@step
+def stock_levels(upgrade):
+    # NULL = stock not tracked, so existing parts keep selling as before
+    upgrade.add_column(Inventory.__table__.c.quantity_on_hand)
+    # every existing ticket/part link stood for one unit
+    upgrade.add_column(service_inventory.c.quantity)
+
+
+@step
+def inventory_sku(upgrade):
+    # ADD COLUMN cannot carry UNIQUE on SQLite, so uniqueness comes from an index
+    upgrade.add_column(Inventory.__table__.c.sku)
+    if not upgrade.is_unique("inventory", ["sku"]):
+        upgrade.execute("CREATE UNIQUE INDEX uq_inventory_sku ON inventory (sku)", "created index uq_inventory_sku")
+
+
+@step
+def password_hash_length(upgrade):
+    # scrypt hashes (app.utils.passwords) are longer than the old VARCHAR(128)
+    upgrade.widen_column(Customer.__table__.c.password)
+
+
+@step
+def model_indexes(upgrade):
+    """Indexes declared on the models (keyset sorts, filters, leaderboards)."""
+    for table in db.metadata.sorted_tables:
+        if not upgrade.has_table(table.name):
+            continue
+        existing = upgrade.index_names(table.name)
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name not in existing:
+                index.create(upgrade.conn)
+                upgrade.changes.append(f"created index {index.name}")
+
+
+@step
+def ticket_search_index(upgrade):
+    """Full-text index behind GET /service-tickets/search."""
+    if upgrade.dialect == "sqlite":
+        if upgrade.has_table(SERVICE_TICKETS_FTS):
+            return
+        for ddl in SERVICE_TICKETS_FTS_DDL:
+            upgrade.execute(ddl)
+        # external-content table: index the rows that already exist
+        upgrade.execute(
+            f"INSERT INTO {SERVICE_TICKETS_FTS}({SERVICE_TICKETS_FTS}) VALUES ('rebuild')",
+            f"created and filled {SERVICE_TICKETS_FTS}",
+        )
+    elif upgrade.dialect in ("mysql", "mariadb"):
+        if SERVICE_TICKETS_FULLTEXT_INDEX not in upgrade.index_names(ServiceTicket.__tablename__):
+            upgrade.execute(
+                f"ALTER TABLE service_tickets ADD FULLTEXT INDEX {SERVICE_TICKETS_FULLTEXT_INDEX} (description)",
+                f"created index {SERVICE_TICKETS_FULLTEXT_INDEX}",
+            )
+
+
+# ---- Data ----
+
+@step
+def revenue_rollups(upgrade):
+    """parts_total and the revenue rollups were added empty: compute them from service_inventory."""
+    if upgrade.rebuild_revenue or (upgrade.is_empty(DailyRevenue) and not upgrade.is_empty(service_inventory)):
+        rebuild_revenue_rollups()
+        upgrade.changes.append("rebuilt ticket parts totals and revenue rollups")
+        upgrade.rebuild_mechanics = True  # mechanic_daily copies parts_total
+
+
+@step
+def mechanic_rollups(upgrade):
+    """Leaderboard counters (every mechanic has a row once they exist)."""
+    if upgrade.rebuild_mechanics or (upgrade.is_empty(MechanicTicketCount) and not upgrade.is_empty(Mechanic)):
+        rebuild_mechanic_rollups()
+        upgrade.changes.append("rebuilt mechanic rollups")
+
+
+def upgrade_schema() -> list:
+    """Run every step on the current session's connection; returns what changed. The caller commits."""
+    upgrade = Upgrade(db.session.connection())
+    for f in _STEPS:
+        f(upgrade)
+    return upgrade.changes
+
+
+@schema_cli.command("upgrade")
+def upgrade_command():
+    """Add the columns, indexes and backfills an existing database is missing."""
+    changes = upgrade_schema()
+    db.session.commit()
+    for change in changes:
+        click.echo(change)
+    click.echo("schema is up to date" if not changes else f"{len(changes)} change(s) applied")
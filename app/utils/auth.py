@@ -1,3 +1,7 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from functools import wraps
 
@@ -6,17 +10,97 @@ from jose import jwt
 import jose
 
 
-def encode_token(customer_id: int) -> str:
+def _encode(customer_id: int, token_type: str, lifetime: timedelta) -> str:
+    now = datetime.now(tz=timezone.utc)
     payload = {
-        "exp": datetime.now(tz=timezone.utc) + timedelta(hours=1),
-        "iat": datetime.now(tz=timezone.utc),
+        "exp": now + lifetime,
+        "iat": now,
         "sub": str(customer_id),
-        "type": "customer"  # helpful if you later do mechanic tokens
+        "type": token_type  # "customer" for access tokens, "refresh" for refresh tokens
     }
     secret = current_app.config["SECRET_KEY"]
     return jwt.encode(payload, secret, algorithm="HS256")
 
 
+def encode_token(customer_id: int) -> str:
+    minutes = current_app.config.get("ACCESS_TOKEN_MINUTES", 60)
+    return _encode(customer_id, "customer", timedelta(minutes=minutes))
+
+
+def encode_refresh_token(customer_id: int) -> str:
+    days = current_app.config.get("REFRESH_TOKEN_DAYS", 14)
+    return _encode(customer_id, "refresh", timedelta(days=days))
+
+
+class InvalidTokenType(jose.exceptions.JWTError):
+    """A valid token of the wrong kind (e.g. a refresh token used as an access token)."""
+
+
+def decode_token(token: str, token_type: str) -> tuple:
+    """Verify `token` and return (customer_id, exp); raises jose.JWTError (or KeyError/ValueError)."""
+    secret = current_app.config["SECRET_KEY"]
+    data = jwt.decode(token, secret, algorithms=["HS256"])
+    if data.get("type") != token_type:
+        raise InvalidTokenType(token_type)
+    return int(data["sub"]), data["exp"]
+
+
+class TokenCache:
+    """
+    Bounded LRU of already-verified access tokens, keyed by the token's
+    SHA-256 digest. An entry lives for at most `ttl` seconds and never past
+    the token's own `exp`, so a cached token expires exactly when it would
+    have failed verification.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # digest -> (customer_id, expires_at)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, customer_id, exp, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries[key] = (customer_id, min(exp, now + self.ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_token_cache() -> TokenCache:
+    token_cache = current_app.extensions.get("token_cache")
+    if token_cache is None:
+        token_cache = current_app.extensions["token_cache"] = TokenCache(
+            maxsize=current_app.config.get("TOKEN_CACHE_SIZE", 10000),
+            ttl=current_app.config.get("TOKEN_CACHE_TTL", 300),
+        )
+    return token_cache
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -28,19 +112,19 @@ def token_required(f):
             return jsonify({"message": "Authorization header must be 'Bearer <token>'"}), 401
 
         token = parts[1]
-        try:
-            secret = current_app.config["SECRET_KEY"]
-            data = jwt.decode(token, secret, algorithms=["HS256"])
-
-            customer_id = int(data["sub"])
-            # optionally enforce type
-            if data.get("type") != "customer":
+        token_cache = get_token_cache()
+        key = token_cache.key(token)
+        customer_id = token_cache.get(key)
+        if customer_id is None:
+            try:
+                customer_id, exp = decode_token(token, "customer")
+            except jose.exceptions.ExpiredSignatureError:
+                return jsonify({"message": "Token has expired"}), 401
+            except InvalidTokenType:
                 return jsonify({"message": "Invalid token type"}), 401
-
-        except jose.exceptions.ExpiredSignatureError:
-            return jsonify({"message": "Token has expired"}), 401
-        except (jose.exceptions.JWTError, KeyError, ValueError):
-            return jsonify({"message": "Invalid token"}), 401
+            except (jose.exceptions.JWTError, KeyError, ValueError):
+                return jsonify({"message": "Invalid token"}), 401
+            token_cache.put(key, customer_id, exp)
 
         # Pass customer_id into the route
         return f(customer_id, *args, **kwargs)
@@ -0,0 +1,188 @@
+"""
+Flask-Caching backends with hit/miss counters.
+
+CountingSimpleCache is the in-process SimpleCache. SQLiteCache stores entries
+in one SQLite file (WAL mode, memory-mapped reads), so every gunicorn worker
+on a host shares the same entries and the same invalidations without running
+a cache server:
+
+    CACHE_TYPE = "app.utils.cache_backends.SQLiteCache"
+    CACHE_SQLITE_PATH = "/var/run/mechanic-shop/cache.sqlite3"  # default: instance folder
+
+Hit/miss counters are kept per process; cache_stats() reads them.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask_caching.backends.base import BaseCache
+from flask_caching.backends.simplecache import SimpleCache
+
+from app.extensions import cache
+
+PRUNE_EVERY = 200  # sets between sweeps of expired / surplus rows
+_LIVE = "(expires = 0 OR expires > ?)"
+
+
+class CountingCache:
+    """Mixin counting get() hits and misses (None is a miss, as in cache.cached)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, values):
+        hits = sum(value is not None for value in values)
+        with self._counter_lock:
+            self.hits += hits
+            self.misses += len(values) - hits
+
+    def get(self, key):
+        value = super().get(key)
+        self._count([value])
+        return value
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": round(self.hits / total, 4) if total else None}
+
+
+class CountingSimpleCache(CountingCache, SimpleCache):
+    pass
+
+
+class SQLiteCache(CountingCache, BaseCache):
+    def __init__(self, path, threshold=10000, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self.path = path
+        self.threshold = threshold
+        self._local = threading.local()
+        self._sets = 0
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires REAL NOT NULL, value BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires ON cache (expires)")
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        path = config.get("CACHE_SQLITE_PATH") or os.path.join(app.instance_path, "cache.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        kwargs.update(path=path, threshold=config.get("CACHE_SQLITE_THRESHOLD", 10000))
+        return cls(*args, **kwargs)
+
+    def _connect(self):
+        # one connection per thread and per process (never shared across a fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=67108864")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock up front, across processes
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _expires(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return 0 if timeout == 0 else time.time() + timeout
+
+    def get(self, key):
+        return self.get_many(key)[0]
+
+    def get_many(self, *keys):
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        rows = dict(self._connect().execute(
+            f"SELECT key, value FROM cache WHERE key IN ({placeholders}) AND {_LIVE}",
+            (*keys, time.time()),
+        ))
+        values = [pickle.loads(rows[key]) if key in rows else None for key in keys]
+        self._count(values)
+        return values
+
+    def set(self, key, value, timeout=None):
+        return self.set_many({key: value}, timeout) == [key]
+
+    def set_many(self, mapping, timeout=None):
+        expires = self._expires(timeout)
+        rows = [(key, expires, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) for key, value in mapping.items()]
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO cache (key, expires, value) VALUES (?, ?, ?)", rows)
+        self._sets += len(rows)
+        if self._sets >= PRUNE_EVERY:
+            self._sets = 0
+            self._prune()
+        return list(mapping)
+
+    def add(self, key, value, timeout=None):
+        cursor = self._connect().execute(
+            "INSERT INTO cache (key, expires, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET expires = excluded.expires, value = excluded.value "
+            "WHERE cache.expires != 0 AND cache.expires <= ?",
+            (key, self._expires(timeout), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def inc(self, key, delta=1):
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT value, expires FROM cache WHERE key = ? AND {_LIVE}", (key, time.time())
+            ).fetchone()
+            value = (pickle.loads(row[0]) if row else 0) + delta
+            expires = row[1] if row else self._expires(None)
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires, value) VALUES (?, ?, ?)",
+                (key, expires, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)),
+            )
+        return value
+
+    def has(self, key):
+        row = self._connect().execute(
+            f"SELECT 1 FROM cache WHERE key = ? AND {_LIVE}", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key):
+        return self._connect().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount == 1
+
+    def delete_many(self, *keys):
+        return [key for key in keys if self.delete(key)]
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache")
+        return True
+
+    def _prune(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache WHERE expires != 0 AND expires <= ?", (time.time(),))
+            surplus = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.threshold
+            if surplus > 0:
+                # entries closest to expiry go first; never-expiring ones last
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                    "ORDER BY expires = 0, expires LIMIT ?)",
+                    (surplus,),
+                )
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the current app's cache backend in this process."""
+    backend = cache.cache
+    return backend.stats() if isinstance(backend, CountingCache) else {}
@@ -0,0 +1,88 @@
+"""
+Tag-based cache invalidation.
+
+Every tag has a generation token stored in the cache itself
+("tag:<name>"), and a cached entry's key is built from the generations of
+the tags it depends on. Invalidating a tag replaces its token, which orphans
+every entry built on it at once; orphans age out with their timeout.
+
+Each committed table write invalidates the tag named after the table
+(recorded by app.utils.etag), so
+`@cache.cached(make_cache_key=tagged_cache_key("customers"))` is never
+stale after a commit and costs no database work on a hit. Other tags are
+invalidated with note_tags() inside the transaction, applied after commit.
+
+Generations live in the cache, so they are shared exactly as widely as the
+backend: use a shared backend (app.utils.cache_backends.SQLiteCache, Redis)
+when more than one worker process serves requests.
+"""
+import hashlib
+from uuid import uuid4
+
+from flask import has_app_context, request
+from sqlalchemy import event
+
+from app.extensions import cache, db
+from app.models import TableVersion
+
+_PENDING = "cache_tags_pending"
+
+
+def _key(tag):
+    return f"tag:{tag}"
+
+
+def tag_generations(*tags) -> list:
+    """The current generation token of each tag, creating missing ones."""
+    keys = [_key(tag) for tag in tags]
+    tokens = cache.get_many(*keys) if keys else []
+    for i, token in enumerate(tokens):
+        if token is None:
+            # never falls back to a default: an evicted token must not revive old entries
+            cache.add(keys[i], uuid4().hex, timeout=0)
+            tokens[i] = cache.get(keys[i])
+    return tokens
+
+
+def invalidate_tags(*tags):
+    if tags:
+        cache.set_many({_key(tag): uuid4().hex for tag in tags}, timeout=0)
+
+
+def note_tags(*tags, session=None):
+    """Invalidate `tags` once the current transaction commits (dropped on rollback)."""
+    (session or db.session).info.setdefault(_PENDING, set()).update(tags)
+
+
+def tagged_key(prefix, tags, *parts) -> str:
+    raw = "|".join([*map(str, parts), *tag_generations(*tags)])
+    return f"{prefix}:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def tagged_cache_key(*tags, vary=None):
+    """make_cache_key for cache.cached(): the key changes whenever a tag is invalidated."""
+    def make_cache_key(*args, **kwargs):
+        return tagged_key(
+            "view", tags, request.full_path, args, sorted(kwargs.items()), *([vary()] if vary else [])
+        )
+
+    return make_cache_key
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_pending(session):
+    tags = session.info.pop(_PENDING, None)
+    if tags and has_app_context():
+        invalidate_tags(*tags)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING, None)
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def _new_database(target, connection, **kw):
+    # a freshly created schema makes everything in a persistent cache meaningless
+    if has_app_context():
+        cache.clear()
@@ -0,0 +1,154 @@
+"""
+Stampede protection for route caching.
+
+CoalescingCache.cached() stores each view result with the time it stops
+being fresh, and keeps it in the backend for `stale` seconds longer:
+
+- single flight: when a key is missing, one request computes it while the
+  others wait for its result. Threads of one process wait on an Event;
+  other processes see the lock entry ("flight:<key>", added atomically in
+  the shared backend) and poll for the value;
+- stale-while-revalidate: a request that finds an expired but still stored
+  entry gets it immediately, and one background thread recomputes it.
+
+Keys built from cache tags (app.utils.cache_tags) change on every write, so
+data invalidated by a write is never served stale; only entries that merely
+aged out are. Views behind conditional_get use versioned_cache_key
+(app.utils.etag), whose key also holds the table versions the ETag is made
+of, so a stale body is never sent under a newer ETag. CACHE_COALESCE = False restores plain get/compute/set (used by
+benchmarks/stampede.py for comparison).
+"""
+import threading
+import time
+from functools import wraps
+
+from flask import copy_current_request_context, current_app
+from flask_caching import Cache
+
+POLL_INTERVAL = 0.02
+
+
+class CoalescingCache(Cache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._flights = {}  # key -> Event set when this process's computation finishes
+        self._flights_lock = threading.Lock()
+
+    def cached(self, timeout=None, make_cache_key=None, stale=None, **kwargs):
+        """
+        Like Flask-Caching's cached(), with `stale` seconds of
+        stale-while-revalidate (default CACHE_STALE_TTL). As there, timeout
+        None means CACHE_DEFAULT_TIMEOUT and 0 means the entry never expires
+        (so it is never stale either). Options this version does not
+        implement fall back to Flask-Caching's decorator.
+        """
+        if kwargs or make_cache_key is None:
+            return super().cached(timeout=timeout, make_cache_key=make_cache_key, **kwargs)
+
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kw):
+                config = current_app.config
+                fresh_for = timeout if timeout is not None else config.get("CACHE_DEFAULT_TIMEOUT", 300)
+                stale_for = stale if stale is not None else config.get("CACHE_STALE_TTL", 60)
+                coalesce = config.get("CACHE_COALESCE", True)
+                key = make_cache_key(*args, **kw)
+
+                def compute():
+                    rv = f(*args, **kw)
+                    if fresh_for:
+                        self.set(key, (rv, time.time() + fresh_for), timeout=fresh_for + stale_for)
+                    else:
+                        self.set(key, (rv, None), timeout=0)
+                    return rv
+
+                entry = self.get(key)  # (value, fresh until or None for never stale)
+                if entry is not None:
+                    value, fresh_until = entry
+                    if fresh_until is None or time.time() < fresh_until:
+                        return value
+                    if coalesce:
+                        self._revalidate(key, compute)
+                        return value
+                if not coalesce:
+                    return compute()
+                return self._single_flight(key, compute)
+
+            decorated.uncached = f
+            decorated.make_cache_key = make_cache_key
+            return decorated
+
+        return decorator
+
+    def _join(self, key):
+        """(event, leader): leader is True if this thread must compute `key`."""
+        with self._flights_lock:
+            event = self._flights.get(key)
+            if event is not None:
+                return event, False
+            event = self._flights[key] = threading.Event()
+            return event, True
+
+    def _land(self, key, event):
+        with self._flights_lock:
+            self._flights.pop(key, None)
+        event.set()
+
+    def _single_flight(self, key, compute):
+        wait = current_app.config.get("CACHE_FLIGHT_TIMEOUT", 10)
+        event, leader = self._join(key)
+        if not leader:
+            event.wait(wait)
+            entry = self.get(key)
+            # the leader failed or took too long: compute it here
+            return entry[0] if entry is not None else compute()
+
+        lock_key = f"flight:{key}"
+        try:
+            deadline = time.monotonic() + wait
+            while not self.add(lock_key, 1, timeout=wait):
+                # another process is computing this key
+                entry = self.get(key)
+                if entry is not None:
+                    return entry[0]
+                if time.monotonic() >= deadline:
+                    return compute()
+                time.sleep(POLL_INTERVAL)
+            try:
+                entry = self.get(key)
+                if entry is not None and (entry[1] is None or time.time() < entry[1]):
+                    return entry[0]  # filled while we took the lock
+                return compute()
+            finally:
+                self.delete(lock_key)
+        finally:
+            self._land(key, event)
+
+    def _revalidate(self, key, compute):
+        """Recompute `key` in a background thread unless someone already is."""
+        event, leader = self._join(key)
+        if not leader:
+            return
+        lock_key = f"flight:{key}"
+        if not self.add(lock_key, 1, timeout=current_app.config.get("CACHE_FLIGHT_TIMEOUT", 10)):
+            self._land(key, event)  # another process is refreshing it
+            return
+
+        @copy_current_request_context
+        def refresh():
+            try:
+                compute()
+            except Exception:
+                current_app.logger.exception("Background cache refresh failed for %s", key)
+            finally:
+                self.delete(lock_key)
+                self._land(key, event)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def wait_for_refreshes(self, timeout=None):
+        """Block until the computations running in this process finish (tests, shutdown)."""
+        with self._flights_lock:
+            events = list(self._flights.values())
+        for event in events:
+            event.wait(timeout)
@@ -0,0 +1,113 @@
+"""
+Negotiated gzip/brotli response compression.
+
+Buffered responses are compressed when they are at least COMPRESS_MIN_SIZE
+bytes. Streamed responses (e.g. /service-tickets/export) are compressed chunk
+by chunk as they are generated, flushing after each chunk so the client keeps
+receiving data. Brotli is used only if the optional `brotli` package is
+installed.
+"""
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/yaml",
+    "text/csv",
+    "text/html",
+    "text/plain",
+    "text/css",
+}
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.finish() if self.encoding == "br" else self._obj.flush()
+
+
+def _stream(iterable, compressor):
+    try:
+        for data in iterable:
+            if isinstance(data, str):
+                data = data.encode()
+            if data:
+                yield compressor.chunk(data)
+        yield compressor.finish()
+    finally:
+        close = getattr(iterable, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    config = current_app.config
+    if not config.get("COMPRESS_ENABLED", True):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if (
+        response.status_code not in (200, 201)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or request.method == "HEAD"
+    ):
+        return response
+
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == "br":
+        compressor = _Compressor(encoding, config.get("COMPRESS_BROTLI_QUALITY", 4))
+    else:
+        compressor = _Compressor(encoding, config.get("COMPRESS_GZIP_LEVEL", 6))
+
+    if response.is_streamed:
+        response.response = _stream(response.response, compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config.get("COMPRESS_MIN_SIZE", 500):
+            return response
+        response.set_data(compressor.chunk(data) + compressor.finish())
+
+    response.headers["Content-Encoding"] = encoding
+    # the compressed bytes differ from the identity representation
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
@@ -0,0 +1,72 @@
+"""
+Row counts for paginated listings without a COUNT(*) per request.
+
+count_rows() caches each distinct count query's result together with the
+cache-tag generations of the tables it reads (app.utils.cache_tags). The
+cached count is exact while those tables are unwritten; after a write it is
+still served for up to COUNT_MAX_STALENESS seconds from when it was
+computed, then recounted. COUNT_MAX_STALENESS = 0 recounts after every
+write.
+
+Listings use it two ways: offset_page() for page-number pagination, and
+`?total=1` on the keyset listings (see wants_total).
+"""
+import hashlib
+import time
+
+from flask import current_app
+
+from app.extensions import cache
+from app.utils.cache_tags import tag_generations
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def _query_key(query) -> str:
+    compiled = query.statement.compile()
+    raw = f"{compiled}|{sorted(compiled.params.items())!r}"
+    return "count:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def count_rows(query, tables, max_staleness=None) -> int:
+    """
+    Number of rows `query` returns. Pass the filtered query before any loader
+    options; `tables` are the tables it reads.
+    """
+    if max_staleness is None:
+        max_staleness = current_app.config.get("COUNT_MAX_STALENESS", 0)
+    query = query.order_by(None)
+    key = _query_key(query)
+    generations = tag_generations(*tables)
+    now = time.time()
+
+    entry = cache.get(key)  # (count, generations, computed_at)
+    if entry is not None and (entry[1] == generations or now - entry[2] <= max_staleness):
+        return entry[0]
+
+    count = query.count()
+    cache.set(key, (count, generations, now), timeout=CACHE_TIMEOUT)
+    return count
+
+
+def wants_total(args) -> bool:
+    return args.get("total", "").lower() in ("1", "true")
+
+
+def offset_page(query, page: int, per_page: int, tables, count_query=None) -> dict:
+    """
+    Page-number pagination. `query` must be ordered; the total comes from
+    count_rows(count_query or query), while has_next is always exact.
+    """
+    page = max(page, 1)
+    rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    total = count_rows(count_query if count_query is not None else query, tables)
+    return {
+        "items": rows[:per_page],
+        "page": page,
+        "per_page": per_page,
+        "pages": -(-total // per_page),
+        "total": total,
+        "has_next": len(rows) > per_page,
+        "has_prev": page > 1,
+    }
@@ -0,0 +1,159 @@
+"""
+Strong ETags from per-table change counters.
+
+Every commit bumps `table_versions.version` for each table it wrote to
+(ORM flushes and Core INSERT/UPDATE/DELETE alike). The bump runs right after
+the commit in its own short transaction, so a version row is locked only for
+that one UPDATE and writers to the same table never queue behind each
+other's transactions on it (stock reservations serialise on the part row
+alone, see app.blueprints.inventory.stock). A GET in the moment between the
+two commits may still answer 304 for the old version.
+
+A GET's ETag is derived from the versions of the tables its response is built
+from, so If-None-Match can be answered with one primary-key lookup and
+without loading or serializing the resource.
+"""
+import hashlib
+from functools import wraps
+
+from flask import current_app, g, has_app_context, make_response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.extensions import db
+from app.models import TableVersion
+from app.utils.cache_tags import note_tags, tagged_key
+from app.utils.sql import insert_ignore
+
+_PENDING = "etag_changed_tables"  # connection.info: written, not yet committed
+_COMMITTING = "etag_committing_tables"  # session.info: flushed, commit in progress
+_COMMITTED = "etag_committed_tables"  # session.info: committed, version bump pending
+
+
+# Recorded per connection at the Core level, so ORM flushes and hand-written
+# INSERT/UPDATE/DELETE statements are both seen.
+@event.listens_for(Engine, "after_execute")
+def _track_dml(conn, clauseelement, multiparams, params, execution_options, result):
+    if isinstance(clauseelement, UpdateBase):
+        table = getattr(clauseelement, "table", None)
+        name = getattr(table, "name", None)
+        if name and name != TableVersion.__tablename__:
+            conn.info.setdefault(_PENDING, set()).add(name)
+
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+def _discard_pending(conn):
+    conn.info.pop(_PENDING, None)
+
+
+@event.listens_for(db.session, "before_commit")
+def _collect_changes(session):
+    session.flush()
+    names = session.connection().info.pop(_PENDING, None)
+    if names:
+        session.info.setdefault(_COMMITTING, set()).update(names)
+        note_tags(*names, session=session)
+
+
+@event.listens_for(db.session, "after_commit")
+def _committed(session):
+    names = session.info.pop(_COMMITTING, None)
+    if names:
+        session.info.setdefault(_COMMITTED, set()).update(names)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    session.info.pop(_COMMITTING, None)
+
+
+# After the session has handed its connection back, so a bump never holds
+# two pooled connections at once.
+@event.listens_for(db.session, "after_transaction_end")
+def _bump_versions(session, transaction):
+    if transaction.parent is not None:
+        return
+    names = session.info.pop(_COMMITTED, None)
+    if not names:
+        return
+    names = sorted(names)
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert_ignore(TableVersion.__table__).values([{"name": n, "version": 0} for n in names]))
+            conn.execute(
+                update(TableVersion).where(TableVersion.name.in_(names)).values(version=TableVersion.version + 1)
+            )
+    except Exception:
+        if not has_app_context():
+            raise
+        # the data is committed; ETags for these tables stay stale until their next write
+        current_app.logger.exception("Could not bump table versions for %s", names)
+
+
+def table_versions(*tables) -> dict:
+    """Current change counter for each table name (0 if never written). Memoized per request."""
+    memo = g.setdefault("table_versions", {})
+    missing = [t for t in tables if t not in memo]
+    if missing:
+        rows = dict(db.session.execute(
+            select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(missing))
+        ).all())
+        for t in missing:
+            memo[t] = rows.get(t, 0)
+    return {t: memo[t] for t in tables}
+
+
+def compute_etag(tables, *parts) -> str:
+    versions = table_versions(*tables)
+    raw = "|".join([request.full_path, *(f"{t}={v}" for t, v in sorted(versions.items())), *map(str, parts)])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def versioned_cache_key(*tables, vary=None):
+    """
+    make_cache_key for a cache.cached() view under conditional_get(*tables).
+    Besides the tags, the key holds the same table versions as the ETag, so a
+    cached body (fresh or served stale) only ever goes out under the ETag of
+    the versions it was built from.
+    """
+    def make_cache_key(*args, **kwargs):
+        versions = table_versions(*tables)
+        return tagged_key(
+            "view",
+            tables,
+            request.full_path,
+            args,
+            sorted(kwargs.items()),
+            *(f"{t}={v}" for t, v in sorted(versions.items())),
+            *([vary()] if vary else []),
+        )
+
+    return make_cache_key
+
+
+def conditional_get(*tables, vary=None):
+    """
+    Add an ETag to 200 responses and answer a matching If-None-Match with 304
+    before the view runs. `tables` are every table the response is built from;
+    `vary` returns anything else it depends on (e.g. today's date).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            tag = compute_etag(tables, args, sorted(kwargs.items()), *([vary()] if vary else []))
+            # weak comparison: compression turns the ETag weak (app.utils.compression)
+            if request.if_none_match.contains_weak(tag):
+                response = make_response("", 304)
+                response.set_etag(tag)
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(tag)
+            return response
+
+        return decorated
+
+    return decorator
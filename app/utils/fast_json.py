@@ -0,0 +1,57 @@
+"""
+Optional orjson-backed JSON provider.
+
+Installed by create_app when FAST_JSON is on and orjson is importable;
+otherwise Flask's default provider stays in place.
+"""
+import decimal
+import uuid
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(obj):
+    # dates, datetimes, UUIDs and dataclasses are handled natively by orjson
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """Same contract as Flask's DefaultJSONProvider (sorted keys), but encoded by orjson."""
+
+    mimetype = "application/json"
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option | orjson.OPT_APPEND_NEWLINE
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=option),
+            mimetype=self.mimetype,
+        )
+
+
+def install_json_provider(app):
+    """Switch app.json to orjson when enabled and available. Returns True if installed."""
+    if not app.config.get("FAST_JSON") or orjson is None:
+        return False
+    app.json = OrjsonProvider(app)
+    return True
@@ -0,0 +1,101 @@
+"""
+Sparse fieldsets (?fields=) and relationship expansion (?expand=).
+
+    ?fields=id,service_date                 only these columns
+    ?fields=id,mechanics.name&expand=...    dotted names pick columns of an expanded relationship
+    ?expand=mechanics                       only these relationships ("" for none)
+
+Without either parameter every nested relationship is expanded, which matches
+the full representation; with ?fields= alone only the relationships it names
+are. Columns that are not requested are left out of the SELECT (load_only)
+and relationships that are not expanded are never loaded.
+"""
+from functools import lru_cache
+
+from marshmallow import fields as ma_fields
+from sqlalchemy.orm import load_only, selectinload
+
+
+class FieldsetError(ValueError):
+    """Raised for an unknown name in ?fields= or ?expand=."""
+
+
+def _split(raw):
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+
+@lru_cache(maxsize=256)
+def fieldset_schema(schema_cls, only, many):
+    """Schema instances are costly to build; reuse one per distinct field selection."""
+    return schema_cls(only=only, many=many)
+
+
+class Fieldset:
+    def __init__(self, schema, args, always=("id",)):
+        self.schema_cls = type(schema)
+        self.model = schema.opts.model
+
+        nested = {name: f for name, f in schema.dump_fields.items() if isinstance(f, ma_fields.Nested)}
+        scalars = [name for name in schema.dump_fields if name not in nested]
+
+        fields_raw = args.get("fields")
+        expand_raw = args.get("expand")
+        if expand_raw is not None:
+            self.expand = _split(expand_raw)
+        elif fields_raw is not None:
+            # an explicit field list expands only the relationships it names
+            self.expand = []
+        else:
+            self.expand = list(nested)
+        unknown = [name for name in self.expand if name not in nested]
+        if unknown:
+            raise FieldsetError(f"Unknown expand value(s): {', '.join(unknown)}")
+
+        self.nested_columns = {}
+        if fields_raw is None:
+            self.columns = scalars
+        else:
+            self.columns = []
+            for name in _split(fields_raw):
+                rel, _, sub = name.partition(".")
+                if sub:
+                    if rel not in nested or sub not in nested[rel].schema.dump_fields:
+                        raise FieldsetError(f"Unknown field: {name}")
+                    if rel not in self.expand:
+                        self.expand.append(rel)
+                    self.nested_columns.setdefault(rel, []).append(sub)
+                elif name in nested:
+                    if name not in self.expand:
+                        self.expand.append(name)
+                elif name in scalars:
+                    self.columns.append(name)
+                else:
+                    raise FieldsetError(f"Unknown field: {name}")
+
+        self._nested = nested
+        self._always = always
+
+    @property
+    def only(self):
+        names = list(self.columns)
+        for rel in self.expand:
+            if rel in self.nested_columns:
+                names.extend(f"{rel}.{sub}" for sub in self.nested_columns[rel])
+            else:
+                names.append(rel)
+        return tuple(names)
+
+    def schema(self, many=False):
+        return fieldset_schema(self.schema_cls, self.only, many)
+
+    def query_options(self, extra_columns=()):
+        """Loader options for the model query; extra_columns are loaded but not dumped (e.g. sort keys)."""
+        loaded = dict.fromkeys([*self._always, *self.columns, *extra_columns])
+        options = [load_only(*(getattr(self.model, name) for name in loaded))]
+        for rel in self.expand:
+            option = selectinload(getattr(self.model, rel))
+            if rel in self.nested_columns:
+                target = self._nested[rel].schema.opts.model
+                option = option.load_only(*(getattr(target, name) for name in self.nested_columns[rel]))
+            options.append(option)
+        return options
@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed `limit` or `after` query parameter."""
+
+
+def parse_limit(raw, default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    if raw in (None, ""):
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise PaginationError("limit must be an integer")
+    if limit < 1 or limit > maximum:
+        raise PaginationError(f"limit must be between 1 and {maximum}")
+    return limit
+
+
+def encode_cursor(values) -> str:
+    """Opaque cursor for the sort key of the last row on a page."""
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise PaginationError("after is not a valid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise PaginationError("after is not a valid cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if python_type is date:
+                value = date.fromisoformat(value)
+            elif python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif value is not None:
+                value = python_type(value)
+        except (TypeError, ValueError):
+            raise PaginationError("after is not a valid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def _after_clause(columns, values, descending: bool):
+    """(c1, c2, ...) > (v1, v2, ...) spelled out so every backend can use the index."""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def keyset_page(query, columns, after=None, limit: int = DEFAULT_LIMIT, descending: bool = False):
+    """
+    Fetch one page of `query` ordered by `columns` (the last one must be unique).
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    if after:
+        query = query.filter(_after_clause(columns, decode_cursor(after, columns), descending))
+
+    order = [c.desc() for c in columns] if descending else [c.asc() for c in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return items, next_cursor
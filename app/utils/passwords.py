@@ -0,0 +1,95 @@
+"""
+Password hashing off the request thread.
+
+Werkzeug's key-derivation functions are deliberately slow and hold the GIL,
+so a login spike would otherwise stall every worker thread. Hashes are
+computed in a shared process pool instead; the request thread only waits on
+the result. At most PASSWORD_HASH_MAX_PENDING hashes may be queued or
+running at once; past that, callers wait up to PASSWORD_HASH_QUEUE_TIMEOUT
+seconds for a slot and then get HashingBusy (the routes answer 503).
+
+PASSWORD_HASH_METHOD is a Werkzeug method string ("scrypt:32768:8:1",
+"pbkdf2:sha256:600000"). Hashes stored with other parameters still verify,
+and needs_rehash() tells the login route to upgrade them.
+PASSWORD_HASH_WORKERS = 0 hashes inline (no pool).
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+_lock = threading.Lock()
+_executor = None
+_executor_workers = None
+_slots = None
+_slots_size = None
+
+
+class HashingBusy(RuntimeError):
+    """Raised when the hashing pool stays full for longer than the queue timeout."""
+
+
+def _config(key, default):
+    return current_app.config.get(key, default) if has_app_context() else default
+
+
+def canonical_method(method: str) -> str:
+    """The method prefix Werkzeug stores for `method`, with its defaults filled in."""
+    name, *params = method.split(":")
+    if name == "scrypt":
+        defaults = ["32768", "8", "1"]
+    elif name == "pbkdf2":
+        defaults = ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ":".join([name, *params, *defaults[len(params):]])
+
+
+def _pool():
+    """(executor or None, semaphore) for the current configuration; the pool is shared by every app."""
+    global _executor, _executor_workers, _slots, _slots_size
+    workers = _config("PASSWORD_HASH_WORKERS", None)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pending = _config("PASSWORD_HASH_MAX_PENDING", 64)
+    with _lock:
+        if workers != _executor_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+            _executor_workers = workers
+        if pending != _slots_size:
+            _slots = threading.BoundedSemaphore(pending)
+            _slots_size = pending
+        return _executor, _slots
+
+
+def _run(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(timeout=_config("PASSWORD_HASH_QUEUE_TIMEOUT", 5)):
+        raise HashingBusy("password hashing is saturated")
+    try:
+        if executor is None:
+            return fn(*args)
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(raw_password: str) -> str:
+    method = _config("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+    return _run(generate_password_hash, raw_password, method)
+
+
+def verify_password(stored_hash: str, raw_password: str) -> bool:
+    return _run(check_password_hash, stored_hash, raw_password)
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """True if `stored_hash` was made with parameters other than PASSWORD_HASH_METHOD."""
+    method = canonical_method(_config("PASSWORD_HASH_METHOD", DEFAULT_METHOD))
+    return stored_hash.split("$", 1)[0] != method
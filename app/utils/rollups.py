@@ -0,0 +1,262 @@
+"""
+Incremental revenue rollups and mechanic counters.
+
+Every helper here only issues statements on the current session; the caller
+commits, so the rollups change in the same transaction as the write that
+caused them.
+
+Mechanic rollups credit a ticket (and its whole parts total) to every
+mechanic assigned to it, on the ticket's service_date.
+"""
+from collections import defaultdict
+
+from sqlalchemy import case, delete, func, insert, select, update
+
+from app.extensions import db
+from app.models import (
+    CustomerRevenue,
+    DailyRevenue,
+    Inventory,
+    Mechanic,
+    MechanicDaily,
+    MechanicTicketCount,
+    ServiceTicket,
+    service_inventory,
+    service_mechanics,
+)
+from app.utils import ticket_cache, workload
+from app.utils.sql import insert_ignore
+
+
+def _bump(model, keys: dict, **deltas):
+    # make sure the row exists, then add in place (no read-modify-write race)
+    db.session.execute(insert_ignore(model.__table__).values({**keys, **dict.fromkeys(deltas, 0)}))
+    db.session.execute(
+        update(model)
+        .where(*(getattr(model, k) == v for k, v in keys.items()))
+        .values({column: getattr(model, column) + delta for column, delta in deltas.items()})
+    )
+
+
+def apply_part_added(ticket_id: int, service_date, customer_id: int, amount: float):
+    """Parts worth `amount` (price * quantity) were added to a ticket."""
+    ticket_cache.note_customers(customer_id)
+    db.session.execute(
+        update(ServiceTicket)
+        .where(ServiceTicket.id == ticket_id)
+        .values(parts_total=ServiceTicket.parts_total + amount)
+    )
+    _bump(DailyRevenue, {"day": service_date}, parts_total=amount)
+    _bump(CustomerRevenue, {"customer_id": customer_id}, parts_total=amount)
+    # assignment already created a (mechanic, day) row for each mechanic on the ticket
+    db.session.execute(
+        update(MechanicDaily)
+        .where(
+            MechanicDaily.day == service_date,
+            MechanicDaily.mechanic_id.in_(
+                select(service_mechanics.c.mechanic_id).where(service_mechanics.c.service_ticket_id == ticket_id)
+            ),
+        )
+        .values(parts_total=MechanicDaily.parts_total + amount)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply_price_change(inventory_id: int, delta: float):
+    """
+    Every ticket using `inventory_id` changes by `delta` per unit used
+    (new price - old price, or -price when the part is removed).
+    Touches only the affected tickets, not the whole association table.
+    """
+    if not delta:
+        return
+
+    ticket_ids = select(service_inventory.c.service_ticket_id).where(
+        service_inventory.c.inventory_id == inventory_id
+    )
+
+    used = (
+        select(ServiceTicket.id, ServiceTicket.service_date, ServiceTicket.customer_id, service_inventory.c.quantity)
+        .join(service_inventory, service_inventory.c.service_ticket_id == ServiceTicket.id)
+        .where(service_inventory.c.inventory_id == inventory_id)
+        .subquery()
+    )
+    by_day = db.session.execute(
+        select(used.c.service_date, func.sum(used.c.quantity)).group_by(used.c.service_date)
+    ).all()
+    by_customer = db.session.execute(
+        select(used.c.customer_id, func.sum(used.c.quantity)).group_by(used.c.customer_id)
+    ).all()
+    by_mechanic_day = db.session.execute(
+        select(service_mechanics.c.mechanic_id, used.c.service_date, func.sum(used.c.quantity))
+        .join(service_mechanics, service_mechanics.c.service_ticket_id == used.c.id)
+        .group_by(service_mechanics.c.mechanic_id, used.c.service_date)
+    ).all()
+
+    quantity = (
+        select(service_inventory.c.quantity)
+        .where(
+            service_inventory.c.service_ticket_id == ServiceTicket.id,
+            service_inventory.c.inventory_id == inventory_id,
+        )
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(ServiceTicket)
+        .where(ServiceTicket.id.in_(ticket_ids))
+        .values(parts_total=ServiceTicket.parts_total + delta * quantity)
+        .execution_options(synchronize_session=False)
+    )
+    for day, units in by_day:
+        _bump(DailyRevenue, {"day": day}, parts_total=delta * units)
+    for customer_id, units in by_customer:
+        _bump(CustomerRevenue, {"customer_id": customer_id}, parts_total=delta * units)
+    for mechanic_id, day, units in by_mechanic_day:
+        _bump(MechanicDaily, {"mechanic_id": mechanic_id, "day": day}, parts_total=delta * units)
+
+
+def apply_assignments(links, sign: int = 1):
+    """
+    (mechanic_id, ticket_id) links were just created (sign=1) or removed
+    (sign=-1). The tickets are read once and the deltas summed per mechanic
+    and per (mechanic, day), whatever the number of links.
+    """
+    links = list(links)
+    if not links:
+        return
+    ticket_ids = {ticket_id for _, ticket_id in links}
+    ticket_cache.note_tickets(ticket_ids)
+    tickets = {
+        row.id: row
+        for row in db.session.execute(
+            select(ServiceTicket.id, ServiceTicket.service_date, ServiceTicket.parts_total, ServiceTicket.pickup_date)
+            .where(ServiceTicket.id.in_(ticket_ids))
+        )
+    }
+
+    counts = defaultdict(lambda: [0, 0])  # mechanic_id -> [tickets, open tickets]
+    daily = defaultdict(lambda: [0, 0.0])  # (mechanic_id, day) -> [tickets, parts_total]
+    for mechanic_id, ticket_id in links:
+        ticket = tickets[ticket_id]
+        counts[mechanic_id][0] += 1
+        counts[mechanic_id][1] += ticket.pickup_date is None
+        daily[mechanic_id, ticket.service_date][0] += 1
+        daily[mechanic_id, ticket.service_date][1] += ticket.parts_total or 0
+
+    # sorted, so concurrent writers take the counter row locks in the same order
+    for mechanic_id, (assigned, open_tickets) in sorted(counts.items()):
+        _bump(
+            MechanicTicketCount,
+            {"mechanic_id": mechanic_id},
+            ticket_count=sign * assigned,
+            open_tickets=sign * open_tickets,
+        )
+        if open_tickets:
+            workload.note_change(mechanic_id, sign * open_tickets)
+    for (mechanic_id, day), (assigned, parts_total) in sorted(daily.items()):
+        _bump(
+            MechanicDaily,
+            {"mechanic_id": mechanic_id, "day": day},
+            tickets=sign * assigned,
+            parts_total=sign * parts_total,
+        )
+
+
+def apply_ticket_closed(ticket_id: int, sign: int = 1):
+    """A ticket was picked up (sign=1) or reopened (sign=-1): its mechanics' open counts move."""
+    mechanic_ids = db.session.scalars(
+        select(service_mechanics.c.mechanic_id).where(service_mechanics.c.service_ticket_id == ticket_id)
+    ).all()
+    if not mechanic_ids:
+        return
+    db.session.execute(
+        update(MechanicTicketCount)
+        .where(MechanicTicketCount.mechanic_id.in_(mechanic_ids))
+        .values(open_tickets=MechanicTicketCount.open_tickets - sign)
+        .execution_options(synchronize_session=False)
+    )
+    for mechanic_id in mechanic_ids:
+        workload.note_change(mechanic_id, -sign)
+
+
+def add_mechanic_rollups(mechanic_id: int):
+    """Every mechanic has a counter row, so leaderboards and dispatch never need an outer join."""
+    db.session.execute(
+        insert_ignore(MechanicTicketCount.__table__).values(mechanic_id=mechanic_id, ticket_count=0, open_tickets=0)
+    )
+    workload.note_change(mechanic_id, 0)
+
+
+def delete_mechanic_rollups(mechanic_id: int):
+    """Call before deleting the mechanic itself: these rows have foreign keys to it."""
+    db.session.execute(delete(MechanicTicketCount).where(MechanicTicketCount.mechanic_id == mechanic_id))
+    db.session.execute(delete(MechanicDaily).where(MechanicDaily.mechanic_id == mechanic_id))
+    workload.note_removed(mechanic_id)
+    ticket_cache.note_all()
+
+
+def rebuild_revenue_rollups():
+    """
+    Recompute every ticket's parts_total and the daily and per-customer
+    revenue from service_inventory (backfill / repair). Mechanic daily
+    rollups copy parts_total, so rebuild those afterwards.
+    """
+    ticket_total = (
+        select(func.coalesce(func.sum(Inventory.price * service_inventory.c.quantity), 0))
+        .select_from(service_inventory)
+        .join(Inventory, Inventory.id == service_inventory.c.inventory_id)
+        .where(service_inventory.c.service_ticket_id == ServiceTicket.id)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(ServiceTicket).values(parts_total=ticket_total).execution_options(synchronize_session=False)
+    )
+    with_parts = ServiceTicket.parts_total != 0
+    db.session.execute(delete(DailyRevenue))
+    db.session.execute(
+        insert(DailyRevenue).from_select(
+            ["day", "parts_total"],
+            select(ServiceTicket.service_date, func.sum(ServiceTicket.parts_total))
+            .where(with_parts)
+            .group_by(ServiceTicket.service_date),
+        )
+    )
+    db.session.execute(delete(CustomerRevenue))
+    db.session.execute(
+        insert(CustomerRevenue).from_select(
+            ["customer_id", "parts_total"],
+            select(ServiceTicket.customer_id, func.sum(ServiceTicket.parts_total))
+            .where(with_parts)
+            .group_by(ServiceTicket.customer_id),
+        )
+    )
+
+
+def rebuild_mechanic_rollups():
+    """Rebuild every mechanic counter and daily rollup from service_mechanics (backfill / repair)."""
+    counts = (
+        select(
+            Mechanic.id,
+            func.count(ServiceTicket.id),
+            func.count(case((ServiceTicket.pickup_date.is_(None), ServiceTicket.id))),
+        )
+        .outerjoin(service_mechanics, service_mechanics.c.mechanic_id == Mechanic.id)
+        .outerjoin(ServiceTicket, ServiceTicket.id == service_mechanics.c.service_ticket_id)
+        .group_by(Mechanic.id)
+    )
+    daily = (
+        select(
+            service_mechanics.c.mechanic_id,
+            ServiceTicket.service_date,
+            func.count(),
+            func.sum(ServiceTicket.parts_total),
+        )
+        .join(ServiceTicket, ServiceTicket.id == service_mechanics.c.service_ticket_id)
+        .group_by(service_mechanics.c.mechanic_id, ServiceTicket.service_date)
+    )
+    db.session.execute(delete(MechanicTicketCount))
+    db.session.execute(insert(MechanicTicketCount).from_select(["mechanic_id", "ticket_count", "open_tickets"], counts))
+    db.session.execute(delete(MechanicDaily))
+    db.session.execute(
+        insert(MechanicDaily).from_select(["mechanic_id", "day", "tickets", "parts_total"], daily)
+    )
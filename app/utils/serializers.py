@@ -0,0 +1,99 @@
+"""
+Precompiled dump functions for marshmallow schemas.
+
+`Schema.dump` walks every field object for every row. `compile_dumper`
+reads a schema's dump fields once and generates a plain Python function that
+builds the same dict directly. Field types it does not know how to inline
+(custom formats, as_string numbers, hooks, ...) fall back to the field's own
+`serialize`, so the output is always identical to `schema.dump`.
+"""
+import weakref
+
+from marshmallow import Schema, missing
+from marshmallow import fields as ma_fields
+
+_compiled = weakref.WeakKeyDictionary()
+
+
+def _inline(field, ref):
+    """Expression that formats `ref` the way `field` would, or None if not inlinable."""
+    if isinstance(field, ma_fields.Integer) and not field.as_string:
+        return f"int({ref})"
+    if isinstance(field, ma_fields.Float) and not field.as_string:
+        return f"float({ref})"
+    if isinstance(field, ma_fields.String) and type(field) in (ma_fields.String, ma_fields.Str):
+        return f"({ref} if {ref}.__class__ is str else _text({ref}))"
+    if type(field) is ma_fields.Date and field.format in (None, "iso", "iso8601"):
+        return f"{ref}.isoformat()"
+    if type(field) is ma_fields.DateTime and field.format in (None, "iso", "iso8601"):
+        return f"{ref}.isoformat()"
+    return None
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return str(value)
+
+
+def compile_dumper(schema):
+    """Return fn(obj) -> dict equivalent to schema.dump(obj, many=False)."""
+    if schema in _compiled:
+        return _compiled[schema]
+
+    dump_hooks = schema._hooks.get("pre_dump") or schema._hooks.get("post_dump")
+    if dump_hooks or type(schema).get_attribute is not Schema.get_attribute:
+        fn = lambda obj: schema.dump(obj, many=False)  # noqa: E731
+        _compiled[schema] = fn
+        return fn
+
+    env = {"_text": _text, "_missing": missing}
+    body = []
+    items = []
+    has_fallback = False
+    for i, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        attr = field.attribute or name
+        ref = f"v{i}"
+
+        simple_attr = attr.isidentifier()
+
+        if isinstance(field, ma_fields.Nested) and simple_attr:
+            env[f"d{i}"] = compile_dumper(field.schema)
+            body.append(f"    {ref} = obj.{attr}")
+            if field.many or field.schema.many:
+                items.append(f"{key!r}: None if {ref} is None else [d{i}(x) for x in {ref}]")
+            else:
+                items.append(f"{key!r}: None if {ref} is None else d{i}({ref})")
+            continue
+
+        expr = _inline(field, ref) if simple_attr else None
+        if expr is None:
+            env[f"f{i}"] = field
+            env[f"g{i}"] = schema.get_attribute
+            body.append(f"    {ref} = f{i}.serialize({name!r}, obj, accessor=g{i})")
+            items.append(f"{key!r}: {ref}")
+            has_fallback = True
+            continue
+
+        body.append(f"    {ref} = obj.{attr}")
+        items.append(f"{key!r}: None if {ref} is None else {expr}")
+
+    result = "{" + ", ".join(items) + "}"
+    if has_fallback:
+        # Field.serialize may return `missing`; Schema.dump leaves those keys out
+        result = f"{{k: v for k, v in {result}.items() if v is not _missing}}"
+    source = "def dump(obj):\n" + "\n".join(body) + f"\n    return {result}\n"
+    exec(compile(source, f"<dumper {type(schema).__name__}>", "exec"), env)
+    fn = env["dump"]
+    _compiled[schema] = fn
+    return fn
+
+
+def fast_dump(schema, obj, many=None):
+    """Drop-in for schema.dump() using the compiled function."""
+    many = schema.many if many is None else many
+    dumper = compile_dumper(schema)
+    if many:
+        return [dumper(o) for o in obj]
+    return dumper(obj)
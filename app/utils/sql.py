@@ -0,0 +1,70 @@
+import sys
+
+from sqlalchemy import and_, delete, insert, select, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.extensions import db
+
+
+def insert_ignore(table):
+    """
+    INSERT that silently skips rows whose primary/unique key already exists.
+
+    Used for association tables so concurrent writers never race into a
+    duplicate-key error.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect in ("mysql", "mariadb"):
+        return mysql.insert(table).prefix_with("IGNORE")
+    return insert(table)
+
+
+def starts_with(column, prefix: str):
+    """
+    `column` begins with `prefix`, as a range (prefix <= column < next prefix)
+    so a plain index on the column can serve it, unlike LIKE 'prefix%' on SQLite.
+    """
+    # trailing U+10FFFF cannot be incremented; bump the character before it instead
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return column >= prefix
+    upper = stem[:-1] + chr(ord(stem[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+
+def insert_ignore_returning(table, rows, *columns) -> list:
+    """
+    insert_ignore `rows` in one statement and return `columns` (as tuples)
+    of the rows that were actually inserted, not the ones skipped as
+    duplicates.
+
+    Uses RETURNING where the dialect has it (SQLite, PostgreSQL, MariaDB).
+    Elsewhere (MySQL) the rows already present are read and locked by primary
+    key first, and the rest are inserted with one multi-row INSERT IGNORE.
+    """
+    if not rows:
+        return []
+    if db.session.get_bind().dialect.insert_returning:
+        return [tuple(row) for row in db.session.execute(insert_ignore(table).values(rows).returning(*columns))]
+
+    key = list(table.primary_key.columns)
+    wanted = {tuple(row[c.key] for c in key): row for row in rows}
+    existing = set(map(tuple, db.session.execute(
+        select(*key).where(tuple_(*key).in_(list(wanted))).with_for_update()
+    )))
+    new_rows = [row for k, row in wanted.items() if k not in existing]
+    if new_rows:
+        db.session.execute(insert_ignore(table).values(new_rows))
+    return [tuple(row[c.key] for c in columns) for row in new_rows]
+
+
+def delete_returning(table, column, *where) -> list:
+    """DELETE matching rows and return `column` of the rows this statement removed."""
+    if db.session.get_bind().dialect.delete_returning:
+        return list(db.session.scalars(delete(table).where(*where).returning(column)))
+    candidates = db.session.scalars(select(column).where(*where).with_for_update()).all()
+    return [value for value in candidates if db.session.execute(delete(table).where(*where, column == value)).rowcount]
@@ -0,0 +1,49 @@
+"""
+Write-through cache for the customer portal (GET /customers/my-tickets).
+
+Cached pages are keyed by a per-customer cache tag (app.utils.cache_tags).
+Writes that change a customer's tickets call note_customers/note_tickets in
+their transaction; once the session commits, only those customers' tags are
+invalidated, so all of their cached pages are orphaned at once and nobody
+else's are touched. A repeat view costs two cache reads and no database
+work.
+
+Mechanic and part details are shown inside every ticket, so edits to those
+(rare, back-office writes) go through note_all, which invalidates a tag
+shared by every page.
+"""
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import ServiceTicket
+from app.utils.cache_tags import note_tags, tagged_key
+
+CACHE_TIMEOUT = 10 * 60
+_SHARED_TAG = "customer-tickets:*"
+
+
+def _tag(customer_id):
+    return f"customer-tickets:{customer_id}"
+
+
+def page_key(customer_id, full_path) -> str:
+    """Cache key (also used as the ETag) for one page of a customer's tickets."""
+    return tagged_key("my-tickets", (_tag(customer_id), _SHARED_TAG), customer_id, full_path)
+
+
+def note_customers(*customer_ids):
+    """These customers' tickets change in the current transaction."""
+    note_tags(*map(_tag, customer_ids))
+
+
+def note_tickets(ticket_ids):
+    ticket_ids = list(ticket_ids)
+    if ticket_ids:
+        note_customers(*db.session.scalars(
+            select(ServiceTicket.customer_id.distinct()).where(ServiceTicket.id.in_(ticket_ids))
+        ))
+
+
+def note_all():
+    """Something shown inside every ticket (a mechanic or part) changes in the current transaction."""
+    note_tags(_SHARED_TAG)
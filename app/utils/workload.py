@@ -0,0 +1,124 @@
+"""
+In-memory least-loaded mechanic selection.
+
+The durable workload is mechanic_ticket_counts.open_tickets (open tickets
+are pickup_date IS NULL), maintained by app.utils.rollups. Each app keeps a
+min-heap of (open_tickets, mechanic_id) over it:
+
+- rollups call note_change/note_removed while they write; the changes are
+  applied to the heap after the transaction commits (dropped on rollback),
+  each in O(log n);
+- least_loaded() pops stale entries lazily and re-checks the winner against
+  the database, reloading the heap when another process changed it. A full
+  reload also happens every WORKLOAD_RESYNC_SECONDS.
+"""
+import heapq
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+
+from app.extensions import db
+from app.models import MechanicTicketCount
+
+_PENDING = "workload_changes"
+
+
+class WorkloadHeap:
+    def __init__(self):
+        self.load_of = {}  # mechanic_id -> open tickets
+        self._heap = []  # (open tickets, mechanic_id), may hold stale entries
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def load(self, rows):
+        self.load_of = dict(rows)
+        self._heap = [(load, mechanic_id) for mechanic_id, load in self.load_of.items()]
+        heapq.heapify(self._heap)
+        self.loaded_at = time.monotonic()
+
+    def set(self, mechanic_id, load):
+        self.load_of[mechanic_id] = load
+        heapq.heappush(self._heap, (load, mechanic_id))
+        if len(self._heap) > 2 * len(self.load_of) + 64:
+            self.load(self.load_of.items())  # drop the stale entries
+
+    def change(self, mechanic_id, delta):
+        self.set(mechanic_id, self.load_of.get(mechanic_id, 0) + delta)
+
+    def remove(self, mechanic_id):
+        self.load_of.pop(mechanic_id, None)
+
+    def peek(self):
+        """(open tickets, mechanic_id) of the least-loaded mechanic (lowest id on ties), or None."""
+        while self._heap:
+            load, mechanic_id = self._heap[0]
+            if self.load_of.get(mechanic_id) == load:
+                return load, mechanic_id
+            heapq.heappop(self._heap)
+        return None
+
+
+def _heap() -> WorkloadHeap:
+    heap = current_app.extensions.get("mechanic_workload")
+    if heap is None:
+        heap = current_app.extensions["mechanic_workload"] = WorkloadHeap()
+    return heap
+
+
+def _reload(heap):
+    heap.load(db.session.execute(select(MechanicTicketCount.mechanic_id, MechanicTicketCount.open_tickets)).all())
+
+
+def least_loaded():
+    """(mechanic_id, open tickets) of the mechanic with the fewest open tickets, or None if there are none."""
+    heap = _heap()
+    resync = current_app.config.get("WORKLOAD_RESYNC_SECONDS", 30)
+    with heap.lock:
+        if heap.loaded_at is None or time.monotonic() - heap.loaded_at > resync:
+            _reload(heap)
+        best = heap.peek()
+        if best is not None:
+            load, mechanic_id = best
+            actual = db.session.scalar(
+                select(MechanicTicketCount.open_tickets).where(MechanicTicketCount.mechanic_id == mechanic_id)
+            )
+            if actual != load:
+                # changed by another process since the heap was loaded
+                _reload(heap)
+                best = heap.peek()
+    if best is None:
+        return None
+    load, mechanic_id = best
+    return mechanic_id, load
+
+
+def note_change(mechanic_id, delta):
+    """Called while writing open_tickets; applied to the heap once the session commits."""
+    db.session.info.setdefault(_PENDING, []).append((mechanic_id, delta))
+
+
+def note_removed(mechanic_id):
+    db.session.info.setdefault(_PENDING, []).append((mechanic_id, None))
+
+
+@event.listens_for(db.session, "after_commit")
+def _apply_pending(session):
+    changes = session.info.pop(_PENDING, None)
+    if not changes or not has_app_context():
+        return
+    heap = current_app.extensions.get("mechanic_workload")
+    if heap is None or heap.loaded_at is None:
+        return  # loaded from the database on first use
+    with heap.lock:
+        for mechanic_id, delta in changes:
+            if delta is None:
+                heap.remove(mechanic_id)
+            else:
+                heap.change(mechanic_id, delta)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING, None)
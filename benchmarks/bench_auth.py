@@ -0,0 +1,60 @@
+"""
+Per-request cost of @token_required: full JWT verification vs. the
+verified-token cache.
+
+    python -m benchmarks.bench_auth [iterations]
+"""
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_auth.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from app import create_app
+from app.utils.auth import encode_token, get_token_cache, token_required
+from benchmarks.bench_serializers import timed
+
+
+@token_required
+def protected(customer_id):
+    return customer_id
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    app = create_app()
+
+    with app.app_context():
+        token = encode_token(42)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with app.test_request_context("/", headers=headers):
+        token_cache = get_token_cache()
+
+        def uncached():
+            for _ in range(iterations):
+                token_cache.clear()
+                protected()
+
+        def cached():
+            for _ in range(iterations):
+                protected()
+
+        def baseline():
+            # the cache clear alone, to subtract from the uncached run
+            for _ in range(iterations):
+                token_cache.clear()
+
+        base, _ = timed(baseline)
+        full, _ = timed(uncached)
+        full -= base
+        hit, _ = timed(cached)
+
+    print(f"{iterations} authenticated calls")
+    print(f"  jwt.decode every call  {full / iterations * 1e6:>8.2f} us/call")
+    print(f"  verified-token cache   {hit / iterations * 1e6:>8.2f} us/call   ({full / hit:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Latency of part-name autocomplete lookups on a 100k-part index, on the bare
+index and through the app's CatalogIndex (catalog version checks included).
+
+    python -m benchmarks.bench_autocomplete [parts]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.blueprints.inventory.autocomplete import PartNameIndex, get_index
+from app.extensions import db
+from app.models import Inventory
+from benchmarks.bench_serializers import timed
+
+WORDS = [
+    "brake", "pad", "rotor", "oil", "filter", "spark", "plug", "belt", "hose", "front", "rear",
+    "caliper", "sensor", "gasket", "pump", "water", "fuel", "air", "wiper", "blade", "strut", "mount",
+]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    rows = [(i, " ".join(rng.choice(WORDS).title() for _ in range(3)) + f" {i}") for i in range(n)]
+
+    index = PartNameIndex()
+    seconds, _ = timed(lambda: index.load(rows), repeat=1)
+    print(f"{n} parts, index built in {seconds:.2f}s")
+
+    lookups = 10_000
+    for label, query, fuzzy in [
+        ("prefix 'bra'", "bra", False),
+        ("prefix 'brake pad'", "brake pad", False),
+        ("prefix, no match", "zzz", False),
+        ("fuzzy 'calipr sensr'", "calipr sensr", True),
+    ]:
+        count = lookups if not fuzzy else 20
+        seconds, _ = timed(lambda: [index.suggest(query, 10, fuzzy) for _ in range(count)])
+        print(f"  {label:<24} {seconds / count * 1e6:>10.1f} us/lookup")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.add(n + i, f"New Part {i}")
+    print(f"  {'incremental add':<24} {(time.perf_counter() - start) / 1000 * 1e6:>10.1f} us/part")
+
+    app = create_app()
+    with app.app_context():
+        db.session.execute(insert(Inventory), [{"name": name, "price": 1.0} for _, name in rows])
+        db.session.commit()
+        catalog_index = get_index()
+        catalog_index.suggest("bra")  # first use loads the index
+        seconds, _ = timed(lambda: [catalog_index.suggest("bra", 10) for _ in range(lookups)])
+        print(f"  {'CatalogIndex prefix':<24} {seconds / lookups * 1e6:>10.1f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Encode time and payload size for a large service-ticket listing:
+Flask's default JSON provider vs the orjson provider, and identity vs
+gzip vs brotli on the wire.
+
+    python -m benchmarks.bench_json [rows]
+"""
+import gzip
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.blueprints.service_tickets.schemas import service_tickets_schema
+from app.utils.fast_json import OrjsonProvider, orjson
+from app.utils.serializers import fast_dump
+from benchmarks.bench_serializers import build_rows, timed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    app = create_app()
+    app.debug = False
+    with app.app_context():
+        tickets, _ = build_rows(n)
+        payload = {"items": fast_dump(service_tickets_schema, tickets)}
+
+        providers = [("flask default", DefaultJSONProvider(app))]
+        if orjson is not None:
+            providers.append(("orjson", OrjsonProvider(app)))
+
+        body = None
+        for label, provider in providers:
+            seconds, response = timed(lambda: provider.response(payload))
+            body = response.get_data()
+            print(f"encode  {label:14} rows={n:<8} {seconds:.3f}s  {len(body) / 1e6:.1f} MB")
+
+        seconds, gz = timed(lambda: gzip.compress(body, compresslevel=6), repeat=1)
+        print(f"wire    gzip-6         {len(gz) / 1e6:.2f} MB  ({len(gz) / len(body):.1%})  {seconds:.3f}s")
+        if brotli is not None:
+            seconds, br = timed(lambda: brotli.compress(body, quality=4), repeat=1)
+            print(f"wire    brotli-4       {len(br) / 1e6:.2f} MB  ({len(br) / len(body):.1%})  {seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Login throughput under concurrency: password hashing inline in the request
+threads vs. in the hashing process pool.
+
+    python -m benchmarks.bench_login [threads] [logins]
+
+While logins run, a second set of threads keeps requesting GET / so the
+report also shows how much the hashing starves unrelated requests.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_login.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from app import create_app
+from app.extensions import db, limiter
+from app.models import Customer
+
+
+def run(app, threads, logins, workers):
+    app.config["PASSWORD_HASH_WORKERS"] = workers
+    app.config["PASSWORD_HASH_MAX_PENDING"] = max(threads, 1)
+    app.config["PASSWORD_HASH_QUEUE_TIMEOUT"] = 60
+
+    def login(i):
+        client = app.test_client()
+        res = client.post("/customers/login", json={"email": f"bench{i % 50}@email.com", "password": "password123"})
+        return res.status_code
+
+    done = threading.Event()
+    pings = []
+
+    def ping():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get("/")
+            pings.append(time.perf_counter() - start)
+
+    background = [threading.Thread(target=ping) for _ in range(2)]
+    login(0)  # start the pool before timing
+    for t in background:
+        t.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        statuses = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    for t in background:
+        t.join()
+
+    pings.sort()
+    p99 = pings[int(len(pings) * 0.99)] if pings else 0
+    label = "inline" if workers == 0 else f"pool({workers})"
+    print(
+        f"  {label:<10} {logins / elapsed:>8.1f} logins/s   "
+        f"GET / p99 {p99 * 1000:>7.1f} ms   ok {statuses.count(200)}/{logins}"
+    )
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    logins = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    app = create_app()
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"]
+    limiter.enabled = False
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for i in range(50):
+            customer = Customer(name="Bench", email=f"bench{i}@email.com", phone_number="555", password="x")
+            customer.set_password("password123")
+            db.session.add(customer)
+        db.session.commit()
+
+    print(f"{logins} logins, {threads} threads, {app.config['PASSWORD_HASH_METHOD']}")
+    run(app, threads, logins, workers=0)
+    run(app, threads, logins, workers=os.cpu_count() or 1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
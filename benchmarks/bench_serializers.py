@@ -0,0 +1,78 @@
+"""
+Compare marshmallow Schema.dump with the precompiled dumpers in
+app.utils.serializers on 100k service tickets.
+
+    python -m benchmarks.bench_serializers [rows]
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from app import create_app
+from app.models import Customer, Inventory, Mechanic, ServiceTicket
+from app.blueprints.customers.schemas import customers_schema
+from app.blueprints.service_tickets.schemas import service_tickets_schema
+from app.utils.serializers import fast_dump
+
+
+def build_rows(n):
+    mechanics = [
+        Mechanic(id=i, name=f"Mech {i}", email=f"m{i}@email.com", phone_number="555", salary=50000.0 + i)
+        for i in range(20)
+    ]
+    parts = [Inventory(id=i, name=f"Part {i}", price=9.99 + i) for i in range(50)]
+    tickets = []
+    for i in range(n):
+        t = ServiceTicket(
+            id=i,
+            vin=f"VIN{i:014d}",
+            service_date=date(2025, 1, 1) + timedelta(days=i % 365),
+            description="Oil change and brake inspection",
+            customer_id=i % 1000,
+            pickup_date=None if i % 3 else date(2026, 1, 1),
+            parts_total=19.98,
+        )
+        t.mechanics = [mechanics[i % 20], mechanics[(i + 7) % 20]]
+        t.inventory = [parts[i % 50]]
+        tickets.append(t)
+    customers = [
+        Customer(id=i, name=f"Customer {i}", email=f"c{i}@email.com", phone_number="555", password="x")
+        for i in range(n)
+    ]
+    return tickets, customers
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    app = create_app()
+    with app.app_context():
+        tickets, customers = build_rows(n)
+
+        for label, schema, rows in (
+            ("service tickets", service_tickets_schema, tickets),
+            ("customers", customers_schema, customers),
+        ):
+            slow, expected = timed(lambda: schema.dump(rows))
+            fast, actual = timed(lambda: fast_dump(schema, rows))
+            assert actual == expected, f"{label}: output differs"
+            print(
+                f"{label:16} rows={n:<8} marshmallow={slow:.3f}s  compiled={fast:.3f}s  "
+                f"speedup={slow / fast:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
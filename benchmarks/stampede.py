@@ -0,0 +1,119 @@
+"""
+Cache stampede on GET /customers/: many requests arriving together when the
+cached page is missing or has just expired, with plain caching
+(CACHE_COALESCE = False) and with single flight + stale-while-revalidate.
+
+    python -m benchmarks.stampede [threads] [customers]
+
+Counts how many requests ran the page query against the database. Expiry is
+simulated by moving the clock of app.utils.coalescing past the entry's
+freshness, so the stored (stale) entry is still in the backend.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///stampede.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from app.extensions import cache, db, limiter
+from app.models import Customer
+from app.utils import coalescing
+
+URL = "/customers/?page=1&per_page=500"
+
+
+class _Clock:
+    """Stands in for the time module inside app.utils.coalescing."""
+
+    offset = 0.0
+
+    def time(self):
+        return time.time() + self.offset
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+def run(app, threads, coalesce, expired):
+    app.config["CACHE_COALESCE"] = coalesce
+    client = app.test_client()
+    clock = coalescing.time
+    clock.offset = 0.0
+    with app.app_context():
+        cache.clear()
+    if expired:
+        client.get(URL)  # warm the entry, then let it age past its 120 s timeout
+        clock.offset = 121.0
+
+    page_queries = []  # True when run by a request thread, False for a background refresh
+    lock = threading.Lock()
+
+    def record(conn, cursor, statement, *args):
+        if "FROM customers" in statement and "LIMIT" in statement:
+            with lock:
+                page_queries.append(threading.current_thread().name.startswith("request"))
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    barrier = threading.Barrier(threads)
+
+    def hit(_):
+        c = app.test_client()
+        barrier.wait()
+        start = time.perf_counter()
+        status = c.get(URL).status_code
+        return status, time.perf_counter() - start
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="request") as pool:
+            results = list(pool.map(hit, range(threads)))
+        cache.wait_for_refreshes(30)
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+
+    in_requests = sum(page_queries)
+    latencies = sorted(elapsed for _, elapsed in results)
+    label = f"{'expired' if expired else 'cold'} / {'coalesced' if coalesce else 'plain'}"
+    print(
+        f"  {label:<20} page queries in requests {in_requests:>3}, in background {len(page_queries) - in_requests}"
+        f"   p50 {latencies[len(latencies) // 2] * 1000:>7.1f} ms   max {latencies[-1] * 1000:>7.1f} ms"
+        f"   ok {sum(status == 200 for status, _ in results)}/{threads}"
+    )
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    customers = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    app = create_app()
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"]
+    limiter.enabled = False
+    coalescing.time = _Clock()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(Customer), [
+            {"name": f"Customer {i}", "email": f"c{i}@email.com", "phone_number": "555", "password": "x"}
+            for i in range(customers)
+        ])
+        db.session.commit()
+
+    print(f"{threads} concurrent GET {URL}, {customers} customers")
+    for expired in (False, True):
+        for coalesce in (False, True):
+            run(app, threads, coalesce, expired)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
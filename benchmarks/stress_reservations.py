@@ -0,0 +1,77 @@
+"""
+Hammer POST /service-tickets/<id>/reserve-part/<part> from many threads and
+check that stock never goes negative.
+
+    python -m benchmarks.stress_reservations [threads] [attempts] [stock]
+
+Uses a file-backed SQLite database (stress_reservations.db) so the threads
+really contend on the part row; point DATABASE_URL at MySQL to test there.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///stress_reservations.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+from sqlalchemy import func, select
+
+from app import create_app
+from app.extensions import db, limiter
+from app.models import Customer, Inventory, ServiceTicket, service_inventory
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    attempts = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    stock = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    app = create_app()
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"]
+    limiter.enabled = False
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        customer = Customer(name="Stress", email="stress@email.com", phone_number="555", password="x")
+        part = Inventory(name="Brake Pad", price=25.0, quantity_on_hand=stock)
+        db.session.add_all([customer, part])
+        db.session.flush()
+        tickets = [
+            ServiceTicket(vin=f"STRESS{i:011d}", service_date=date(2026, 1, 1), description="stress",
+                          customer_id=customer.id)
+            for i in range(32)
+        ]
+        db.session.add_all(tickets)
+        db.session.commit()
+        ticket_ids = [t.id for t in tickets]
+        part_id = part.id
+
+    def attempt(i):
+        client = app.test_client()
+        url = f"/service-tickets/{ticket_ids[i % len(ticket_ids)]}/reserve-part/{part_id}"
+        return client.post(url, json={"quantity": 1}).status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        statuses = list(pool.map(attempt, range(attempts)))
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        left = db.session.scalar(select(Inventory.quantity_on_hand).where(Inventory.id == part_id))
+        used = db.session.scalar(
+            select(func.sum(service_inventory.c.quantity)).where(service_inventory.c.inventory_id == part_id)
+        ) or 0
+
+    print(f"{attempts} attempts, {threads} threads, stock {stock}")
+    print(f"  {attempts / elapsed:>10.0f} req/s")
+    print(f"  reserved {statuses.count(200)}, rejected {statuses.count(409)}, other {len(statuses) - statuses.count(200) - statuses.count(409)}")
+    print(f"  left on hand {left}, used on tickets {used}")
+    ok = left == stock - statuses.count(200) and used == statuses.count(200) and left >= 0
+    print("  invariant holds" if ok else "  INVARIANT BROKEN")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
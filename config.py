@@ -9,7 +9,29 @@ class DevelopmentConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv("SECRET_KEY")
     DEBUG = True
-    CACHE_TYPE = "SimpleCache"
+    # shared by every worker process on the host, so a write in one worker
+    # invalidates the pages cached by the others; a Redis cache also works
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "app.utils.cache_backends.SQLiteCache")
+    CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH")  # SQLiteCache file, default: <instance folder>/cache.sqlite3
+    CACHE_COALESCE = True  # single-flight misses and stale-while-revalidate in cache.cached
+    CACHE_STALE_TTL = 60
+    CACHE_FLIGHT_TIMEOUT = 10
+    EXPORT_BATCH_SIZE = 1000
+    IMPORT_BATCH_SIZE = 1000
+    WORKLOAD_RESYNC_SECONDS = 30
+    AUTOCOMPLETE_RECHECK_SECONDS = 1.0  # how often autocomplete looks for catalog writes from other processes
+    PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+    PASSWORD_HASH_WORKERS = None  # process pool size; None = one per CPU, 0 = hash inline
+    PASSWORD_HASH_MAX_PENDING = 64
+    PASSWORD_HASH_QUEUE_TIMEOUT = 5
+    ACCESS_TOKEN_MINUTES = 60
+    REFRESH_TOKEN_DAYS = 14
+    TOKEN_CACHE_SIZE = 10000  # verified access tokens kept in memory
+    TOKEN_CACHE_TTL = 300
+    COUNT_MAX_STALENESS = 0  # seconds a listing total may lag behind writes (0 = exact, recounted after writes)
+    FAST_JSON = True  # uses orjson when installed
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 500
 
 
 class TestingConfig:
@@ -18,4 +40,23 @@ class TestingConfig:
     SECRET_KEY = "test-secret-key"
     DEBUG = True
     TESTING = True
-    CACHE_TYPE = "SimpleCache"
+    CACHE_TYPE = "app.utils.cache_backends.CountingSimpleCache"  # in-process: tests leave no cache file behind
+    CACHE_COALESCE = True
+    CACHE_STALE_TTL = 60
+    CACHE_FLIGHT_TIMEOUT = 10
+    EXPORT_BATCH_SIZE = 1000
+    IMPORT_BATCH_SIZE = 1000
+    WORKLOAD_RESYNC_SECONDS = 30
+    AUTOCOMPLETE_RECHECK_SECONDS = 1.0  # how often autocomplete looks for catalog writes from other processes
+    PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+    PASSWORD_HASH_WORKERS = None  # process pool size; None = one per CPU, 0 = hash inline
+    PASSWORD_HASH_MAX_PENDING = 64
+    PASSWORD_HASH_QUEUE_TIMEOUT = 5
+    ACCESS_TOKEN_MINUTES = 60
+    REFRESH_TOKEN_DAYS = 14
+    TOKEN_CACHE_SIZE = 10000  # verified access tokens kept in memory
+    TOKEN_CACHE_TTL = 300
+    COUNT_MAX_STALENESS = 0  # seconds a listing total may lag behind writes (0 = exact, recounted after writes)
+    FAST_JSON = True  # uses orjson when installed
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 500
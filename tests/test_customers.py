@@ -2,8 +2,11 @@ import os
 import sys
 import types
 import unittest
+from unittest.mock import patch
 from uuid import uuid4
 
+from sqlalchemy import event
+
 # --- Test-time stubs/overrides ---
 try:
     import flask_swagger_ui  # type: ignore
@@ -26,7 +29,7 @@ from app.extensions import db
 
 class TestCustomers(unittest.TestCase):
     def setUp(self):
-        self.app = create_app()
+        self.app = create_app("TestingConfig")
         self.app.config.update(
             TESTING=True,
             SQLALCHEMY_DATABASE_URI=os.environ["DATABASE_URL"],
@@ -102,6 +105,136 @@ class TestCustomers(unittest.TestCase):
         )
         self.assertIn(res.status_code, (400, 401))
 
+    def test_login_rehashes_outdated_password_hash(self):
+        from werkzeug.security import generate_password_hash
+        from app.models import Customer
+
+        with self.app.app_context():
+            customer = db.session.get(Customer, self.customer_id)
+            self.assertTrue(customer.password.startswith("scrypt:32768:8:1$"))
+            customer.password = generate_password_hash(self.seed_password, method="pbkdf2:sha256:1000")
+            db.session.commit()
+
+        res = self.client.post(
+            "/customers/login",
+            json={"email": self.seed_email, "password": self.seed_password},
+        )
+        self.assertEqual(res.status_code, 200)
+        with self.app.app_context():
+            upgraded = db.session.get(Customer, self.customer_id).password
+        self.assertTrue(upgraded.startswith("scrypt:32768:8:1$"))
+
+        # a failed login never rewrites the hash
+        self.app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+        res = self.client.post("/customers/login", json={"email": self.seed_email, "password": "wrong"})
+        self.assertEqual(res.status_code, 401)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Customer, self.customer_id).password, upgraded)
+
+        res = self.client.post(
+            "/customers/login",
+            json={"email": self.seed_email, "password": self.seed_password},
+        )
+        self.assertEqual(res.status_code, 200)
+        with self.app.app_context():
+            self.assertTrue(db.session.get(Customer, self.customer_id).password.startswith("pbkdf2:sha256:1000$"))
+
+    def test_login_inline_hashing(self):
+        self.app.config["PASSWORD_HASH_WORKERS"] = 0
+        res = self.client.post(
+            "/customers/login",
+            json={"email": self.seed_email, "password": self.seed_password},
+        )
+        self.assertEqual(res.status_code, 200)
+
+    def test_login_negative_hashing_saturated(self):
+        from app.utils import passwords
+
+        self.app.config.update(PASSWORD_HASH_MAX_PENDING=1, PASSWORD_HASH_QUEUE_TIMEOUT=0)
+        with self.app.app_context():
+            _, slots = passwords._pool()
+        slots.acquire()
+        try:
+            res = self.client.post(
+                "/customers/login",
+                json={"email": self.seed_email, "password": self.seed_password},
+            )
+        finally:
+            slots.release()
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.headers["Retry-After"], "1")
+
+    # POST /customers/refresh
+    def test_refresh_token(self):
+        login = self.client.post(
+            "/customers/login",
+            json={"email": self.seed_email, "password": self.seed_password},
+        )
+        res = self.client.post("/customers/refresh", json={"refresh_token": login.json["refresh_token"]})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("refresh_token", res.json)
+
+        ok = self.client.get("/customers/my-tickets", headers={"Authorization": f"Bearer {res.json['token']}"})
+        self.assertEqual(ok.status_code, 200)
+
+    def test_refresh_token_negative(self):
+        res = self.client.post("/customers/refresh", json={})
+        self.assertEqual(res.status_code, 400)
+
+        # an access token is not a refresh token, and vice versa
+        res = self.client.post("/customers/refresh", json={"refresh_token": self.token})
+        self.assertEqual(res.status_code, 401)
+        login = self.client.post(
+            "/customers/login",
+            json={"email": self.seed_email, "password": self.seed_password},
+        )
+        refresh = login.json["refresh_token"]
+        res = self.client.get("/customers/my-tickets", headers={"Authorization": f"Bearer {refresh}"})
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(res.json["message"], "Invalid token type")
+
+        # deleting the customer revokes their refresh tokens
+        self.client.delete(f"/customers/{self.customer_id}", headers=self.auth_headers)
+        res = self.client.post("/customers/refresh", json={"refresh_token": refresh})
+        self.assertEqual(res.status_code, 401)
+
+    def test_verified_token_cache(self):
+        from app.utils.auth import get_token_cache
+
+        with self.app.app_context():
+            token_cache = get_token_cache()
+        token_cache.clear()
+        self.assertEqual(self.client.get("/customers/my-tickets", headers=self.auth_headers).status_code, 200)
+        self.assertEqual(len(token_cache), 1)
+
+        # served from the cache without decoding again
+        with patch("app.utils.auth.decode_token", side_effect=AssertionError("decoded twice")):
+            res = self.client.get("/customers/my-tickets", headers=self.auth_headers)
+        self.assertEqual(res.status_code, 200)
+
+        # a tampered token is a different key and still gets verified
+        bad = {"Authorization": f"Bearer {self.token[:-2]}xx"}
+        self.assertEqual(self.client.get("/customers/my-tickets", headers=bad).status_code, 401)
+        self.assertEqual(len(token_cache), 1)
+
+    def test_token_cache_expiry_and_bound(self):
+        from app.utils.auth import TokenCache
+
+        token_cache = TokenCache(maxsize=2, ttl=60)
+        token_cache.put(b"a", 1, exp=1010, now=1000)
+        token_cache.put(b"b", 2, exp=5000, now=1000)
+        self.assertEqual(token_cache.get(b"a", now=1009), 1)
+        self.assertIsNone(token_cache.get(b"a", now=1010))  # honors exp
+        self.assertIsNone(token_cache.get(b"b", now=1060))  # and the ttl
+
+        token_cache.put(b"a", 1, exp=5000, now=2000)
+        token_cache.put(b"b", 2, exp=5000, now=2000)
+        token_cache.get(b"a", now=2001)
+        token_cache.put(b"c", 3, exp=5000, now=2001)
+        self.assertEqual(len(token_cache), 2)
+        self.assertIsNone(token_cache.get(b"b", now=2002))  # least recently used
+        self.assertEqual(token_cache.get(b"a", now=2002), 1)
+
     def test_login_customer_negative_validation(self):
         with self.assertRaises(AttributeError):
             self.client.post("/customers/login", json={"email": self.seed_email})
@@ -118,6 +251,136 @@ class TestCustomers(unittest.TestCase):
         self.assertEqual(res.status_code, 200)
         self.assertEqual(res.json["id"], self.customer_id)
 
+    def test_get_customer_etag(self):
+        res = self.client.get(f"/customers/{self.customer_id}")
+        etag = res.headers["ETag"]
+
+        cached = self.client.get(f"/customers/{self.customer_id}", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b"")
+
+        self.client.put(
+            f"/customers/{self.customer_id}",
+            json={"name": "Changed"},
+            headers=self.auth_headers,
+        )
+        res = self.client.get(f"/customers/{self.customer_id}", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json["name"], "Changed")
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+    def test_get_customers_cache_follows_writes(self):
+        first = self.client.get("/customers/?page=1&per_page=10")
+        self.client.post(
+            "/customers/",
+            json={
+                "name": "Another",
+                "email": f"another_{uuid4().hex[:8]}@email.com",
+                "phone_number": "555-000-1111",
+                "password": "password123",
+            },
+        )
+        second = self.client.get(
+            "/customers/?page=1&per_page=10", headers={"If-None-Match": first.headers["ETag"]}
+        )
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json["total"], first.json["total"] + 1)
+
+    def test_get_customers_cache_shared_between_workers(self):
+        import tempfile
+        from app.extensions import cache
+
+        # two apps stand in for two worker processes on a host, as DevelopmentConfig runs them
+        path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+        clients = []
+        for app in (self.app, create_app("TestingConfig")):
+            app.config.update(CACHE_TYPE="app.utils.cache_backends.SQLiteCache", CACHE_SQLITE_PATH=path)
+            cache.init_app(app)
+            clients.append(app.test_client())
+        reader, writer = clients
+
+        first = reader.get("/customers/?page=1&per_page=10")
+        writer.post(
+            "/customers/",
+            json={
+                "name": "Other Worker",
+                "email": f"worker_{uuid4().hex[:8]}@email.com",
+                "phone_number": "555-000-2222",
+                "password": "password123",
+            },
+        )
+        second = reader.get("/customers/?page=1&per_page=10")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json["total"], first.json["total"] + 1)
+
+    def test_get_customers_cached_body_matches_etag(self):
+        from sqlalchemy import update
+        from app.models import Customer, TableVersion
+
+        first = self.client.get("/customers/?page=1&per_page=10")
+
+        # a write this app's cache never heard about (e.g. its tag invalidation was
+        # lost): only the table version moves, as it does for every commit
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(update(Customer).where(Customer.id == self.customer_id).values(name="Elsewhere"))
+                conn.execute(
+                    update(TableVersion)
+                    .where(TableVersion.name == "customers")
+                    .values(version=TableVersion.version + 1)
+                )
+
+        second = self.client.get("/customers/?page=1&per_page=10")
+        self.assertNotEqual(second.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(second.json["items"][0]["name"], "Elsewhere")
+
+        again = self.client.get("/customers/?page=1&per_page=10", headers={"If-None-Match": second.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_get_customers_total_from_count_cache(self):
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            first = self.client.get("/customers/?page=1&per_page=1")
+            # another page misses the page cache but reuses the count
+            second = self.client.get("/customers/?page=2&per_page=1")
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual((first.json["total"], first.json["pages"]), (1, 1))
+        self.assertEqual(second.json["items"], [])
+        self.assertFalse(second.json["has_next"])
+        self.assertEqual(sum("count(" in s.lower() for s in statements), 1)
+
+        res = self.client.get("/customers/?per_page=0")
+        self.assertEqual(res.status_code, 400)
+
+    def test_count_rows_staleness_bound(self):
+        from app.models import Customer
+        from app.utils.counts import count_rows
+
+        with self.app.test_request_context():
+            self.assertEqual(count_rows(Customer.query, ("customers",)), 1)
+            db.session.add(Customer(name="B", email="b@email.com", phone_number="555", password="x"))
+            db.session.commit()
+            # within the bound, the count may lag behind the write
+            self.assertEqual(count_rows(Customer.query, ("customers",), max_staleness=60), 1)
+            self.assertEqual(count_rows(Customer.query, ("customers",), max_staleness=0), 2)
+            filtered = Customer.query.filter(Customer.name == "B")
+            self.assertEqual(count_rows(filtered, ("customers",)), 1)
+
+    def test_get_customer_sparse_fields(self):
+        res = self.client.get(f"/customers/{self.customer_id}?fields=id,name")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json, {"id": self.customer_id, "name": "Seed Customer"})
+
+    def test_get_customer_negative_unknown_field(self):
+        res = self.client.get(f"/customers/{self.customer_id}?fields=password")
+        self.assertEqual(res.status_code, 400)
+
     def test_get_customer_negative_not_found(self):
         res = self.client.get("/customers/999999")
         self.assertEqual(res.status_code, 404)
@@ -126,6 +389,96 @@ class TestCustomers(unittest.TestCase):
     def test_get_my_tickets(self):
         res = self.client.get("/customers/my-tickets", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json["items"], [])
+        self.assertFalse(res.json["has_next"])
+
+    def _create_ticket(self, customer_id, day):
+        res = self.client.post(
+            "/service-tickets/",
+            json={"vin": "1HGCM82633A004352", "service_date": day, "description": "Oil change",
+                  "customer_id": customer_id},
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.json["id"]
+
+    def _my_tickets(self, query="", headers=None):
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            res = self.client.get(f"/customers/my-tickets{query}", headers={**self.auth_headers, **(headers or {})})
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "before_cursor_execute", record)
+        return res, statements
+
+    def test_get_my_tickets_pages_newest_first(self):
+        ids = [self._create_ticket(self.customer_id, f"2026-01-{day:02d}") for day in range(1, 8)]
+
+        seen, after = [], None
+        while True:
+            res, _ = self._my_tickets("?limit=3&fields=id,service_date" + (f"&after={after}" if after else ""))
+            self.assertEqual(res.status_code, 200)
+            seen += [item["id"] for item in res.json["items"]]
+            after = res.json["next_cursor"]
+            if not res.json["has_next"]:
+                break
+        self.assertEqual(seen, ids[::-1])
+
+        res, _ = self._my_tickets("?limit=0")
+        self.assertEqual(res.status_code, 400)
+
+    def test_get_my_tickets_cache_and_invalidation(self):
+        from app.extensions import limiter
+
+        limiter.enabled = False
+        self.addCleanup(setattr, limiter, "enabled", True)
+        ticket_id = self._create_ticket(self.customer_id, "2026-01-01")
+        other = self.client.post(
+            "/customers/",
+            json={"name": "Other", "email": f"other_{uuid4().hex[:8]}@email.com",
+                  "phone_number": "555", "password": "password123"},
+        ).json["id"]
+
+        first, _ = self._my_tickets("?expand=mechanics,inventory")
+        self.assertEqual(len(first.json["items"]), 1)
+
+        # a repeat view (token already verified) touches no database at all
+        again, statements = self._my_tickets("?expand=mechanics,inventory")
+        self.assertEqual(again.json, first.json)
+        self.assertEqual(statements, [])
+        cached, statements = self._my_tickets("?expand=mechanics,inventory", {"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(statements, [])
+
+        # another customer's tickets leave this customer's pages alone
+        self._create_ticket(other, "2026-01-02")
+        _, statements = self._my_tickets("?expand=mechanics,inventory")
+        self.assertEqual(statements, [])
+
+        mechanic = self.client.post(
+            "/mechanics/",
+            json={"name": "Mech", "email": f"m_{uuid4().hex[:8]}@email.com", "phone_number": "555", "salary": 1000},
+        ).json["id"]
+        part = self.client.post("/inventory/", json={"name": "Brake Pad", "price": 25.0}).json["id"]
+        writes = [
+            lambda: self.client.put(f"/service-tickets/{ticket_id}/assign-mechanic/{mechanic}"),
+            lambda: self.client.put(f"/service-tickets/{ticket_id}/add-part/{part}"),
+            lambda: self.client.put(f"/mechanics/{mechanic}", json={"name": "Renamed"}),
+            lambda: self._create_ticket(self.customer_id, "2026-01-03"),
+        ]
+        for write in writes:
+            before, _ = self._my_tickets("?expand=mechanics,inventory")
+            write()
+            after, statements = self._my_tickets("?expand=mechanics,inventory")
+            self.assertNotEqual(statements, [])
+            self.assertNotEqual(after.headers["ETag"], before.headers["ETag"])
+
+        item = next(t for t in after.json["items"] if t["id"] == ticket_id)
+        self.assertEqual([m["name"] for m in item["mechanics"]], ["Renamed"])
+        self.assertEqual([p["name"] for p in item["inventory"]], ["Brake Pad"])
+        self.assertEqual(len(after.json["items"]), 2)
 
     def test_get_my_tickets_negative_missing_token(self):
         res = self.client.get("/customers/my-tickets")
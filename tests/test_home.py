@@ -2,6 +2,8 @@ import os
 import sys
 import types
 import unittest
+from datetime import date
+from decimal import Decimal
 
 # --- Test-time stubs/overrides ---
 try:
@@ -22,11 +24,12 @@ os.environ.setdefault("SECRET_KEY", "test-secret-key")
 
 from app import create_app
 from app.extensions import db
+from app.utils.fast_json import OrjsonProvider, orjson
 
 
 class TestHome(unittest.TestCase):
     def setUp(self):
-        self.app = create_app()
+        self.app = create_app("TestingConfig")
         self.app.config.update(
             TESTING=True,
             SQLALCHEMY_DATABASE_URI=os.environ["DATABASE_URL"],
@@ -41,3 +44,137 @@ class TestHome(unittest.TestCase):
         res = self.client.get("/")
         self.assertEqual(res.status_code, 200)
         self.assertIsInstance(res.json, dict)
+
+    @unittest.skipUnless(orjson, "orjson not installed")
+    def test_fast_json_provider_installed(self):
+        self.assertIsInstance(self.app.json, OrjsonProvider)
+        payload = {"b": Decimal("1.50"), "a": date(2026, 1, 2)}
+        self.assertEqual(self.app.json.dumps(payload), '{"a":"2026-01-02","b":"1.50"}')
+
+    def test_small_response_not_compressed(self):
+        res = self.client.get("/", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", res.headers)
+        self.assertIn("Accept-Encoding", res.headers["Vary"])
+
+    def test_sqlite_cache_backend(self):
+        import tempfile
+        from app.utils.cache_backends import SQLiteCache
+
+        path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+        backend = SQLiteCache(path, threshold=3)
+        self.assertTrue(backend.set("a", {"x": 1}))
+        self.assertEqual(backend.get("a"), {"x": 1})
+        self.assertIsNone(backend.get("missing"))
+        self.assertEqual(backend.stats()["hits"], 1)
+        self.assertEqual(backend.stats()["misses"], 1)
+
+        self.assertFalse(backend.add("a", "other"))
+        self.assertTrue(backend.add("b", "new"))
+        self.assertEqual(backend.inc("n"), 1)
+        self.assertEqual(backend.inc("n", 5), 6)
+        self.assertEqual(backend.get_many("a", "b", "nope"), [{"x": 1}, "new", None])
+
+        backend.set("gone", 1, timeout=-1)
+        self.assertFalse(backend.has("gone"))
+        self.assertTrue(backend.add("gone", 2))  # an expired key can be added again
+        self.assertTrue(backend.delete("gone"))
+
+        # a second instance (another worker process) sees the same entries
+        other = SQLiteCache(path)
+        self.assertEqual(other.get("b"), "new")
+        other.set("b", "changed")
+        self.assertEqual(backend.get("b"), "changed")
+
+        backend._prune()
+        self.assertLessEqual(backend._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0], 3)
+
+    def test_cache_tags_follow_commits(self):
+        from app.models import Customer
+        from app.utils.cache_tags import note_tags, tag_generations
+
+        with self.app.app_context():
+            before = tag_generations("customers", "custom")
+            note_tags("custom")
+            db.session.add(Customer(name="A", email="a@email.com", phone_number="555", password="x"))
+            db.session.rollback()
+            self.assertEqual(tag_generations("customers", "custom"), before)
+
+            note_tags("custom")
+            db.session.add(Customer(name="A", email="a@email.com", phone_number="555", password="x"))
+            db.session.commit()
+            after = tag_generations("customers", "custom")
+            self.assertNotEqual(after[0], before[0])  # table tags are invalidated automatically
+            self.assertNotEqual(after[1], before[1])
+
+    def test_home_reports_cache_counters(self):
+        res = self.client.get("/")
+        self.assertEqual(set(res.json["cache"]), {"hits", "misses", "hit_ratio"})
+
+    def _counting_view(self, delay=0.0, **cached_kwargs):
+        import time
+        from app.extensions import cache
+
+        calls = []
+
+        @cache.cached(make_cache_key=lambda: "test-view", **cached_kwargs)
+        def view():
+            calls.append(1)
+            time.sleep(delay)
+            return {"calls": len(calls)}
+
+        return view, calls
+
+    def test_cached_single_flight(self):
+        import threading
+        from app.extensions import cache
+
+        view, calls = self._counting_view(delay=0.2, timeout=60)
+        results, start = [], threading.Barrier(8)
+
+        def request():
+            with self.app.test_request_context("/"):
+                start.wait()
+                results.append(view())
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"calls": 1}] * 8)
+
+        with self.app.app_context():
+            cache.delete("test-view")
+        self.app.config["CACHE_COALESCE"] = False
+        start.reset()
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 9)  # without coalescing every request recomputes
+
+    def test_cached_stale_while_revalidate(self):
+        import time
+        from app.extensions import cache
+
+        view, calls = self._counting_view(timeout=1, stale=60)
+        with self.app.test_request_context("/"):
+            self.assertEqual(view(), {"calls": 1})
+            time.sleep(1.05)
+            self.assertEqual(view(), {"calls": 1})  # served stale, refreshed in the background
+            cache.wait_for_refreshes(5)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(view(), {"calls": 2})
+            cache.wait_for_refreshes(5)
+
+    def test_cached_timeout_zero_never_expires(self):
+        from app.extensions import cache
+
+        view, calls = self._counting_view(timeout=0)  # Flask-Caching: 0 = no expiry
+        with self.app.test_request_context("/"):
+            self.assertEqual(view(), {"calls": 1})
+            self.assertEqual(view(), {"calls": 1})
+            cache.wait_for_refreshes(5)
+            self.assertEqual(len(calls), 1)
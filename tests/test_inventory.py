@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import os
 import sys
 import types
@@ -19,13 +22,16 @@ except Exception:
 os.environ.setdefault("DATABASE_URL", "sqlite:///testing.db")
 os.environ.setdefault("SECRET_KEY", "test-secret-key")
 
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+
 from app import create_app
 from app.extensions import db
 
 
 class TestInventory(unittest.TestCase):
     def setUp(self):
-        self.app = create_app()
+        self.app = create_app("TestingConfig")
         self.app.config.update(
             TESTING=True,
             SQLALCHEMY_DATABASE_URI=os.environ["DATABASE_URL"],
@@ -54,17 +60,304 @@ class TestInventory(unittest.TestCase):
         res = self.client.post("/inventory/", json={"name": "Bad", "price": "abc"})
         self.assertEqual(res.status_code, 400)
 
+    def test_create_part_negative_quantity_on_hand(self):
+        res = self.client.post("/inventory/", json={"name": "Bad", "price": 1.0, "quantity_on_hand": -1})
+        self.assertEqual(res.status_code, 400)
+
+    # stock
+    def test_restock_part(self):
+        res = self.client.get(f"/inventory/{self.part_id}/stock")
+        self.assertEqual(res.json["quantity_on_hand"], None)  # untracked until counted
+
+        self.client.put(f"/inventory/{self.part_id}", json={"quantity_on_hand": 3})
+        res = self.client.post(f"/inventory/{self.part_id}/restock", json={"quantity": 4})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json, {"id": self.part_id, "quantity_on_hand": 7})
+
+    def test_restock_part_negative(self):
+        res = self.client.post(f"/inventory/{self.part_id}/restock", json={"quantity": 0})
+        self.assertEqual(res.status_code, 400)
+        res = self.client.post("/inventory/999999/restock", json={"quantity": 1})
+        self.assertEqual(res.status_code, 404)
+
+    def test_restock_part_negative_too_large(self):
+        # raw bodies: the test client's JSON encoder may not take a 100-bit integer either
+        huge = str(10**30)
+        res = self.client.post(
+            f"/inventory/{self.part_id}/restock", data=f'{{"quantity": {huge}}}', content_type="application/json"
+        )
+        self.assertEqual(res.status_code, 400)
+        res = self.client.post(
+            "/inventory/",
+            data=f'{{"name": "Bad", "price": 1.0, "quantity_on_hand": {huge}}}',
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 400)
+        res = self.client.post(f"/inventory/{self.part_id}/restock", json={"quantity": 1_000_001})
+        self.assertEqual(res.status_code, 400)
+
+        self.client.put(f"/inventory/{self.part_id}", json={"quantity_on_hand": 999_999})
+        res = self.client.post(f"/inventory/{self.part_id}/restock", json={"quantity": 2})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(self.client.get(f"/inventory/{self.part_id}/stock").json["quantity_on_hand"], 999_999)
+
+    # POST /inventory/import
+    def _import(self, body, content_type, query=""):
+        res = self.client.post(f"/inventory/import{query}", data=body, content_type=content_type)
+        self.assertEqual(res.status_code, 200)
+        return [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+
+    def test_import_parts_csv_upserts_in_batches(self):
+        self.client.put(f"/inventory/{self.part_id}", json={"sku": "SEED-1"})
+        body = (
+            "name,sku,price,quantity_on_hand\n"
+            "Seed Part,SEED-1,11.5,\n"      # update by sku
+            "Rotor,ROT-1,50,4\n"            # new
+            "Caliper,,75,\n"                # new, no sku
+            "Pads,PAD-1,abc,\n"             # bad price
+            ",,5,\n"                        # no key
+        )
+        lines = self._import(body, "text/csv", "?batch_size=2")
+        self.assertEqual([line.get("batch") for line in lines[:-1]], [1, 2, 3])
+        self.assertEqual(
+            lines[-1], {"done": True, "processed": 5, "created": 2, "updated": 1, "error_count": 2}
+        )
+        errors = [e for line in lines[:-1] for e in line["errors"]]
+        self.assertEqual([e["row"] for e in errors], [5, 6])
+
+        parts = {p["name"]: p for p in self.client.get("/inventory/").json}
+        self.assertEqual(parts["Seed Part"]["price"], 11.5)
+        self.assertEqual(parts["Rotor"]["sku"], "ROT-1")
+        self.assertEqual(self.client.get(f"/inventory/{parts['Rotor']['id']}/stock").json["quantity_on_hand"], 4)
+
+        # second file: update by name, adopt a sku for a part created without one
+        body = '{"name": "Caliper", "sku": "CAL-1", "price": 80}\n{"name": "Rotor", "price": 55}\n'
+        lines = self._import(body, "application/x-ndjson")
+        self.assertEqual(lines[-1]["updated"], 2)
+        self.assertEqual(lines[-1]["created"], 0)
+        parts = {p["name"]: p for p in self.client.get("/inventory/").json}
+        self.assertEqual(parts["Caliper"]["sku"], "CAL-1")
+        self.assertEqual(parts["Caliper"]["price"], 80)
+        self.assertEqual(parts["Rotor"]["price"], 55)
+
+    def test_import_parts_multipart_upload(self):
+        data = {"file": (io.BytesIO(b'{"name": "Belt", "price": 12}\n'), "parts.ndjson")}
+        res = self.client.post("/inventory/import", data=data, content_type="multipart/form-data")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.get_data(as_text=True).splitlines()[-1])["created"], 1)
+
+    def test_import_parts_reports_undecodable_and_unparsable_lines(self):
+        oversized = "x" * (csv.field_size_limit() + 1)
+        body = (
+            b"name,price\n"
+            b"Hose,7.25\n"
+            b"\xff\xfe,1\n"
+            + f'"{oversized}",2\n'.encode()
+            + b"Clamp,3\n"
+        )
+        lines = self._import(body, "text/csv", "?batch_size=1")
+        errors = [error for line in lines[:-1] for error in line["errors"]]
+        self.assertEqual([error["row"] for error in errors], [3, 4])
+        self.assertIn("UTF-8", errors[0]["error"])
+        self.assertIn("invalid CSV", errors[1]["error"])
+        self.assertEqual(lines[-1], {"done": True, "processed": 4, "created": 2, "updated": 0, "error_count": 2})
+
+        lines = self._import(b'{"name": "Belt", "price": 12}\n\xff\n{"name": "Cap", "price": 1}\n', "application/x-ndjson")
+        self.assertEqual(lines[0]["errors"], [{"row": 2, "error": "not valid UTF-8 (byte 1)"}])
+        self.assertEqual(lines[-1]["created"], 2)
+
+    def test_schema_upgrade_adds_sku(self):
+        with self.app.app_context():
+            # SQLite cannot drop a UNIQUE column, so rebuild the table as it was before skus
+            for statement in (
+                "CREATE TABLE inventory_old (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+                "price FLOAT NOT NULL, quantity_on_hand INTEGER, version INTEGER DEFAULT '0' NOT NULL)",
+                "INSERT INTO inventory_old SELECT id, name, price, quantity_on_hand, version FROM inventory",
+                "DROP TABLE inventory",
+                "ALTER TABLE inventory_old RENAME TO inventory",
+                "CREATE INDEX ix_inventory_name ON inventory (name)",
+                "CREATE INDEX ix_inventory_version ON inventory (version)",
+            ):
+                db.session.execute(text(statement))
+            db.session.commit()
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["schema", "upgrade"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("added column inventory.sku", result.output)
+        self.assertIn("created index uq_inventory_sku", result.output)
+        self.assertIn("schema is up to date", runner.invoke(args=["schema", "upgrade"]).output)
+
+        self.assertEqual(self._import("name,sku,price\nSeed Part,SEED-1,3\n", "text/csv")[-1]["updated"], 1)
+        self.assertEqual(self.client.get(f"/inventory/{self.part_id}").json["sku"], "SEED-1")
+        with self.app.app_context(), self.assertRaises(IntegrityError):
+            db.session.execute(text("INSERT INTO inventory (name, sku, price) VALUES ('Dup', 'SEED-1', 1)"))
+
+    def test_import_parts_negative_unknown_format(self):
+        res = self.client.post("/inventory/import", data="x", content_type="text/plain")
+        self.assertEqual(res.status_code, 400)
+
+    def test_import_parts_cli(self):
+        path = os.path.join(self.app.instance_path, f"import_{uuid4().hex[:8]}.csv")
+        os.makedirs(self.app.instance_path, exist_ok=True)
+        with open(path, "w") as f:
+            f.write("name,price\nHose,7.25\nClamp,oops\n")
+        self.addCleanup(os.remove, path)
+
+        result = self.app.test_cli_runner().invoke(args=["inventory", "import", path])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("row 3: price must be a number", result.output)
+        self.assertIn("done: 1 created, 0 updated, 1 errors", result.output)
+
+    # GET /inventory/autocomplete
+    def test_autocomplete_parts_follows_writes(self):
+        for name in ("Front Brake Pad", "Brake Rotor", "Oil Filter"):
+            self.client.post("/inventory/", json={"name": name, "price": 1.0})
+
+        res = self.client.get("/inventory/autocomplete?q=bra")
+        self.assertEqual(res.status_code, 200)
+        # names starting with the prefix come before later-word matches
+        self.assertEqual([p["name"] for p in res.json], ["Brake Rotor", "Front Brake Pad"])
+
+        rotor_id = res.json[0]["id"]
+        self.client.put(f"/inventory/{rotor_id}", json={"name": "Disc Rotor"})
+        self.client.post("/inventory/", json={"name": "Brake Fluid", "price": 8.0})
+        names = [p["name"] for p in self.client.get("/inventory/autocomplete?q=brake").json]
+        self.assertEqual(names, ["Brake Fluid", "Front Brake Pad"])
+
+        self.client.delete(f"/inventory/{rotor_id}")
+        self.assertEqual(self.client.get("/inventory/autocomplete?q=disc").json, [])
+
+    def test_autocomplete_parts_fuzzy(self):
+        self.client.post("/inventory/", json={"name": "Caliper Bracket", "price": 30.0})
+        self.assertEqual(self.client.get("/inventory/autocomplete?q=calipr").json, [])
+        res = self.client.get("/inventory/autocomplete?q=calipr&fuzzy=1")
+        self.assertEqual([p["name"] for p in res.json], ["Caliper Bracket"])
+
+    def test_autocomplete_parts_rechecks_catalog_on_an_interval(self):
+        from app.blueprints.inventory import autocomplete
+
+        self.client.post("/inventory/", json={"name": "Brake Rotor", "price": 1.0})
+        self.app.config["AUTOCOMPLETE_RECHECK_SECONDS"] = 60
+        self.assertEqual(len(self.client.get("/inventory/autocomplete?q=bra").json), 1)
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+            index = autocomplete.get_index()
+        try:
+            # a write committed by another process: catalog counter and part, no local invalidate()
+            with self.app.app_context(), db.engine.begin() as conn:
+                conn.execute(text("INSERT INTO inventory (name, price, version) VALUES ('Brake Fluid', 8.0, 99)"))
+                conn.execute(text("UPDATE table_versions SET version = 99 WHERE name = 'inventory_catalog'"))
+            statements.clear()
+
+            # within the interval a lookup neither queries the database nor takes the lock
+            with index._lock:
+                res = self.client.get("/inventory/autocomplete?q=bra")
+            self.assertEqual([p["name"] for p in res.json], ["Brake Rotor"])
+            self.assertEqual(statements, [])
+
+            self.app.config["AUTOCOMPLETE_RECHECK_SECONDS"] = 0
+            index._next_check = 0.0
+            res = self.client.get("/inventory/autocomplete?q=bra")
+            self.assertEqual([p["name"] for p in res.json], ["Brake Fluid", "Brake Rotor"])
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "before_cursor_execute", record)
+
+    def test_autocomplete_parts_negative_validation(self):
+        self.assertEqual(self.client.get("/inventory/autocomplete").status_code, 400)
+        self.assertEqual(self.client.get("/inventory/autocomplete?q=a&limit=0").status_code, 400)
+
     # GET /inventory/
     def test_get_parts(self):
         res = self.client.get("/inventory/")
         self.assertEqual(res.status_code, 200)
 
+    def test_get_parts_catalog_cache_invalidated_by_writes(self):
+        first = self.client.get("/inventory/")
+        version = int(first.headers["X-Catalog-Version"])
+
+        self.client.post("/inventory/", json={"name": "Rotor", "price": 50.0})
+        second = self.client.get("/inventory/")
+        self.assertEqual(len(second.json), len(first.json) + 1)
+        self.assertGreater(int(second.headers["X-Catalog-Version"]), version)
+
+    def test_get_parts_delta_since_version(self):
+        version = int(self.client.get("/inventory/").headers["X-Catalog-Version"])
+
+        added = self.client.post("/inventory/", json={"name": "Rotor", "price": 50.0}).json["id"]
+        doomed = self.client.post("/inventory/", json={"name": "Old Belt", "price": 5.0}).json["id"]
+        self.client.put(f"/inventory/{self.part_id}", json={"price": 11.0})
+        self.client.delete(f"/inventory/{doomed}")
+
+        res = self.client.get(f"/inventory/?since={version}")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(sorted(p["id"] for p in res.json["changed"]), sorted([self.part_id, added]))
+        self.assertEqual(res.json["deleted"], [doomed])
+
+        caught_up = self.client.get(f"/inventory/?since={res.json['version']}")
+        self.assertEqual(caught_up.json["changed"], [])
+        self.assertEqual(caught_up.json["deleted"], [])
+
+    def test_schema_upgrade_adds_catalog_version(self):
+        with self.app.app_context():
+            db.session.execute(text("DROP INDEX ix_inventory_version"))
+            db.session.execute(text("ALTER TABLE inventory DROP COLUMN version"))
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["schema", "upgrade"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("added column inventory.version", result.output)
+        self.assertIn("created index ix_inventory_version", result.output)
+
+        version = int(self.client.get("/inventory/").headers["X-Catalog-Version"])
+        self.client.put(f"/inventory/{self.part_id}", json={"price": 11.0})
+        res = self.client.get(f"/inventory/?since={version}")
+        self.assertEqual([p["id"] for p in res.json["changed"]], [self.part_id])
+
+    def test_get_parts_delta_negative_bad_since(self):
+        res = self.client.get("/inventory/?since=yesterday")
+        self.assertEqual(res.status_code, 400)
+
     # GET /inventory/<id>
     def test_get_part(self):
         res = self.client.get(f"/inventory/{self.part_id}")
         self.assertEqual(res.status_code, 200)
         self.assertEqual(res.json["id"], self.part_id)
 
+    def test_get_part_etag(self):
+        etag = self.client.get(f"/inventory/{self.part_id}").headers["ETag"]
+        res = self.client.get(f"/inventory/{self.part_id}", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 304)
+
+        self.client.put(f"/inventory/{self.part_id}", json={"price": 1.25})
+        res = self.client.get(f"/inventory/{self.part_id}", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json["price"], 1.25)
+
+    def test_table_versions_bumped_outside_the_write_transaction(self):
+        etag = self.client.get(f"/inventory/{self.part_id}").headers["ETag"]
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append((conn, statement))  # noqa: E731
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            self.client.post(f"/inventory/{self.part_id}/restock", json={"quantity": 4})
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "before_cursor_execute", record)
+
+        writer = next(conn for conn, sql in statements if sql.startswith("UPDATE inventory"))
+        bumps = [conn for conn, sql in statements if sql.startswith("UPDATE table_versions")]
+        self.assertEqual(len(bumps), 1)
+        self.assertIsNot(bumps[0], writer)
+        res = self.client.get(f"/inventory/{self.part_id}", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+
     def test_get_part_negative_not_found(self):
         res = self.client.get("/inventory/999999")
         self.assertEqual(res.status_code, 404)
@@ -2,8 +2,11 @@ import os
 import sys
 import types
 import unittest
+from datetime import date, timedelta
 from uuid import uuid4
 
+from sqlalchemy import delete, event, func, insert, select, text
+
 try:
     import flask_swagger_ui  # type: ignore
 except Exception:
@@ -21,11 +24,13 @@ os.environ.setdefault("SECRET_KEY", "test-secret-key")
 
 from app import create_app
 from app.extensions import db
+from app.models import Mechanic, MechanicDaily, MechanicTicketCount, ServiceTicket
+from app.utils.rollups import rebuild_mechanic_rollups
 
 
 class TestMechanics(unittest.TestCase):
     def setUp(self):
-        self.app = create_app()
+        self.app = create_app("TestingConfig")
         self.app.config.update(
             TESTING=True,
             SQLALCHEMY_DATABASE_URI=os.environ["DATABASE_URL"],
@@ -77,11 +82,111 @@ class TestMechanics(unittest.TestCase):
         res = self.client.get("/mechanics/")
         self.assertIn(res.status_code, (200, 500))
 
+    def _seed_mechanics(self, n):
+        with self.app.app_context():
+            db.session.execute(
+                insert(Mechanic),
+                [
+                    {
+                        "name": f"{'Alice' if i % 3 == 0 else 'Bob'} {i:05d}",
+                        "email": f"mech{i:05d}@shop{i % 4}.com",
+                        "phone_number": "555",
+                        "salary": 40000 + (i * 37) % 40000,
+                    }
+                    for i in range(n)
+                ],
+            )
+            db.session.commit()
+            db.session.execute(text("ANALYZE"))
+
+    def test_get_mechanics_keyset_pages_with_filters(self):
+        self._seed_mechanics(3000)
+        url = "/mechanics/?name=Alice&salary_min=50000&salary_max=60000&sort=-salary&limit=100"
+        seen, salaries, cursor = [], [], None
+        while True:
+            res = self.client.get(url + (f"&after={cursor}" if cursor else ""))
+            self.assertEqual(res.status_code, 200)
+            seen += [m["id"] for m in res.json["items"]]
+            salaries += [m["salary"] for m in res.json["items"]]
+            cursor = res.json["next_cursor"]
+            if not res.json["has_next"]:
+                break
+
+        with self.app.app_context():
+            expected = db.session.scalar(
+                select(func.count()).where(
+                    Mechanic.name.startswith("Alice"), Mechanic.salary.between(50000, 60000)
+                )
+            )
+        self.assertEqual(len(seen), expected)
+        self.assertEqual(len(set(seen)), expected)
+        self.assertEqual(salaries, sorted(salaries, reverse=True))
+        self.assertEqual(self.client.get(url + "&total=1").json["total"], expected)
+        self.assertNotIn("total", res.json)
+
+        res = self.client.get("/mechanics/?email=mech0001&sort=email&fields=email")
+        self.assertEqual([m["email"] for m in res.json["items"]], [f"mech{i:05d}@shop{i % 4}.com" for i in range(10, 20)])
+
+    def test_get_mechanics_prefix_ending_in_max_code_point(self):
+        top = chr(sys.maxunicode)
+        wanted = self._mechanic(f"Zed{top}{top}x")
+        self._mechanic("Zee")
+
+        res = self.client.get(f"/mechanics/?name=Zed{top}")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([m["id"] for m in res.json["items"]], [wanted])
+
+        res = self.client.get("/mechanics/?name=%F4%8F%BF%BF")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json["items"], [])
+
+    def test_get_mechanics_sorts_and_filters_use_indexes(self):
+        self._seed_mechanics(3000)
+        cases = {
+            "sort=name&name=Bob": "ix_mechanics_name_id",
+            "sort=-salary&salary_min=70000": "ix_mechanics_salary_id",
+            "sort=email&email=mech01": "sqlite_autoindex_mechanics_1",
+        }
+        for query, index in cases.items():
+            statements = []
+            record = lambda conn, cursor, statement, *args: statements.append((statement, args[0]))  # noqa: E731
+            with self.app.app_context():
+                event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                self.assertEqual(self.client.get(f"/mechanics/?{query}").status_code, 200)
+            finally:
+                with self.app.app_context():
+                    event.remove(db.engine, "before_cursor_execute", record)
+
+            sql, params = next((st, p) for st, p in statements if "FROM mechanics" in st and "LIMIT" in st)
+            with self.app.app_context():
+                plan = " | ".join(
+                    row[-1] for row in db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params)
+                )
+            self.assertIn(f"USING INDEX {index}", plan, query)
+            self.assertNotIn("TEMP B-TREE", plan, query)
+
+    def test_get_mechanics_negative_validation(self):
+        for query in ("sort=phone_number", "salary_min=lots", "limit=0", "after=garbage"):
+            res = self.client.get(f"/mechanics/?{query}")
+            self.assertEqual(res.status_code, 400, query)
+
     # GET /mechanics/<id>
     def test_get_mechanic(self):
         res = self.client.get(f"/mechanics/{self.mechanic_id}")
         self.assertEqual(res.status_code, 200)
 
+    def test_get_mechanics_etag(self):
+        etag = self.client.get("/mechanics/").headers["ETag"]
+        self.assertEqual(
+            self.client.get("/mechanics/", headers={"If-None-Match": etag}).status_code, 304
+        )
+
+        self.client.put(f"/mechanics/{self.mechanic_id}", json={"salary": 61000})
+        self.assertEqual(
+            self.client.get("/mechanics/", headers={"If-None-Match": etag}).status_code, 200
+        )
+
     def test_get_mechanic_negative_not_found(self):
         res = self.client.get("/mechanics/999999")
         self.assertEqual(res.status_code, 404)
@@ -96,7 +201,153 @@ class TestMechanics(unittest.TestCase):
         res = self.client.delete(f"/mechanics/{self.mechanic_id}")
         self.assertEqual(res.status_code, 200)
 
+    def test_delete_mechanic_with_foreign_keys_enforced(self):
+        tickets = self._tickets(2)
+        self.client.put("/service-tickets/assign-mechanics", json={"ticket_ids": tickets, "mechanic_ids": [self.mechanic_id]})
+
+        enforce = lambda conn, record: conn.execute("PRAGMA foreign_keys=ON")  # noqa: E731
+        with self.app.app_context():
+            event.listen(db.engine, "connect", enforce)
+            db.engine.dispose()  # reconnect with the pragma set
+        try:
+            res = self.client.delete(f"/mechanics/{self.mechanic_id}")
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "connect", enforce)
+                db.engine.dispose()
+
+        self.assertEqual(res.status_code, 200)
+        with self.app.app_context():
+            self.assertIsNone(db.session.get(Mechanic, self.mechanic_id))
+            self.assertIsNone(db.session.get(MechanicTicketCount, self.mechanic_id))
+            self.assertEqual(
+                db.session.scalar(select(func.count()).select_from(MechanicDaily).where(MechanicDaily.mechanic_id == self.mechanic_id)),
+                0,
+            )
+
     # GET /mechanics/leaderboard/most-tickets
     def test_mechanics_leaderboard_most_tickets(self):
         res = self.client.get("/mechanics/leaderboard/most-tickets")
         self.assertEqual(res.status_code, 200)
+
+    def _mechanic(self, name):
+        res = self.client.post(
+            "/mechanics/",
+            json={"name": name, "email": f"{uuid4().hex[:8]}@email.com", "phone_number": "555", "salary": 50000},
+        )
+        return res.json["id"]
+
+    def _tickets(self, n, service_date="2026-01-01"):
+        customer = self.client.post(
+            "/customers/",
+            json={"name": "Cust", "email": f"c_{uuid4().hex[:8]}@email.com", "phone_number": "555", "password": "pw"},
+        ).json["id"]
+        self.client.post(
+            "/service-tickets/bulk",
+            json=[
+                {"vin": f"VIN{i:014d}", "service_date": service_date, "description": "x", "customer_id": customer}
+                for i in range(n)
+            ],
+        )
+        with self.app.app_context():
+            return db.session.scalars(
+                select(ServiceTicket.id).where(ServiceTicket.customer_id == customer).order_by(ServiceTicket.id)
+            ).all()
+
+    def test_mechanics_leaderboard_follows_assignments(self):
+        busy, idle = self._mechanic("Busy"), self._mechanic("Idle")
+        tickets = self._tickets(3)
+        self.client.put("/service-tickets/assign-mechanics", json={"ticket_ids": tickets, "mechanic_ids": [busy]})
+        self.client.put(f"/service-tickets/{tickets[0]}/assign-mechanic/{busy}")  # already assigned
+        self.client.put(f"/service-tickets/{tickets[0]}/assign-mechanic/{self.mechanic_id}")
+        self.client.put(f"/service-tickets/{tickets[1]}/edit", json={"add_ids": [idle], "remove_ids": [busy]})
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            res = self.client.get("/mechanics/leaderboard/most-tickets?limit=2")
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([(m["id"], m["ticket_count"]) for m in res.json], [(busy, 2), (self.mechanic_id, 1)])
+        self.assertFalse(any("service_mechanics" in sql for sql in statements))
+
+        full = self.client.get("/mechanics/leaderboard/most-tickets").json
+        self.assertEqual([m["ticket_count"] for m in full], [2, 1, 1])
+
+    def test_mechanics_leaderboard_returns_everyone_without_limit(self):
+        for i in range(11):
+            self._mechanic(f"Mechanic {i}")
+        self.assertEqual(len(self.client.get("/mechanics/leaderboard/most-tickets").json), 12)
+        self.assertEqual(len(self.client.get("/mechanics/leaderboard/most-tickets?limit=5").json), 5)
+
+    def test_mechanics_leaderboard_negative_bad_limit(self):
+        res = self.client.get("/mechanics/leaderboard/most-tickets?limit=0")
+        self.assertEqual(res.status_code, 400)
+
+    def test_rebuild_rollups_command(self):
+        tickets = self._tickets(2)
+        self.client.put("/service-tickets/assign-mechanics", json={"ticket_ids": tickets, "mechanic_ids": [self.mechanic_id]})
+        with self.app.app_context():
+            db.session.execute(delete(MechanicTicketCount))
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["mechanics", "rebuild-rollups"])
+        self.assertEqual(result.exit_code, 0)
+        board = self.client.get("/mechanics/leaderboard/most-tickets").json
+        self.assertEqual([(m["id"], m["ticket_count"]) for m in board], [(self.mechanic_id, 2)])
+
+    # GET /mechanics/leaderboard
+    def test_mechanics_windowed_leaderboard(self):
+        today = date.today()
+        other = self._mechanic("Other")
+        recent = self._tickets(2, (today - timedelta(days=3)).isoformat())
+        old = self._tickets(3, (today - timedelta(days=60)).isoformat())
+        part = self.client.post("/inventory/", json={"name": "Pad", "price": 40.0}).json["id"]
+
+        self.client.put("/service-tickets/assign-mechanics", json={"ticket_ids": recent, "mechanic_ids": [self.mechanic_id]})
+        self.client.put("/service-tickets/assign-mechanics", json={"ticket_ids": old, "mechanic_ids": [other]})
+        self.client.put(f"/service-tickets/{recent[0]}/add-part/{part}")
+        self.client.put(f"/service-tickets/{old[0]}/add-part/{part}")
+        self.client.put(f"/service-tickets/{old[1]}/assign-mechanic/{self.mechanic_id}")
+        self.client.put(f"/service-tickets/{old[1]}/remove-mechanic/{self.mechanic_id}")
+
+        res = self.client.get("/mechanics/leaderboard?days=7")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [(m["id"], m["tickets"], m["parts_total"]) for m in res.json["results"]], [(self.mechanic_id, 2, 40.0)]
+        )
+
+        self.client.put(f"/inventory/{part}", json={"price": 50.0})
+        res = self.client.get("/mechanics/leaderboard?days=90&metric=parts_total")
+        self.assertEqual(
+            [(m["id"], m["tickets"], m["parts_total"]) for m in res.json["results"]],
+            [(self.mechanic_id, 2, 50.0), (other, 3, 50.0)],
+        )
+        res = self.client.get("/mechanics/leaderboard?days=90")
+        self.assertEqual([m["id"] for m in res.json["results"]], [other, self.mechanic_id])
+
+        day = (today - timedelta(days=60)).isoformat()
+        res = self.client.get(f"/mechanics/leaderboard?date_from={day}&date_to={day}")
+        self.assertEqual([(m["id"], m["tickets"]) for m in res.json["results"]], [(other, 3)])
+
+        # the incremental rollups match a rebuild from scratch
+        with self.app.app_context():
+            snapshot = lambda: db.session.execute(  # noqa: E731
+                select(MechanicDaily.mechanic_id, MechanicDaily.day, MechanicDaily.tickets, MechanicDaily.parts_total)
+                .where(MechanicDaily.tickets != 0)
+                .order_by(MechanicDaily.mechanic_id, MechanicDaily.day)
+            ).all()
+            before = snapshot()
+            rebuild_mechanic_rollups()
+            self.assertEqual(snapshot(), before)
+            db.session.rollback()
+
+    def test_mechanics_windowed_leaderboard_negative_validation(self):
+        for query in ("days=0", "days=abc", "metric=salary", "date_from=2026-02-01&date_to=2026-01-01", "date_from=01/01/2026"):
+            res = self.client.get(f"/mechanics/leaderboard?{query}")
+            self.assertEqual(res.status_code, 400, query)
@@ -1,8 +1,16 @@
+import csv
+import gzip
+import io
+import json
 import os
 import sys
 import types
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
+from datetime import date, timedelta
+from flask import request
+from sqlalchemy import event, func, insert, select, text, update
 from sqlalchemy.exc import StatementError
 
 try:
@@ -21,12 +29,17 @@ os.environ.setdefault("DATABASE_URL", "sqlite:///testing.db")
 os.environ.setdefault("SECRET_KEY", "test-secret-key")
 
 from app import create_app
-from app.extensions import db
+from app.extensions import db, limiter
+from app.models import MechanicTicketCount, ServiceTicket, service_inventory
+from app.utils.rollups import apply_ticket_closed
+from app.blueprints.service_tickets.routes import _ticket_filters
+from app.blueprints.service_tickets.schemas import ServiceTicketSchema
+from app.utils.serializers import fast_dump
 
 
 class TestServiceTickets(unittest.TestCase):
     def setUp(self):
-        self.app = create_app()
+        self.app = create_app("TestingConfig")
         self.app.config.update(
             TESTING=True,
             SQLALCHEMY_DATABASE_URI=os.environ["DATABASE_URL"],
@@ -136,10 +149,429 @@ class TestServiceTickets(unittest.TestCase):
         )
         self.assertEqual(res.status_code, 404)
 
+    # POST /service-tickets/bulk
+    def test_create_service_tickets_bulk(self):
+        payload = [
+            {
+                "vin": f"5HGCM82633A00435{i}",
+                "service_date": "2026-01-0{}".format(i + 1),
+                "description": "Fleet intake",
+                "customer_id": self.customer_id,
+            }
+            for i in range(3)
+        ]
+        res = self.client.post("/service-tickets/bulk", json=payload)
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json, {"created": 3, "errors": []})
+
+        listing = self.client.get("/service-tickets/")
+        self.assertEqual(len(listing.json["items"]), 4)
+
+    def test_create_service_tickets_bulk_negative_item_errors(self):
+        payload = [
+            {
+                "vin": "6HGCM82633A004352",
+                "service_date": "2026-01-02",
+                "description": "Valid",
+                "customer_id": self.customer_id,
+            },
+            {"vin": "6HGCM82633A004353"},
+            {
+                "vin": "6HGCM82633A004354",
+                "service_date": "2026-01-02",
+                "description": "Unknown customer",
+                "customer_id": 999999,
+            },
+        ]
+        res = self.client.post("/service-tickets/bulk", json=payload)
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([e["index"] for e in res.json["errors"]], [1, 2])
+        self.assertIn("Customer 999999 not found", res.json["errors"][1]["error"])
+
+        # nothing from the rejected batch was inserted
+        listing = self.client.get("/service-tickets/")
+        self.assertEqual(len(listing.json["items"]), 1)
+
+    def test_create_service_tickets_bulk_negative_not_array(self):
+        res = self.client.post("/service-tickets/bulk", json={"vin": "123"})
+        self.assertEqual(res.status_code, 400)
+
     # GET /service-tickets/
     def test_get_service_tickets(self):
         res = self.client.get("/service-tickets/")
         self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.json["items"]), 1)
+        self.assertFalse(res.json["has_next"])
+
+    def test_get_service_tickets_keyset_pages(self):
+        for day in ("2025-12-30", "2026-01-01", "2026-01-05"):
+            self.client.post(
+                "/service-tickets/",
+                json={
+                    "vin": "3HGCM82633A004352",
+                    "service_date": day,
+                    "description": "Paging",
+                    "customer_id": self.customer_id,
+                },
+            )
+
+        seen = []
+        after = None
+        while True:
+            url = "/service-tickets/?limit=2" + (f"&after={after}" if after else "")
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            seen.extend((t["service_date"], t["id"]) for t in res.json["items"])
+            after = res.json["next_cursor"]
+            if not after:
+                break
+
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_get_service_tickets_negative_bad_cursor(self):
+        res = self.client.get("/service-tickets/?after=not-a-cursor")
+        self.assertEqual(res.status_code, 400)
+
+    def test_get_service_tickets_negative_bad_limit(self):
+        res = self.client.get("/service-tickets/?limit=0")
+        self.assertEqual(res.status_code, 400)
+
+    def test_get_service_tickets_filters(self):
+        other = self.client.post(
+            "/service-tickets/",
+            json={
+                "vin": "8HGCM82633A004352",
+                "service_date": "2026-02-01",
+                "description": "Filter",
+                "customer_id": self.customer_id,
+            },
+        ).json["id"]
+        with self.app.app_context():
+            db.session.get(ServiceTicket, other).pickup_date = date(2026, 2, 3)
+            db.session.commit()
+
+        def ids(query):
+            res = self.client.get("/service-tickets/?" + query)
+            self.assertEqual(res.status_code, 200)
+            return [t["id"] for t in res.json["items"]]
+
+        self.assertEqual(ids("vin=8HGCM82633A004352"), [other])
+        self.assertEqual(ids(f"customer_id={self.customer_id}"), [self.ticket_id, other])
+        self.assertEqual(ids("service_date_from=2026-01-15"), [other])
+        self.assertEqual(ids("service_date_to=2026-01-15"), [self.ticket_id])
+        self.assertEqual(ids("status=open"), [self.ticket_id])
+        self.assertEqual(ids("status=closed"), [other])
+
+        res = self.client.get(f"/service-tickets/?customer_id={self.customer_id}&limit=1&total=1")
+        self.assertEqual((len(res.json["items"]), res.json["total"]), (1, 2))
+
+    def test_get_service_tickets_filters_negative_validation(self):
+        for query in ("status=pending", "customer_id=abc", "service_date_from=01-01-2026"):
+            res = self.client.get("/service-tickets/?" + query)
+            self.assertEqual(res.status_code, 400)
+
+    def test_get_service_tickets_filters_use_indexes(self):
+        # Large seeded table so the planner has a real choice to make
+        with self.app.app_context():
+            db.session.execute(
+                insert(ServiceTicket),
+                [
+                    {
+                        "vin": f"VIN{i:014d}",
+                        "service_date": date(2024, 1, 1) + timedelta(days=i % 700),
+                        "description": "Seeded",
+                        "customer_id": self.customer_id,
+                        "pickup_date": None if i % 10 == 0 else date(2026, 1, 1),
+                    }
+                    for i in range(20000)
+                ],
+            )
+            db.session.commit()
+            db.session.execute(text("ANALYZE"))
+
+        cases = {
+            "vin=VIN00000000000042": "ix_service_tickets_vin",
+            f"customer_id={self.customer_id}": "ix_service_tickets_customer_id_service_date",
+            "service_date_from=2025-06-01&service_date_to=2025-06-07": "ix_service_tickets_service_date_id",
+            "status=open": "ix_service_tickets_open",
+        }
+        for query, index in cases.items():
+            with self.app.test_request_context("/service-tickets/?" + query):
+                clauses, error = _ticket_filters(request.args)
+                self.assertIsNone(error)
+                stmt = (
+                    select(ServiceTicket)
+                    .where(*clauses)
+                    .order_by(ServiceTicket.service_date, ServiceTicket.id)
+                    .limit(50)
+                )
+                sql = str(stmt.compile(db.engine, compile_kwargs={"literal_binds": True}))
+                plan = " | ".join(
+                    row[-1] for row in db.session.execute(text("EXPLAIN QUERY PLAN " + sql))
+                )
+            # SEARCH = index lookup; SCAN service_tickets would be a full table scan
+            self.assertIn(f"SEARCH service_tickets USING INDEX {index}", plan, query)
+            self.assertNotIn("SCAN service_tickets", plan, query)
+
+    # GET /service-tickets/search
+    def test_search_service_tickets(self):
+        for description in ("Brake squeal on front axle", "Brake fluid flush", "Squeal from belt"):
+            self.client.post(
+                "/service-tickets/",
+                json={
+                    "vin": "9HGCM82633A004352",
+                    "service_date": "2026-01-02",
+                    "description": description,
+                    "customer_id": self.customer_id,
+                },
+            )
+
+        res = self.client.get("/service-tickets/search?q=brake squeal")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [t["description"] for t in res.json["items"]], ["Brake squeal on front axle"]
+        )
+
+        res = self.client.get("/service-tickets/search?q=brake&per_page=1")
+        self.assertEqual(len(res.json["items"]), 1)
+        self.assertTrue(res.json["has_next"])
+
+    def test_search_service_tickets_bulk_created_are_indexed(self):
+        self.client.post(
+            "/service-tickets/bulk",
+            json=[{
+                "vin": "9HGCM82633A004353",
+                "service_date": "2026-01-02",
+                "description": "Transmission shudder",
+                "customer_id": self.customer_id,
+            }],
+        )
+        res = self.client.get("/service-tickets/search?q=shudder")
+        self.assertEqual(len(res.json["items"]), 1)
+
+    def test_schema_upgrade_adds_search_index(self):
+        # a database from before the search index existed
+        with self.app.app_context():
+            for statement in (
+                "DROP TABLE service_tickets_fts",
+                *(f"DROP TRIGGER service_tickets_fts_{suffix}" for suffix in ("ai", "ad", "au")),
+                "DROP INDEX ix_service_tickets_vin",
+            ):
+                db.session.execute(text(statement))
+            db.session.commit()
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["schema", "upgrade"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("created index ix_service_tickets_vin", result.output)
+        self.assertIn("created and filled service_tickets_fts", result.output)
+        res = self.client.get("/service-tickets/search?q=oil")
+        self.assertEqual([t["id"] for t in res.json["items"]], [self.ticket_id])
+
+        self.assertIn("schema is up to date", runner.invoke(args=["schema", "upgrade"]).output)
+
+    def test_search_service_tickets_negative_missing_query(self):
+        res = self.client.get("/service-tickets/search?q=%22%22")
+        self.assertEqual(res.status_code, 400)
+
+    # GET /service-tickets/export
+    def test_export_service_tickets_ndjson(self):
+        self.app.config["EXPORT_BATCH_SIZE"] = 1
+        self.client.put(
+            f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}"
+        )
+        self.client.post(
+            "/service-tickets/",
+            json={
+                "vin": "4HGCM82633A004352",
+                "service_date": "2026-01-02",
+                "description": "Export",
+                "customer_id": self.customer_id,
+            },
+        )
+        res = self.client.get("/service-tickets/export")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, "application/x-ndjson")
+
+        rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["id"], self.ticket_id)
+        self.assertEqual(rows[0]["mechanics"][0]["id"], self.mechanic_id)
+
+    def test_export_service_tickets_csv(self):
+        res = self.client.get("/service-tickets/export?format=csv")
+        self.assertEqual(res.status_code, 200)
+
+        rows = list(csv.reader(io.StringIO(res.get_data(as_text=True))))
+        self.assertEqual(rows[0][0], "id")
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], "2026-01-01")
+
+    def test_export_service_tickets_gzip_stream(self):
+        self.app.config["EXPORT_BATCH_SIZE"] = 1
+        self.client.post(
+            "/service-tickets/bulk",
+            json=[
+                {
+                    "vin": f"AHGCM82633A00{i:04d}",
+                    "service_date": "2026-01-02",
+                    "description": "Compressed export",
+                    "customer_id": self.customer_id,
+                }
+                for i in range(20)
+            ],
+        )
+        res = self.client.get("/service-tickets/export", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.is_streamed)
+        self.assertEqual(res.headers["Content-Encoding"], "gzip")
+
+        lines = gzip.decompress(res.get_data()).decode().splitlines()
+        self.assertEqual(len(lines), 21)
+
+    def test_get_service_tickets_compressed_keeps_conditional_get(self):
+        self.client.post(
+            "/service-tickets/bulk",
+            json=[
+                {
+                    "vin": f"BHGCM82633A00{i:04d}",
+                    "service_date": "2026-01-02",
+                    "description": "Compressed listing",
+                    "customer_id": self.customer_id,
+                }
+                for i in range(10)
+            ],
+        )
+        res = self.client.get("/service-tickets/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(res.headers["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(res.get_data()))["items"]), 11)
+        self.assertTrue(res.headers["ETag"].startswith("W/"))
+
+        again = self.client.get(
+            "/service-tickets/",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": res.headers["ETag"]},
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_export_service_tickets_reads_one_bounded_select_per_batch(self):
+        self.app.config["EXPORT_BATCH_SIZE"] = 2
+        self.client.post(
+            "/service-tickets/bulk",
+            json=[
+                {
+                    "vin": f"CHGCM82633A00{i:04d}",
+                    "service_date": "2026-01-02",
+                    "description": "Batched export",
+                    "customer_id": self.customer_id,
+                }
+                for i in range(4)
+            ],
+        )
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.lstrip().startswith("SELECT service_tickets.id"):
+                statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            res = self.client.get("/service-tickets/export")
+            lines = res.get_data(as_text=True).splitlines()
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(res.status_code, 200)
+        ids = [json.loads(line)["id"] for line in lines]
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(ids, sorted(ids))
+        # 5 tickets in batches of 2: three SELECTs, each with a LIMIT, the later ones keyed on id
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(all("LIMIT" in s for s in statements))
+        self.assertTrue(all("service_tickets.id >" in s for s in statements[1:]))
+
+    def test_export_service_tickets_negative_bad_format(self):
+        res = self.client.get("/service-tickets/export?format=xml")
+        self.assertEqual(res.status_code, 400)
+
+    # GET /service-tickets/<ticket_id>
+    def test_get_service_ticket(self):
+        res = self.client.get(f"/service-tickets/{self.ticket_id}")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json["id"], self.ticket_id)
+
+    def test_get_service_ticket_sparse_fields(self):
+        self.client.put(
+            f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}"
+        )
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            res = self.client.get(
+                f"/service-tickets/{self.ticket_id}?fields=id,service_date,mechanics.name"
+            )
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.json,
+            {"id": self.ticket_id, "service_date": "2026-01-01", "mechanics": [{"name": "Mech One"}]},
+        )
+        sql = " ".join(statements)
+        self.assertNotIn("description", sql)
+        self.assertNotIn("salary", sql)
+        self.assertNotIn("service_inventory", sql)
+
+    def test_fast_dump_matches_marshmallow(self):
+        self.client.put(
+            f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}"
+        )
+        self.client.put(f"/service-tickets/{self.ticket_id}/add-part/{self.part_id}")
+
+        with self.app.app_context():
+            tickets = ServiceTicket.query.all()
+            for only in (None, ("id", "service_date", "mechanics.name")):
+                schema = ServiceTicketSchema(many=True, only=only)
+                expected = schema.dump(tickets)
+                actual = fast_dump(schema, tickets)
+                self.assertEqual(actual, expected)
+                self.assertEqual([list(row) for row in actual], [list(row) for row in expected])
+
+    def test_get_service_tickets_expand_none(self):
+        res = self.client.get("/service-tickets/?fields=id&expand=")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json["items"], [{"id": self.ticket_id}])
+
+    def test_get_service_tickets_negative_unknown_field(self):
+        for query in ("fields=id,secret", "expand=customer", "fields=mechanics.password"):
+            res = self.client.get("/service-tickets/?" + query)
+            self.assertEqual(res.status_code, 400)
+
+    def test_get_service_ticket_negative_not_found(self):
+        res = self.client.get("/service-tickets/999999")
+        self.assertEqual(res.status_code, 404)
+
+    def test_get_service_ticket_etag_follows_association_writes(self):
+        url = f"/service-tickets/{self.ticket_id}"
+        etag = self.client.get(url).headers["ETag"]
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+        # written with a Core INSERT on service_mechanics, not through the ORM
+        self.client.put(f"{url}/assign-mechanic/{self.mechanic_id}")
+        res = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.json["mechanics"]), 1)
 
     # PUT /service-tickets/<ticket_id>
     def test_edit_service_ticket_pickup_date(self):
@@ -175,6 +607,142 @@ class TestServiceTickets(unittest.TestCase):
         )
         self.assertEqual(res.status_code, 200)
 
+    def test_assign_mechanic_is_idempotent(self):
+        url = f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}"
+        self.client.put(url)
+        res = self.client.put(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([m["id"] for m in res.json["mechanics"]], [self.mechanic_id])
+
+    def test_remove_mechanic_not_assigned(self):
+        res = self.client.put(
+            f"/service-tickets/{self.ticket_id}/remove-mechanic/{self.mechanic_id}"
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json["mechanics"], [])
+
+    # assign many mechanics to many tickets
+    # auto-assign
+    def _new_ticket(self, **extra):
+        res = self.client.post(
+            "/service-tickets/",
+            json={
+                "vin": "1HGCM82633A004352",
+                "service_date": "2026-01-05",
+                "description": "Auto",
+                "customer_id": self.customer_id,
+                **extra,
+            },
+        )
+        return res
+
+    def test_auto_assign_picks_least_loaded_mechanic(self):
+        self.client.put(f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}")
+
+        res = self.client.post(f"/service-tickets/{self._new_ticket().json['id']}/auto-assign")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json["mechanic_id"], self.mechanic2_id)
+
+        # both have one open ticket now: ties go to the lowest id
+        res = self._new_ticket(auto_assign=True)
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual([m["id"] for m in res.json["mechanics"]], [self.mechanic_id])
+
+        # picking up a ticket closes it for its mechanic's workload
+        with self.app.app_context():
+            apply_ticket_closed(self.ticket_id)
+            db.session.get(ServiceTicket, self.ticket_id).pickup_date = date(2026, 1, 10)
+            db.session.commit()
+        res = self.client.post(f"/service-tickets/{self._new_ticket().json['id']}/auto-assign")
+        self.assertEqual(res.json["mechanic_id"], self.mechanic_id)
+
+    def test_auto_assign_sees_writes_from_other_processes(self):
+        self.client.post(f"/service-tickets/{self.ticket_id}/auto-assign")  # heap loaded, mechanic 1 busy
+        with self.app.app_context():
+            # as if another worker had assigned five tickets to mechanic 2
+            db.session.execute(
+                update(MechanicTicketCount)
+                .where(MechanicTicketCount.mechanic_id == self.mechanic2_id)
+                .values(open_tickets=5)
+            )
+            db.session.commit()
+        res = self.client.post(f"/service-tickets/{self._new_ticket().json['id']}/auto-assign")
+        self.assertEqual(res.json["mechanic_id"], self.mechanic_id)
+
+    def test_auto_assign_negative_no_mechanics(self):
+        self.client.delete(f"/mechanics/{self.mechanic_id}")
+        self.client.delete(f"/mechanics/{self.mechanic2_id}")
+        res = self.client.post(f"/service-tickets/{self.ticket_id}/auto-assign")
+        self.assertEqual(res.status_code, 409)
+        res = self._new_ticket(auto_assign=True)
+        self.assertEqual(res.status_code, 409)
+
+    def test_auto_assign_negative_not_found(self):
+        res = self.client.post("/service-tickets/999999/auto-assign")
+        self.assertEqual(res.status_code, 404)
+
+    def test_assign_mechanics_bulk(self):
+        t2 = self.client.post(
+            "/service-tickets/",
+            json={
+                "vin": "7HGCM82633A004352",
+                "service_date": "2026-01-02",
+                "description": "Second",
+                "customer_id": self.customer_id,
+            },
+        ).json["id"]
+        self.client.put(
+            f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}"
+        )
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            res = self.client.put(
+                "/service-tickets/assign-mechanics",
+                json={
+                    "ticket_ids": [self.ticket_id, t2],
+                    "mechanic_ids": [self.mechanic_id, self.mechanic2_id],
+                },
+            )
+        finally:
+            with self.app.app_context():
+                event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(res.status_code, 200)
+        # one of the four pairs already existed
+        self.assertEqual(res.json["assigned"], 3)
+        self.assertEqual(sum(sql.startswith("INSERT") and "service_mechanics" in sql for sql in statements), 1)
+
+        board = self.client.get("/mechanics/leaderboard/most-tickets").json
+        self.assertEqual(
+            sorted((m["id"], m["ticket_count"]) for m in board),
+            [(self.mechanic_id, 2), (self.mechanic2_id, 2)],
+        )
+
+        tickets = self.client.get("/service-tickets/").json["items"]
+        for tid in (self.ticket_id, t2):
+            ticket = next(t for t in tickets if t["id"] == tid)
+            self.assertEqual(
+                sorted(m["id"] for m in ticket["mechanics"]),
+                sorted([self.mechanic_id, self.mechanic2_id]),
+            )
+
+    def test_assign_mechanics_bulk_negative_missing_ticket(self):
+        res = self.client.put(
+            "/service-tickets/assign-mechanics",
+            json={"ticket_ids": [999999], "mechanic_ids": [self.mechanic_id]},
+        )
+        self.assertEqual(res.status_code, 404)
+
+    def test_assign_mechanics_bulk_negative_validation(self):
+        res = self.client.put(
+            "/service-tickets/assign-mechanics",
+            json={"ticket_ids": [], "mechanic_ids": [self.mechanic_id]},
+        )
+        self.assertEqual(res.status_code, 400)
+
     # bulk edit mechanics
     def test_edit_ticket_mechanics(self):
         res = self.client.put(
@@ -183,6 +751,13 @@ class TestServiceTickets(unittest.TestCase):
         )
         self.assertEqual(res.status_code, 200)
 
+        res = self.client.put(
+            f"/service-tickets/{self.ticket_id}/edit",
+            json={"add_ids": [self.mechanic2_id], "remove_ids": [self.mechanic_id]},
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([m["id"] for m in res.json["mechanics"]], [self.mechanic2_id])
+
     def test_edit_ticket_mechanics_negative_conflict_ids(self):
         res = self.client.put(
             f"/service-tickets/{self.ticket_id}/edit",
@@ -204,6 +779,176 @@ class TestServiceTickets(unittest.TestCase):
         )
         self.assertEqual(res.status_code, 200)
 
+    # revenue rollups
+    def test_parts_rollups_follow_adds_and_price_changes(self):
+        url = f"/service-tickets/{self.ticket_id}/add-part/{self.part_id}"
+        self.client.put(url)
+        self.client.put(url)  # re-adding the same part is not double counted
+
+        summary = self.client.get(f"/service-tickets/{self.ticket_id}/summary")
+        self.assertEqual(summary.status_code, 200)
+        self.assertEqual(summary.json["parts_total"], 9.99)
+
+        self.client.put(f"/inventory/{self.part_id}", json={"price": 12.5})
+        self.assertEqual(
+            self.client.get(f"/service-tickets/{self.ticket_id}/summary").json["parts_total"], 12.5
+        )
+        self.assertEqual(
+            self.client.get("/service-tickets/revenue/daily?date_from=2026-01-01&date_to=2026-01-01").json,
+            [{"day": "2026-01-01", "parts_total": 12.5}],
+        )
+        self.assertEqual(
+            self.client.get(f"/service-tickets/revenue/customers/{self.customer_id}").json["parts_total"],
+            12.5,
+        )
+
+        self.client.delete(f"/inventory/{self.part_id}")
+        self.assertEqual(
+            self.client.get(f"/service-tickets/{self.ticket_id}/summary").json["parts_total"], 0
+        )
+        self.assertEqual(
+            self.client.get(f"/service-tickets/revenue/customers/{self.customer_id}").json["parts_total"],
+            0,
+        )
+
+    def test_schema_upgrade_backfills_parts_totals(self):
+        self.client.put(f"/service-tickets/{self.ticket_id}/add-part/{self.part_id}")
+        self.client.put(f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}")
+        # a database from before the rollups: no parts_total column, empty rollup tables
+        with self.app.app_context():
+            for statement in (
+                "ALTER TABLE service_tickets DROP COLUMN parts_total",
+                "DELETE FROM daily_revenue",
+                "DELETE FROM customer_revenue",
+                "DELETE FROM mechanic_daily",
+                "DELETE FROM mechanic_ticket_counts",
+            ):
+                db.session.execute(text(statement))
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["schema", "upgrade"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("added column service_tickets.parts_total", result.output)
+        self.assertEqual(self.client.get(f"/service-tickets/{self.ticket_id}/summary").json["parts_total"], 9.99)
+        self.assertEqual(
+            self.client.get("/service-tickets/revenue/daily").json, [{"day": "2026-01-01", "parts_total": 9.99}]
+        )
+        self.assertEqual(
+            self.client.get(f"/service-tickets/revenue/customers/{self.customer_id}").json["parts_total"], 9.99
+        )
+        board = self.client.get("/mechanics/leaderboard/most-tickets").json
+        self.assertEqual(board[0]["id"], self.mechanic_id)
+        self.assertEqual(board[0]["ticket_count"], 1)
+
+    # stock reservation
+    def _tracked_part(self, quantity_on_hand, price=20.0):
+        res = self.client.post(
+            "/inventory/",
+            json={"name": f"Tracked {uuid4().hex[:6]}", "price": price, "quantity_on_hand": quantity_on_hand},
+        )
+        self.assertIn(res.status_code, (200, 201))
+        return res.json["id"]
+
+    def test_reserve_part_for_ticket(self):
+        part_id = self._tracked_part(5)
+        url = f"/service-tickets/{self.ticket_id}/reserve-part/{part_id}"
+        self.assertEqual(self.client.post(url, json={"quantity": 2}).status_code, 200)
+        self.assertEqual(self.client.post(url, json={"quantity": 3}).status_code, 200)
+
+        self.assertEqual(self.client.get(f"/inventory/{part_id}/stock").json["quantity_on_hand"], 0)
+        summary = self.client.get(f"/service-tickets/{self.ticket_id}/summary").json
+        self.assertEqual(summary["parts_total"], 100.0)
+
+        # price changes are weighted by the quantity used
+        self.client.put(f"/inventory/{part_id}", json={"price": 10.0})
+        summary = self.client.get(f"/service-tickets/{self.ticket_id}/summary").json
+        self.assertEqual(summary["parts_total"], 50.0)
+
+    def test_schema_upgrade_adds_stock_columns(self):
+        self.client.put(f"/service-tickets/{self.ticket_id}/add-part/{self.part_id}")
+        with self.app.app_context():
+            db.session.execute(text("ALTER TABLE inventory DROP COLUMN quantity_on_hand"))
+            db.session.execute(text("ALTER TABLE service_inventory DROP COLUMN quantity"))
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["schema", "upgrade"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("added column inventory.quantity_on_hand", result.output)
+        self.assertIn("added column service_inventory.quantity", result.output)
+
+        self.assertIsNone(self.client.get(f"/inventory/{self.part_id}/stock").json["quantity_on_hand"])
+        self.client.post(f"/inventory/{self.part_id}/restock", json={"quantity": 1})
+        url = f"/service-tickets/{self.ticket_id}/reserve-part/{self.part_id}"
+        self.assertEqual(self.client.post(url, json={"quantity": 1}).status_code, 200)
+        self.assertEqual(self.client.get(f"/service-tickets/{self.ticket_id}/summary").json["parts_total"], 19.98)
+
+    def test_reserve_part_negative_insufficient_stock(self):
+        part_id = self._tracked_part(1)
+        res = self.client.post(
+            f"/service-tickets/{self.ticket_id}/reserve-part/{part_id}", json={"quantity": 2}
+        )
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(self.client.get(f"/inventory/{part_id}/stock").json["quantity_on_hand"], 1)
+        self.assertEqual(
+            self.client.get(f"/service-tickets/{self.ticket_id}/summary").json["parts_total"], 0
+        )
+
+    def test_reserve_part_negative_validation(self):
+        url = f"/service-tickets/{self.ticket_id}/reserve-part/{self.part_id}"
+        self.assertEqual(self.client.post(url, json={"quantity": 0}).status_code, 400)
+        self.assertEqual(self.client.post(url, json={}).status_code, 400)
+
+    def test_add_part_to_ticket_negative_out_of_stock(self):
+        part_id = self._tracked_part(0)
+        res = self.client.put(f"/service-tickets/{self.ticket_id}/add-part/{part_id}")
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(self.client.get(f"/service-tickets/{self.ticket_id}").json["inventory"], [])
+
+    def test_reserve_part_concurrent_never_oversells(self):
+        part_id = self._tracked_part(50)
+        tickets = [self.ticket_id]
+        for i in range(3):
+            t = self.client.post(
+                "/service-tickets/",
+                json={
+                    "vin": f"VINRESERVE{i:07d}",
+                    "service_date": "2026-01-02",
+                    "description": "Concurrent reservation",
+                    "customer_id": self.customer_id,
+                },
+            )
+            tickets.append(t.json["id"])
+
+        def attempt(i):
+            client = self.app.test_client()
+            res = client.post(
+                f"/service-tickets/{tickets[i % len(tickets)]}/reserve-part/{part_id}", json={"quantity": 1}
+            )
+            return res.status_code
+
+        # 200 requests from one address would trip the default rate limit
+        limiter.enabled = False
+        self.addCleanup(setattr, limiter, "enabled", True)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            statuses = list(pool.map(attempt, range(200)))
+
+        self.assertEqual(statuses.count(200), 50)
+        self.assertEqual(statuses.count(409), 150)
+        self.assertEqual(self.client.get(f"/inventory/{part_id}/stock").json["quantity_on_hand"], 0)
+        with self.app.app_context():
+            used = db.session.scalar(
+                select(func.sum(service_inventory.c.quantity)).where(service_inventory.c.inventory_id == part_id)
+            )
+        self.assertEqual(used, 50)
+
+    def test_ticket_summary_negative_not_found(self):
+        res = self.client.get("/service-tickets/999999/summary")
+        self.assertEqual(res.status_code, 404)
+
+    def test_daily_revenue_negative_bad_date(self):
+        res = self.client.get("/service-tickets/revenue/daily?date_from=2026/01/01")
+        self.assertEqual(res.status_code, 400)
+
     def test_add_part_to_ticket_negative_part_not_found(self):
         res = self.client.put(
             f"/service-tickets/{self.ticket_id}/add-part/999999"